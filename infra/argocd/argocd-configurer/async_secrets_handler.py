@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Async Secrets Handler for Cluster API
+asyncio-native variant of SecretsHandler: kubectl runs as asyncio subprocesses, so many
+clusters and namespaces can be served from one event loop without a thread per operation
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import subprocess
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from namespace_registrations import validate_selector
+from secrets_handler import (
+    CircuitBreaker,
+    ClusterUnavailableError,
+    Deadline,
+    DeadlineExceededError,
+    SECRET_CATEGORIES,
+    SecretsHandler,
+    _get_circuit_breaker,
+)
+
+logger = logging.getLogger(__name__)
+
+class AsyncSecretsHandler(SecretsHandler):
+    """SecretsHandler with coroutine versions of the public operations, named with an _async suffix.
+
+    Responses, circuit breakers and scheduler slots are shared with SecretsHandler: async
+    operations take the same fair per-cluster slots as threaded ones, waiting for them
+    without blocking the event loop. Blocking work (inventory writes, namespace
+    registrations) runs on the loop's default executor. The synchronous methods remain available.
+    """
+
+    async def _in_thread(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking call on the loop's default executor"""
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+
+    async def _run_kubectl_async(self, cluster_name: str, args: List[str], timeout: float, input: Optional[str] = None,
+                                 deadline: Optional[Deadline] = None) -> subprocess.CompletedProcess:
+        """Async variant of _run_kubectl. The kubectl process is killed on timeout and on cancellation"""
+        breaker = await self._admit_kubectl_async(cluster_name, deadline)
+
+        async with self.scheduler.slot_async(cluster_name, deadline.remaining() if deadline is not None else None) as acquired:
+            if not acquired:
+                breaker.record_cancelled()
+                raise DeadlineExceededError(f"Request deadline of {deadline.seconds} seconds exceeded")
+
+            args, timeout = self._clamp_to_deadline(args, timeout, deadline)
+            return await self._run_kubectl_command_async(cluster_name, breaker, args, timeout, input, deadline)
+
+    async def _admit_kubectl_async(self, cluster_name: str, deadline: Optional[Deadline]) -> CircuitBreaker:
+        """Async variant of _admit_kubectl, waiting for a half-open probe without blocking the loop"""
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceededError(f"Request deadline of {deadline.seconds} seconds exceeded")
+
+        breaker = _get_circuit_breaker(cluster_name, self.circuit_failure_threshold, self.circuit_reset_timeout)
+        if not await breaker.allow_request_async(deadline.remaining() if deadline is not None else self.timeout):
+            raise self._circuit_open_error(cluster_name, breaker)
+        return breaker
+
+    async def _run_kubectl_command_async(self, cluster_name: str, breaker: CircuitBreaker, args: List[str], timeout: float,
+                                         input: Optional[str], deadline: Optional[Deadline]) -> subprocess.CompletedProcess:
+        """Run kubectl through the runner without blocking the loop and report the outcome to the cluster's circuit breaker"""
+        cmd = self._kubectl_cmd(cluster_name, args)
+        started_at = time.monotonic()
+
+        try:
+            result = await self.runner.run_async(cmd, input, timeout)
+        except subprocess.TimeoutExpired:
+            if deadline is not None and deadline.expired():
+                breaker.record_cancelled()
+                raise DeadlineExceededError(f"Request deadline of {deadline.seconds} seconds exceeded")
+            breaker.record_failure()
+            self.cluster_registry.record_probe(cluster_name, False, time.monotonic() - started_at)
+            raise
+        except asyncio.CancelledError:
+            breaker.record_cancelled()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+
+        return self._record_kubectl_result(cluster_name, breaker, result, time.monotonic() - started_at)
+
+    async def get_secrets_for_cluster_async(self, cluster_name: str, deadline: Optional[Deadline] = None,
+                                            categories: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Async variant of SecretsHandler.get_secrets_for_cluster"""
+        if deadline is None:
+            deadline = Deadline(self.timeout)
+
+        try:
+            self._validate_cluster(cluster_name)
+            categories = self._secret_categories(categories)
+
+            logger.info(f"Retrieving secrets for cluster '{cluster_name}'...")
+
+            try:
+                listed = dict(zip(categories, await self._gather_within([
+                    self._get_secrets_with_label_async(
+                        cluster_name, SECRET_CATEGORIES[category][0], SECRET_CATEGORIES[category][1], deadline
+                    )
+                    for category in categories
+                ], deadline)))
+            except ClusterUnavailableError as e:
+                logger.warning(str(e))
+                return self._unreachable_secrets_response(cluster_name, e)
+            except DeadlineExceededError:
+                logger.warning(f"Timeout waiting for kubectl commands for cluster '{cluster_name}'")
+                return self._failed_secrets_response(cluster_name, "timeout", f"Commands timed out after {deadline.seconds} seconds")
+            except Exception as e:
+                logger.error(f"Error executing parallel kubectl commands for cluster '{cluster_name}': {e}")
+                return self._failed_secrets_response(cluster_name, "error", f"Error executing commands: {str(e)}")
+
+            return self._secrets_response(
+                cluster_name, listed.get("repo_creds"), listed.get("docker_creds"), listed.get("helm_creds")
+            )
+
+        except Exception as e:
+            logger.error(f"Error getting secrets for cluster '{cluster_name}': {str(e)}")
+            raise
+
+    async def _get_secrets_with_label_async(self, cluster_name: str, label_selector: str, namespace: Optional[str] = None,
+                                            deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        """Async variant of _get_secrets_with_label, paging through the list API"""
+        secrets: List[Dict[str, Any]] = []
+        continue_token = ""
+
+        try:
+            while True:
+                args = self._list_page_args(label_selector, namespace, continue_token)
+
+                logger.info(f"Running kubectl command for cluster '{cluster_name}': kubectl {' '.join(args)}")
+
+                result = await self._run_kubectl_read_async(cluster_name, args, timeout=self.timeout, deadline=deadline)
+
+                page, continue_token = self._parse_list_page(cluster_name, result)
+                secrets.extend(page)
+
+                if not continue_token:
+                    await self._in_thread(self._index_listing, cluster_name, label_selector, namespace, secrets)
+                    return secrets
+
+        except (ClusterUnavailableError, DeadlineExceededError):
+            raise
+        except RuntimeError:
+            # kubectl failure, already logged
+            return []
+        except subprocess.TimeoutExpired:
+            logger.warning(f"kubectl command timed out for cluster '{cluster_name}' after {self.timeout} seconds")
+            return []
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse kubectl output for cluster '{cluster_name}': {e}")
+            return []
+        except Exception as e:
+            logger.error(f"Error getting secrets with label '{label_selector}' for cluster '{cluster_name}': {e}")
+            return []
+
+    async def _run_kubectl_read_async(self, cluster_name: str, args: List[str], timeout: float,
+                                      deadline: Optional[Deadline] = None) -> subprocess.CompletedProcess:
+        """Async variant of _run_kubectl_read. The losing read is cancelled, which kills its kubectl"""
+        if not self.hedge_reads:
+            return await self._timed_read_async(cluster_name, args, timeout, deadline)
+
+        self.hedge_budget.record_read()
+        threshold = self._hedge_threshold(cluster_name)
+        if threshold is None:
+            return await self._timed_read_async(cluster_name, args, timeout, deadline)
+
+        primary = asyncio.ensure_future(self._timed_read_async(cluster_name, args, timeout, deadline))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=min(threshold, deadline.remaining()) if deadline is not None else threshold)
+            if done:
+                return primary.result()
+
+            if (deadline is None or not deadline.expired()) and self.hedge_budget.try_spend():
+                logger.info(f"Hedging read for cluster '{cluster_name}' after {threshold:.3f} seconds: kubectl {' '.join(args)}")
+                hedge = asyncio.ensure_future(self._timed_read_async(cluster_name, args, timeout, deadline))
+                tasks.add(hedge)
+
+            first_error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=deadline.remaining() if deadline is not None else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise DeadlineExceededError(f"Request deadline of {deadline.seconds} seconds exceeded")
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_budget.record_hedge_won()
+                        return task.result()
+                    first_error = first_error or task.exception()
+            raise first_error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _timed_read_async(self, cluster_name: str, args: List[str], timeout: float,
+                                deadline: Optional[Deadline]) -> subprocess.CompletedProcess:
+        """Async variant of _timed_read"""
+        started_at = time.monotonic()
+        result = await self._run_kubectl_async(cluster_name, args, timeout=timeout, deadline=deadline)
+        if result.returncode == 0:
+            self.latency_tracker.record(cluster_name, time.monotonic() - started_at)
+        return result
+
+    async def add_docker_secret_async(self, cluster_name: str, secret_name: str, password: str, username: str, namespaces: List[str],
+                                      upsert: bool = False, deadline: Optional[Deadline] = None,
+                                      namespace_selector: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant of SecretsHandler.add_docker_secret"""
+        try:
+            self._validate_cluster(cluster_name)
+
+            if namespace_selector:
+                validate_selector(namespace_selector)
+                # A single namespace listing, run off the loop
+                namespaces = await self._in_thread(
+                    self._with_selected_namespaces, cluster_name, namespaces, namespace_selector, deadline
+                )
+
+            checks = await self._run_for_namespaces_async(
+                self._docker_secret_targets(secret_name, namespaces),
+                lambda target: self._check_existing_secret_in_namespace_async(cluster_name, target[1], target[0], deadline),
+                deadline
+            )
+            existing_error = self._existing_docker_secrets_error(namespaces, checks, upsert)
+            if existing_error:
+                return existing_error
+
+            manifests = self._docker_secret_manifests(secret_name, password, username, namespaces)
+            apply_results = await self._apply_changed_manifests_async(cluster_name, manifests, checks, deadline)
+
+            response = self._docker_secret_response(cluster_name, secret_name, namespaces, checks, manifests, apply_results)
+            if namespace_selector:
+                response["registration"] = await self._in_thread(
+                    self._register_namespace_selector, cluster_name, secret_name, namespace_selector, apply_results
+                )
+            return response
+
+        except Exception as e:
+            logger.error(f"Error adding Docker secret to cluster '{cluster_name}': {str(e)}")
+            raise
+
+    async def add_helm_repo_secret_async(self, cluster_name: str, secret_name: str, repository_url: str, use_oci: bool, password: str,
+                                         username: str, upsert: bool = False, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Async variant of SecretsHandler.add_helm_repo_secret"""
+        try:
+            self._validate_repository_url(repository_url)
+            self._validate_cluster(cluster_name)
+
+            existing_secret = await self._check_existing_helm_secret_async(cluster_name, secret_name, deadline)
+
+            if existing_secret['exists'] and not upsert:
+                return self._existing_helm_secret_error(existing_secret)
+
+            helm_secret_yaml = self._generate_helm_secret_yaml(secret_name, repository_url, use_oci, password, username)
+            results = await self._apply_changed_manifests_async(cluster_name, [("argocd", helm_secret_yaml)], [existing_secret], deadline)
+
+            return self._helm_secret_response(cluster_name, secret_name, repository_url, existing_secret, results[0])
+
+        except Exception as e:
+            logger.error(f"Error adding Helm repository secret to cluster '{cluster_name}': {str(e)}")
+            raise
+
+    async def _run_for_namespaces_async(self, items: List[Any], func: Callable[[Any], Awaitable[Any]],
+                                        deadline: Optional[Deadline] = None) -> List[Any]:
+        """Async variant of _run_for_namespaces. Scheduler slots bound the per-cluster concurrency"""
+        return await self._gather_within([func(item) for item in items], deadline)
+
+    async def _gather_within(self, awaitables: List[Awaitable[Any]], deadline: Optional[Deadline]) -> List[Any]:
+        """Run awaitables concurrently until all finish, one fails or the deadline expires
+        (DeadlineExceededError). Unfinished ones are cancelled, which kills their kubectl"""
+        tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(*tasks),
+                deadline.remaining() if deadline is not None else None
+            )
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError(f"Request deadline of {deadline.seconds} seconds exceeded")
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Wait for cancelled kubectl children to be killed and reaped
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _check_existing_secret_in_namespace_async(self, cluster_name: str, secret_name: str, namespace: str,
+                                                        deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Async variant of _check_existing_secret_in_namespace"""
+        args = ["get", "secret", secret_name, "-n", namespace, "-o", "json"]
+
+        try:
+            result = await self._run_kubectl_async(cluster_name, args, timeout=10, deadline=deadline)
+        except (ClusterUnavailableError, DeadlineExceededError):
+            raise
+        except Exception:
+            result = None
+
+        return self._parse_existing_secret(result)
+
+    async def _check_existing_helm_secret_async(self, cluster_name: str, secret_name: str,
+                                                deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Async variant of _check_existing_helm_secret"""
+        args = ["get", "secret", secret_name, "-n", "argocd", "-o", "json"]
+
+        try:
+            result = await self._run_kubectl_async(cluster_name, args, timeout=10, deadline=deadline)
+        except (ClusterUnavailableError, DeadlineExceededError):
+            raise
+        except Exception:
+            result = None
+
+        return self._parse_existing_helm_secret(result)
+
+    async def _apply_changed_manifests_async(self, cluster_name: str, manifests: List[Tuple[str, str]], existing: List[Dict[str, Any]],
+                                             deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        """Async variant of _apply_changed_manifests"""
+        results, to_apply, to_apply_indexes = self._plan_changed_manifests(manifests, existing)
+
+        if to_apply:
+            result = await self._run_kubectl_async(
+                cluster_name,
+                self._apply_args(),
+                timeout=30,
+                input="---\n".join(yaml_content for _, yaml_content in to_apply),
+                deadline=deadline
+            )
+            apply_results = self._parse_apply_results(result, self._manifest_objects(to_apply))
+            self._merge_apply_results(results, to_apply_indexes, apply_results, existing)
+            await self._in_thread(self._index_applied, cluster_name, to_apply, apply_results)
+
+        return results
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Cluster API Configuration Server
+Runs server.py against a simulated kubectl (fake_kubectl.py) and measures throughput and
+p50/p95/p99 latency of GET /secrets and POST /secrets/add_docker at several client
+concurrencies. Results are written as JSON, and --compare reports the change against the
+results of a previous version.
+"""
+
+import argparse
+import base64
+import json
+import os
+import platform
+import shutil
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.dirname(BENCHMARKS_DIR)
+CLUSTER_NAME = "bench-cluster"
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def run_load(request: Callable[[int], bool], concurrency: int, requests: int, duration: Optional[float]) -> Dict[str, Any]:
+    """Call request(i) from concurrency threads, requests times in total or for duration seconds"""
+    latencies: List[float] = []
+    errors = 0
+    counter = 0
+    lock = threading.Lock()
+    started_at = time.monotonic()
+
+    def worker():
+        nonlocal errors, counter
+        while True:
+            with lock:
+                if duration is not None:
+                    if time.monotonic() - started_at >= duration:
+                        return
+                elif counter >= requests:
+                    return
+                index = counter
+                counter += 1
+            request_started_at = time.monotonic()
+            try:
+                ok = request(index)
+            except Exception:
+                ok = False
+            latency = time.monotonic() - request_started_at
+            with lock:
+                latencies.append(latency)
+                if not ok:
+                    errors += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started_at
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+        "duration_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0
+        }
+    }
+
+def http_json(method: str, url: str, body: Optional[Dict[str, Any]] = None, timeout: float = 120) -> Tuple[int, Dict[str, Any]]:
+    """Send a request and return (status code, decoded JSON body)"""
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+def seed_secrets(store: str, count: int):
+    """Create count Docker secrets, plus count/10 repo-creds and Helm repository secrets"""
+    cluster_store = os.path.join(store, CLUSTER_NAME)
+    os.makedirs(cluster_store, exist_ok=True)
+
+    def write(namespace: str, name: str, labels: Dict[str, str], secret_type: str, data: Dict[str, str]):
+        secret = {
+            "apiVersion": "v1",
+            "kind": "Secret",
+            "metadata": {"name": name, "namespace": namespace, "labels": labels, "creationTimestamp": "2025-01-01T00:00:00Z"},
+            "type": secret_type,
+            "data": {key: base64.b64encode(value.encode('utf-8')).decode('ascii') for key, value in data.items()}
+        }
+        with open(os.path.join(cluster_store, f"{namespace}__{name}.json"), 'w', encoding='utf-8') as f:
+            json.dump(secret, f)
+
+    for i in range(count):
+        auths = json.dumps({"auths": {"ghcr.io": {"username": f"user-{i}", "password": "secret"}}})
+        write("kube-system", f"docker-{i}", {"mcops.tech/secret-type": "docker-creds"}, "kubernetes.io/dockerconfigjson",
+              {".dockerconfigjson": auths})
+    for i in range(max(1, count // 10)):
+        write("argocd", f"repo-creds-{i}", {"argocd.argoproj.io/secret-type": "repo-creds"}, "Opaque",
+              {"url": f"https://git.example.com/org-{i}", "username": "git"})
+        write("argocd", f"helm-{i}", {"argocd.argoproj.io/secret-type": "repository"}, "Opaque",
+              {"url": f"https://charts.example.com/repo-{i}", "name": f"repo-{i}", "type": "helm", "username": "helm"})
+
+def prepare_workdir(args: argparse.Namespace) -> str:
+    """Server working directory with configuration, a kubeconfig and kubectl on bin/"""
+    workdir = tempfile.mkdtemp(prefix="argocd-configurer-bench-")
+
+    bin_dir = os.path.join(workdir, "bin")
+    os.makedirs(bin_dir)
+    kubectl = os.path.join(bin_dir, "kubectl")
+    with open(kubectl, 'w', encoding='utf-8') as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(BENCHMARKS_DIR, "fake_kubectl.py")}" "$@"\n')
+    os.chmod(kubectl, os.stat(kubectl).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    os.makedirs(os.path.join(workdir, "clusters"))
+    with open(os.path.join(workdir, "clusters", f"{CLUSTER_NAME}.kubeconfig"), 'w', encoding='utf-8') as f:
+        yaml.safe_dump({
+            "apiVersion": "v1",
+            "clusters": [{"name": CLUSTER_NAME, "cluster": {"server": "https://127.0.0.1:6443"}}],
+            "contexts": [{"name": CLUSTER_NAME, "context": {"cluster": CLUSTER_NAME, "user": "bench"}}],
+            "current-context": CLUSTER_NAME,
+            "users": [{"name": "bench", "user": {"token": "bench"}}]
+        }, f)
+
+    with open(os.path.join(SERVER_DIR, "configs", "defaults.yaml"), 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    config.update({
+        "clusters-folder": "clusters",
+        "inventory_db_path": os.path.join(workdir, "secrets_inventory.db"),
+        "namespace_registrations_path": os.path.join(workdir, "namespace_registrations.yaml"),
+        "namespace_watch_enabled": False
+    })
+    os.makedirs(os.path.join(workdir, "configs"))
+    with open(os.path.join(workdir, "configs", "defaults.yaml"), 'w', encoding='utf-8') as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+
+    seed_secrets(os.path.join(workdir, "store"), args.secrets)
+    return workdir
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(workdir: str, args: argparse.Namespace) -> Tuple[subprocess.Popen, str]:
+    """Start server.py in workdir with the simulated kubectl first on PATH"""
+    port = args.port or free_port()
+    env = dict(os.environ)
+    env.update({
+        "PATH": os.path.join(workdir, "bin") + os.pathsep + env.get("PATH", ""),
+        "FAKE_KUBECTL_STORE": os.path.join(workdir, "store"),
+        "FAKE_KUBECTL_LATENCY": str(args.latency),
+        "FAKE_KUBECTL_JITTER": str(args.jitter),
+        "FAKE_KUBECTL_FAILURE_RATE": str(args.failure_rate),
+        "FAKE_KUBECTL_FAILURE": args.failure
+    })
+    log = open(os.path.join(workdir, "server.log"), 'w', encoding='utf-8')
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(SERVER_DIR, "server.py"), "--host", "127.0.0.1", "--port", str(port)],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}, see {log.name}")
+        try:
+            if http_json("GET", f"{base_url}/health", timeout=1)[0] == 200:
+                return process, base_url
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"Server did not start, see {log.name}")
+
+def secrets_request(base_url: str) -> Callable[[int], bool]:
+    def request(index: int) -> bool:
+        status, body = http_json("GET", f"{base_url}/secrets?cluster={CLUSTER_NAME}")
+        return status == 200 and body.get("status") == "success"
+    return request
+
+def add_docker_request(base_url: str, namespace_count: int, run_id: str) -> Callable[[int], bool]:
+    namespaces = ",".join(f"bench-ns-{i}" for i in range(namespace_count))
+
+    def request(index: int) -> bool:
+        status, body = http_json("POST", f"{base_url}/secrets/add_docker", {
+            "cluster_name": CLUSTER_NAME,
+            "name": f"bench-{run_id}-{index}",
+            "username": "bench",
+            "password": f"password-{index}",
+            "namespaces": namespaces,
+            "upsert": True
+        })
+        return status == 200 and body.get("success", False)
+    return request
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+def compare(results: Dict[str, Any], baseline_path: str, threshold: float) -> bool:
+    """Print throughput and p95 changes against a baseline. Returns False on a regression beyond threshold percent"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(run["scenario"], run["concurrency"]): run for run in baseline.get("results", [])}
+
+    ok = True
+    print(f"\nComparison with {baseline_path} (revision {baseline.get('revision', 'unknown')}):")
+    for run in results["results"]:
+        before = previous.get((run["scenario"], run["concurrency"]))
+        if before is None:
+            continue
+        throughput_change = _change(before["throughput_rps"], run["throughput_rps"])
+        p95_change = _change(before["latency_ms"]["p95"], run["latency_ms"]["p95"])
+        regression = throughput_change < -threshold or p95_change > threshold
+        ok = ok and not regression
+        print(f"  {run['scenario']:<16} c={run['concurrency']:<4} throughput {throughput_change:+7.1f}%  "
+              f"p95 {p95_change:+7.1f}%{'  REGRESSION' if regression else ''}")
+    return ok
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Cluster API Configuration Server against a simulated kubectl")
+    parser.add_argument("--scenarios", default="secrets,add_docker", help="Comma-separated scenarios: secrets, add_docker")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated client concurrencies")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per scenario and concurrency")
+    parser.add_argument("--duration", type=float, help="Seconds per scenario and concurrency, instead of --requests")
+    parser.add_argument("--namespaces", default="1,10,100", help="Comma-separated namespace counts of add_docker")
+    parser.add_argument("--secrets", type=int, default=100, help="Docker secrets on the simulated cluster")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds every kubectl call takes")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random kubectl latency, up to this many seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability of a failed kubectl call")
+    parser.add_argument("--failure", choices=("error", "connection_refused"), default="error", help="Kind of failed call")
+    parser.add_argument("--port", type=int, help="Server port (default: a free port)")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--compare", help="Results file of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent for --compare")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary working directory")
+    args = parser.parse_args()
+
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    concurrencies = [int(value) for value in args.concurrency.split(",") if value.strip()]
+    namespace_counts = [int(value) for value in args.namespaces.split(",") if value.strip()]
+
+    workdir = prepare_workdir(args)
+    process, base_url = start_server(workdir, args)
+    print(f"Benchmarking {base_url} (working directory {workdir})")
+
+    runs = []
+    try:
+        # (scenario, factory of the request function of one concurrency level)
+        workloads: List[Tuple[str, Callable[[int], Callable[[int], bool]]]] = []
+        if "secrets" in scenarios:
+            workloads.append(("secrets", lambda concurrency: secrets_request(base_url)))
+        if "add_docker" in scenarios:
+            for namespace_count in namespace_counts:
+                # Fresh secret names per run, so every request creates its secrets
+                workloads.append((f"add_docker_{namespace_count}ns", lambda concurrency, count=namespace_count:
+                                  add_docker_request(base_url, count, f"{count}-{concurrency}")))
+
+        for scenario, request_factory in workloads:
+            for concurrency in concurrencies:
+                request = request_factory(concurrency)
+                run = {"scenario": scenario, **run_load(request, concurrency, args.requests, args.duration)}
+                runs.append(run)
+                print(f"  {scenario:<16} c={concurrency:<4} {run['requests']:>5} requests  {run['throughput_rps']:>8.2f} req/s  "
+                      f"p50 {run['latency_ms']['p50']:>8.1f} ms  p95 {run['latency_ms']['p95']:>8.1f} ms  "
+                      f"p99 {run['latency_ms']['p99']:>8.1f} ms  errors {run['errors']}")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "benchmark": "argocd-configurer",
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "secrets": args.secrets,
+            "kubectl_latency_seconds": args.latency,
+            "kubectl_jitter_seconds": args.jitter,
+            "kubectl_failure_rate": args.failure_rate,
+            "kubectl_failure": args.failure,
+            "requests": args.requests,
+            "duration_seconds": args.duration
+        },
+        "results": runs
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        return 0 if compare(results, args.compare, args.threshold) else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Simulated kubectl for benchmarks
+Implements the kubectl calls made by SecretsHandler against secrets stored as JSON files,
+with configurable latency and failure rate. Installed on PATH as "kubectl" by benchmark.py.
+
+Environment:
+    FAKE_KUBECTL_STORE         Directory holding one subdirectory of secrets per cluster (required)
+    FAKE_KUBECTL_LATENCY       Seconds every call takes (default: 0.05)
+    FAKE_KUBECTL_JITTER        Extra random seconds, uniform in [0, jitter] (default: 0)
+    FAKE_KUBECTL_FAILURE_RATE  Probability of a failed call (default: 0)
+    FAKE_KUBECTL_FAILURE       "connection_refused" or "error" (default: "error")
+"""
+
+import base64
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+CONNECTION_REFUSED_STDERR = "Unable to connect to the server: dial tcp 10.0.0.1:6443: connect: connection refused\n"
+
+class SecretStore:
+    """Secrets of one cluster, one <namespace>__<name>.json file each"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, namespace: str, name: str) -> str:
+        return os.path.join(self.path, f"{namespace}__{name}.json")
+
+    def get(self, namespace: str, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._file(namespace, name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, secret: Dict[str, Any]):
+        metadata = secret["metadata"]
+        path = self._file(metadata["namespace"], metadata["name"])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(secret, f)
+        os.replace(tmp_path, path)
+
+    def delete(self, namespace: str, name: str) -> bool:
+        try:
+            os.unlink(self._file(namespace, name))
+            return True
+        except OSError:
+            return False
+
+    def list(self, namespace: Optional[str] = None) -> List[Dict[str, Any]]:
+        secrets = []
+        for filename in sorted(os.listdir(self.path)):
+            if not filename.endswith(".json") or (namespace and not filename.startswith(f"{namespace}__")):
+                continue
+            secret_namespace, _, name = filename[:-len(".json")].partition("__")
+            secret = self.get(secret_namespace, name)
+            if secret is not None:
+                secrets.append(secret)
+        return secrets
+
+def matches(labels: Dict[str, str], selector: str) -> bool:
+    """Equality-based label selector match ("k=v,k2=v2")"""
+    for requirement in filter(None, selector.split(",")):
+        key, _, value = requirement.partition("=")
+        if labels.get(key) != value:
+            return False
+    return True
+
+def option(args: List[str], name: str, default: Optional[str] = None) -> Optional[str]:
+    return args[args.index(name) + 1] if name in args and args.index(name) + 1 < len(args) else default
+
+def get_raw(store: SecretStore, path: str) -> int:
+    """Paged secret lists (/api/v1[/namespaces/<ns>]/secrets) and the namespace list"""
+    url = urlparse(path)
+    query = {key: values[0] for key, values in parse_qs(url.query).items()}
+    parts = url.path.strip("/").split("/")
+
+    if parts[-1] == "namespaces":
+        namespaces = sorted({secret["metadata"]["namespace"] for secret in store.list()} | {"default", "kube-system", "argocd"})
+        print(json.dumps({
+            "kind": "NamespaceList",
+            "metadata": {"resourceVersion": "1"},
+            "items": [{"metadata": {"name": namespace, "labels": {}, "resourceVersion": "1"}} for namespace in namespaces]
+        }))
+        return 0
+
+    namespace = parts[3] if len(parts) > 3 and parts[2] == "namespaces" else None
+    selector = query.get("labelSelector", "")
+    secrets = [secret for secret in store.list(namespace) if matches(secret["metadata"].get("labels", {}), selector)]
+    start = int(query.get("continue") or 0)
+    limit = int(query.get("limit") or len(secrets) or 1)
+    metadata = {"continue": str(start + limit)} if start + limit < len(secrets) else {}
+    print(json.dumps({"kind": "SecretList", "metadata": metadata, "items": secrets[start:start + limit]}))
+    return 0
+
+def apply(store: SecretStore, args: List[str]) -> int:
+    """Apply a multi-document stream from stdin"""
+    # Imported here: PyYAML import time would otherwise add to the latency of every call
+    import yaml
+    for document in yaml.safe_load_all(sys.stdin.read()):
+        if not document:
+            continue
+        metadata = document["metadata"]
+        existed = store.get(metadata["namespace"], metadata["name"]) is not None
+        if "stringData" in document:
+            data = document.setdefault("data", {})
+            for key, value in document.pop("stringData").items():
+                data[key] = base64.b64encode(str(value).encode('utf-8')).decode('ascii')
+        store.put(document)
+        verb = "serverside-applied" if "--server-side" in args else ("configured" if existed else "created")
+        print(f"secret/{metadata['name']} {verb}")
+    return 0
+
+def main() -> int:
+    args = sys.argv[1:]
+    kubeconfig = option(args, "--kubeconfig", "default.kubeconfig")
+    if "--kubeconfig" in args:
+        index = args.index("--kubeconfig")
+        args = args[:index] + args[index + 2:]
+    args = [arg for arg in args if not arg.startswith("--request-timeout")]
+
+    time.sleep(float(os.environ.get("FAKE_KUBECTL_LATENCY", "0.05")) + random.uniform(0, float(os.environ.get("FAKE_KUBECTL_JITTER", "0"))))
+    if random.random() < float(os.environ.get("FAKE_KUBECTL_FAILURE_RATE", "0")):
+        if os.environ.get("FAKE_KUBECTL_FAILURE", "error") == "connection_refused":
+            sys.stderr.write(CONNECTION_REFUSED_STDERR)
+        else:
+            sys.stderr.write("Error from server (InternalError): simulated failure\n")
+        return 1
+
+    cluster_name = os.path.basename(kubeconfig).replace(".kubeconfig", "")
+    store = SecretStore(os.path.join(os.environ["FAKE_KUBECTL_STORE"], cluster_name))
+    namespace = option(args, "-n", "default")
+
+    if args[:2] == ["get", "--raw"]:
+        return get_raw(store, args[2])
+    if args[:2] == ["get", "secret"]:
+        secret = store.get(namespace, args[2])
+        if secret is None:
+            sys.stderr.write(f'Error from server (NotFound): secrets "{args[2]}" not found\n')
+            return 1
+        print(json.dumps(secret))
+        return 0
+    if args[:2] == ["delete", "secret"]:
+        names = [arg for arg in args[2:] if not arg.startswith("-") and arg != namespace]
+        for name in names:
+            if store.delete(namespace, name):
+                print(f'secret "{name}" deleted')
+            elif "--ignore-not-found" not in args:
+                sys.stderr.write(f'Error from server (NotFound): secrets "{name}" not found\n')
+                return 1
+        return 0
+    if args[:1] == ["apply"]:
+        return apply(store, args)
+
+    sys.stderr.write(f"fake kubectl: unsupported command: {' '.join(args)}\n")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Cluster Registry for Cluster API
+In-memory index of the kubeconfig files in the clusters folder, with parsed connection
+metadata and the reachability observed by the last kubectl call of every cluster
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml_codec
+
+logger = logging.getLogger(__name__)
+
+KUBECONFIG_SUFFIX = ".kubeconfig"
+
+def parse_kubeconfig(path: str) -> Dict[str, Any]:
+    """Connection metadata of a kubeconfig's current context. Credentials are never kept"""
+    with open(path, 'r', encoding='utf-8') as f:
+        kubeconfig = yaml_codec.safe_load(f) or {}
+
+    contexts = {entry.get("name"): entry.get("context") or {} for entry in kubeconfig.get("contexts") or []}
+    context_name = kubeconfig.get("current-context") or next(iter(contexts), "")
+    context = contexts.get(context_name, {})
+
+    clusters = {entry.get("name"): entry.get("cluster") or {} for entry in kubeconfig.get("clusters") or []}
+    users = {entry.get("name"): entry.get("user") or {} for entry in kubeconfig.get("users") or []}
+    cluster = clusters.get(context.get("cluster"), {})
+    user = users.get(context.get("user"), {})
+
+    return {
+        "api_server": cluster.get("server", ""),
+        "context": context_name,
+        "namespace": context.get("namespace", ""),
+        "auth_type": _auth_type(user)
+    }
+
+def _auth_type(user: Dict[str, Any]) -> str:
+    """How a kubeconfig user authenticates"""
+    if "exec" in user:
+        return "exec"
+    if "auth-provider" in user:
+        return "auth_provider"
+    if "token" in user or "tokenFile" in user:
+        return "token"
+    if "client-certificate" in user or "client-certificate-data" in user:
+        return "client_certificate"
+    if "username" in user:
+        return "basic"
+    return "none"
+
+class ClusterRegistry:
+    """Clusters of a folder of <cluster>.kubeconfig files, kept current by mtime scanning.
+
+    Lookups are dictionary reads. The folder is rescanned at most every scan_interval
+    seconds, and only kubeconfigs whose mtime or size changed are parsed again. A lookup of
+    an unknown cluster also checks the folder's mtime, so a kubeconfig that was just added
+    is found right away.
+    """
+
+    def __init__(self, clusters_folder: str = "clusters", scan_interval: float = 2.0):
+        self.clusters_folder = clusters_folder
+        self.scan_interval = scan_interval
+        self._lock = threading.Lock()
+        self._clusters: Dict[str, Dict[str, Any]] = {}
+        self._signatures: Dict[str, Tuple[int, int]] = {}
+        self._probes: Dict[str, Dict[str, Any]] = {}
+        self._folder_mtime: Optional[int] = None
+        self._scanned_at = 0.0
+
+    def exists(self, cluster_name: str) -> bool:
+        """Check if the cluster has a kubeconfig"""
+        self._refresh()
+        with self._lock:
+            if cluster_name in self._clusters:
+                return True
+        if self._folder_changed():
+            self._refresh(force=True)
+            with self._lock:
+                return cluster_name in self._clusters
+        return False
+
+    def names(self) -> List[str]:
+        """Names of all clusters, sorted"""
+        self._refresh()
+        with self._lock:
+            return sorted(self._clusters)
+
+    def get(self, cluster_name: str) -> Optional[Dict[str, Any]]:
+        """Metadata and last probe of a cluster, None if unknown"""
+        if not self.exists(cluster_name):
+            return None
+        with self._lock:
+            return self._describe(cluster_name)
+
+    def list(self, search: Optional[str] = None, auth_type: Optional[str] = None, api_server: Optional[str] = None,
+             reachable: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Clusters sorted by name, filtered by name substring, auth type, API server URL
+        substring and reachability ("true", "false" or "unknown")"""
+        self._refresh()
+        with self._lock:
+            clusters = [self._describe(cluster_name) for cluster_name in sorted(self._clusters)]
+
+        return [
+            cluster for cluster in clusters
+            if (search is None or search in cluster["name"])
+            and (auth_type is None or cluster["auth_type"] == auth_type)
+            and (api_server is None or api_server in cluster["api_server"])
+            and (reachable is None or _reachability(cluster["reachable"]) == reachable)
+        ]
+
+    def record_probe(self, cluster_name: str, reachable: bool, latency: Optional[float]):
+        """Remember the outcome and latency of the latest kubectl call to a cluster.
+        latency None (e.g. for long-poll watches) keeps the previous latency"""
+        with self._lock:
+            previous = self._probes.get(cluster_name, {})
+            self._probes[cluster_name] = {
+                "reachable": reachable,
+                "last_latency_seconds": round(latency, 3) if latency is not None else previous.get("last_latency_seconds"),
+                "last_probe_at": datetime.now(timezone.utc).isoformat(timespec="seconds")
+            }
+
+    def _describe(self, cluster_name: str) -> Dict[str, Any]:
+        """Public record of a cluster. Called with the lock held"""
+        probe = self._probes.get(cluster_name, {})
+        return {
+            **self._clusters[cluster_name],
+            "reachable": probe.get("reachable"),
+            "last_latency_seconds": probe.get("last_latency_seconds"),
+            "last_probe_at": probe.get("last_probe_at")
+        }
+
+    def _folder_changed(self) -> bool:
+        """Check if files were added to or removed from the folder since the last scan"""
+        try:
+            return os.stat(self.clusters_folder).st_mtime_ns != self._folder_mtime
+        except OSError:
+            return self._folder_mtime is not None
+
+    def _refresh(self, force: bool = False):
+        """Rescan the folder if scan_interval has passed since the last scan"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._folder_mtime is not None and now - self._scanned_at < self.scan_interval:
+                return
+            self._scanned_at = now
+
+            try:
+                self._folder_mtime = os.stat(self.clusters_folder).st_mtime_ns
+                entries = [entry for entry in os.scandir(self.clusters_folder)
+                           if entry.name.endswith(KUBECONFIG_SUFFIX) and entry.is_file()]
+            except OSError:
+                if self._clusters:
+                    logger.warning(f"Clusters folder does not exist: {self.clusters_folder}")
+                self._folder_mtime = None
+                self._clusters.clear()
+                self._signatures.clear()
+                return
+
+            seen = set()
+            for entry in entries:
+                cluster_name = entry.name[:-len(KUBECONFIG_SUFFIX)]
+                seen.add(cluster_name)
+                stat = entry.stat()
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if self._signatures.get(cluster_name) == signature:
+                    continue
+                self._signatures[cluster_name] = signature
+                self._clusters[cluster_name] = self._load(cluster_name, entry.path, stat.st_mtime)
+
+            for cluster_name in set(self._clusters) - seen:
+                logger.info(f"Cluster '{cluster_name}' removed")
+                del self._clusters[cluster_name]
+                self._signatures.pop(cluster_name, None)
+
+    def _load(self, cluster_name: str, path: str, mtime: float) -> Dict[str, Any]:
+        """Record of one kubeconfig. A kubeconfig that cannot be parsed is kept with its error"""
+        record = {
+            "name": cluster_name,
+            "kubeconfig": path,
+            "api_server": "",
+            "context": "",
+            "namespace": "",
+            "auth_type": "none",
+            "modified_at": datetime.fromtimestamp(mtime, timezone.utc).isoformat(timespec="seconds"),
+            "error": None
+        }
+        try:
+            record.update(parse_kubeconfig(path))
+        except Exception as e:
+            logger.warning(f"Cannot parse kubeconfig of cluster '{cluster_name}': {e}")
+            record["error"] = str(e)
+        logger.info(f"Loaded cluster '{cluster_name}' ({record['api_server'] or 'no API server'})")
+        return record
+
+def _reachability(reachable: Optional[bool]) -> str:
+    if reachable is None:
+        return "unknown"
+    return "true" if reachable else "false"
+
+# Registries shared by all SecretsHandler instances (the server builds one per request), by folder
+_shared_registries: Dict[str, ClusterRegistry] = {}
+_shared_registries_lock = threading.Lock()
+
+def get_shared_cluster_registry(clusters_folder: str = "clusters", scan_interval: float = 2.0) -> ClusterRegistry:
+    """Get the process-wide registry of clusters_folder"""
+    with _shared_registries_lock:
+        registry = _shared_registries.get(clusters_folder)
+        if registry is None:
+            registry = ClusterRegistry(clusters_folder, scan_interval)
+            _shared_registries[clusters_folder] = registry
+        return registry
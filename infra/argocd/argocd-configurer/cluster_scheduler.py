@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Cluster Scheduler for Cluster API
+Shared, long-lived scheduler for kubectl operations against clusters.
+Enforces a global and a per-cluster concurrency cap and grants slots to clusters round-robin
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+class _AsyncWaiter:
+    """Waiter of an asyncio task, granted from any thread like a threading.Event"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._granted = False
+        self.future = loop.create_future()
+
+    def set(self):
+        self._granted = True
+        self._loop.call_soon_threadsafe(self._resolve)
+
+    def is_set(self) -> bool:
+        return self._granted
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+class _Task:
+    """Operation submitted for a cluster, started on the worker pool once a slot is granted"""
+
+    def __init__(self, scheduler: "ClusterScheduler", cluster_name: str, func: Callable[..., Any], args: Tuple[Any, ...]):
+        self._scheduler = scheduler
+        self._cluster_name = cluster_name
+        self._func = func
+        self._args = args
+        self._granted = False
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+
+    def set(self):
+        self._granted = True
+        self._scheduler._executor.submit(self._run)
+
+    def is_set(self) -> bool:
+        return self._granted
+
+    def _run(self):
+        hold = _SlotHold(self._scheduler, self._cluster_name)
+        if not self.future.set_running_or_notify_cancel():
+            hold.drop()
+            return
+
+        # The slot is given back before the caller sees the outcome
+        try:
+            result = hold.run(self._func, *self._args)
+        except BaseException as e:
+            hold.drop()
+            self.future.set_exception(e)
+        else:
+            hold.drop()
+            self.future.set_result(result)
+
+class _SlotHold:
+    """A granted slot, held by the threads running with it and released when the last one drops it"""
+
+    def __init__(self, scheduler: "ClusterScheduler", cluster_name: str):
+        self.scheduler = scheduler
+        self.cluster_name = cluster_name
+        self._holders = 1
+        self._lock = threading.Lock()
+
+    def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) on the current thread as a holder of the slot"""
+        local = self.scheduler._local
+        previous = getattr(local, "hold", None)
+        local.hold = self
+        try:
+            return func(*args)
+        finally:
+            local.hold = previous
+
+    def share(self):
+        with self._lock:
+            self._holders += 1
+
+    def drop(self):
+        with self._lock:
+            self._holders -= 1
+            if self._holders:
+                return
+        self.scheduler.release(self.cluster_name)
+
+class ClusterScheduler:
+    """Fair scheduler for cluster operations.
+
+    Every kubectl run holds a slot for its duration. At most max_concurrency slots are held
+    at once, and at most max_per_cluster for a single cluster. When slots are contended,
+    waiting clusters are served round-robin (FIFO within a cluster), so one busy cluster
+    cannot starve operations against the others.
+
+    Fan-out work (parallel listings, per-namespace checks) is submitted per cluster. It waits
+    in its cluster's queue, not on a worker, and is handed to the long-lived worker pool
+    together with a slot; kubectl runs inside it use that slot. Submitted tasks must not
+    wait on other submitted tasks.
+    """
+
+    def __init__(self, max_concurrency: int = 32, max_per_cluster: int = 8, max_workers: Optional[int] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_per_cluster = max(1, min(max_per_cluster, self.max_concurrency))
+        self._lock = threading.Lock()
+        self._running_total = 0
+        self._running: Dict[str, int] = {}
+        # Clusters with waiting operations, in round-robin order
+        self._waiting: "OrderedDict[str, Deque[Union[threading.Event, _AsyncWaiter, _Task]]]" = OrderedDict()
+        # Slot held by the current thread while it runs a submitted task
+        self._local = threading.local()
+        # Tasks only reach a worker together with a slot, so one worker per slot is enough
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers or self.max_concurrency,
+            thread_name_prefix="cluster-op"
+        )
+
+    def submit(self, cluster_name: str, func: Callable[..., Any], *args: Any) -> concurrent.futures.Future:
+        """Queue func(*args) as an operation against cluster_name. It runs on the shared worker
+        pool once the cluster is granted a slot. Cancelling the future withdraws a queued task"""
+        task = _Task(self, cluster_name, func, args)
+        with self._lock:
+            self._waiting.setdefault(cluster_name, deque()).append(task)
+            self._dispatch()
+        return task.future
+
+    def held_slot(self) -> Optional[_SlotHold]:
+        """Slot held by the current thread as a submitted task, to be lent with run_with_slot"""
+        return getattr(self._local, "hold", None)
+
+    def run_with_slot(self, hold: Optional[_SlotHold], func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) on the current thread with a slot held by another one (see held_slot).
+        The slot is released once both are done with it"""
+        if hold is None:
+            return func(*args)
+        hold.share()
+        try:
+            return hold.run(func, *args)
+        finally:
+            hold.drop()
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker pool. Tasks still queued for a slot are cancelled"""
+        with self._lock:
+            for queue in self._waiting.values():
+                for waiter in queue:
+                    if isinstance(waiter, _Task):
+                        waiter.future.cancel()
+        self._executor.shutdown(wait=wait)
+
+    @contextmanager
+    def slot(self, cluster_name: str, timeout: Optional[float] = None) -> Iterator[bool]:
+        """Hold a slot for cluster_name while the block runs. Yields False if none was granted in time.
+        A submitted task of the cluster runs the block in the slot it was granted"""
+        hold = self.held_slot()
+        if hold is not None and hold.cluster_name == cluster_name:
+            yield True
+            return
+
+        acquired = self.acquire(cluster_name, timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.release(cluster_name)
+
+    def acquire(self, cluster_name: str, timeout: Optional[float] = None) -> bool:
+        """Wait for a slot for cluster_name. Returns False if none was granted within timeout"""
+        with self._lock:
+            # Granted right away when nobody of this cluster is queued ahead and caps allow it
+            waiter = threading.Event()
+            self._waiting.setdefault(cluster_name, deque()).append(waiter)
+            self._dispatch()
+
+        if waiter.wait(timeout):
+            return True
+
+        # Granted between the timeout and taking the lock
+        return not self._withdraw(cluster_name, waiter)
+
+    @asynccontextmanager
+    async def slot_async(self, cluster_name: str, timeout: Optional[float] = None) -> AsyncIterator[bool]:
+        """Async variant of slot, waiting without blocking the event loop"""
+        acquired = await self.acquire_async(cluster_name, timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.release(cluster_name)
+
+    async def acquire_async(self, cluster_name: str, timeout: Optional[float] = None) -> bool:
+        """Async variant of acquire. Asyncio tasks and threads share the same slots and rotation"""
+        with self._lock:
+            waiter = _AsyncWaiter(asyncio.get_running_loop())
+            self._waiting.setdefault(cluster_name, deque()).append(waiter)
+            self._dispatch()
+            if waiter.is_set():
+                return True
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            # Granted between the timeout and taking the lock
+            return not self._withdraw(cluster_name, waiter)
+        except asyncio.CancelledError:
+            if not self._withdraw(cluster_name, waiter):
+                # Granted while being cancelled: nobody else will release it
+                self.release(cluster_name)
+            raise
+
+    def release(self, cluster_name: str):
+        """Give a slot back and hand free slots to waiting clusters"""
+        with self._lock:
+            self._running_total -= 1
+            self._running[cluster_name] -= 1
+            if self._running[cluster_name] == 0:
+                del self._running[cluster_name]
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of running and waiting operations"""
+        with self._lock:
+            return {
+                "running": self._running_total,
+                "running_per_cluster": dict(self._running),
+                "waiting_per_cluster": {cluster: len(queue) for cluster, queue in self._waiting.items()},
+                "max_concurrency": self.max_concurrency,
+                "max_per_cluster": self.max_per_cluster
+            }
+
+    def _withdraw(self, cluster_name: str, waiter: Union[threading.Event, _AsyncWaiter]) -> bool:
+        """Remove a waiter from its queue. Returns False if it was already granted a slot"""
+        with self._lock:
+            if waiter.is_set():
+                return False
+            queue = self._waiting.get(cluster_name)
+            if queue is not None:
+                queue.remove(waiter)
+                if not queue:
+                    del self._waiting[cluster_name]
+            return True
+
+    def _start(self, cluster_name: str):
+        self._running_total += 1
+        self._running[cluster_name] = self._running.get(cluster_name, 0) + 1
+
+    def _dispatch(self):
+        """Grant free slots to waiting clusters round-robin. Called with the lock held"""
+        while self._running_total < self.max_concurrency:
+            for cluster_name, queue in self._waiting.items():
+                # Tasks cancelled while queued never take a slot
+                while queue and isinstance(queue[0], _Task) and queue[0].future.cancelled():
+                    queue.popleft()
+                if not queue:
+                    del self._waiting[cluster_name]
+                    break
+                if self._running.get(cluster_name, 0) < self.max_per_cluster:
+                    waiter = queue.popleft()
+                    if queue:
+                        # Served: go to the back of the rotation
+                        self._waiting.move_to_end(cluster_name)
+                    else:
+                        del self._waiting[cluster_name]
+                    self._start(cluster_name)
+                    waiter.set()
+                    break
+            else:
+                # Every waiting cluster is at its per-cluster cap
+                return
+
+# Scheduler shared by all SecretsHandler instances (the server builds one per request)
+_shared_scheduler: Optional[ClusterScheduler] = None
+_shared_scheduler_lock = threading.Lock()
+
+def get_shared_scheduler(max_concurrency: int = 32, max_per_cluster: int = 8) -> ClusterScheduler:
+    """Get the process-wide scheduler, created with the limits of its first caller"""
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            logger.info(f"Creating cluster scheduler: {max_concurrency} concurrent operations, {max_per_cluster} per cluster")
+            _shared_scheduler = ClusterScheduler(max_concurrency, max_per_cluster)
+        return _shared_scheduler
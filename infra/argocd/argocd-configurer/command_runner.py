@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Command Runner for Cluster API
+Pluggable execution of kubectl commands: real subprocesses, recording of real invocations
+to a fixture file, and offline replay with scaled latency and injected faults
+"""
+
+import abc
+import asyncio
+import base64
+import json
+import logging
+import os
+import random
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# stderr of an injected connection refusal, recognized as a connection error by SecretsHandler
+CONNECTION_REFUSED_STDERR = "Unable to connect to the server: dial tcp 10.0.0.1:6443: connect: connection refused\n"
+
+# Placeholder written to fixtures instead of secret values
+REDACTED = "REDACTED"
+
+# Secret data keys that describe a secret (repository url, type, ...) and are kept in fixtures,
+# so replayed listings are classified and summarized like the recorded ones
+DESCRIPTIVE_DATA_KEYS = ("type", "url", "name", "project", "enableOCI")
+
+def normalize_argv(cmd: List[str]) -> List[str]:
+    """argv as stored in fixtures: kubeconfig reduced to its file name (the cluster), and the
+    per-deadline --request-timeout dropped, so recordings replay from any folder and deadline"""
+    argv = []
+    skip_next = False
+    for index, arg in enumerate(cmd):
+        if skip_next:
+            skip_next = False
+            continue
+        if arg == "--kubeconfig" and index + 1 < len(cmd):
+            argv += [arg, os.path.basename(cmd[index + 1])]
+            skip_next = True
+        elif not arg.startswith("--request-timeout"):
+            argv.append(arg)
+    return argv
+
+def redact_secret_values(stdout: str) -> str:
+    """stdout with the values of every data and stringData map replaced by REDACTED (base64-encoded
+    in data), except DESCRIPTIVE_DATA_KEYS. Handles JSON documents and JSON lines (watches);
+    other output is returned unchanged"""
+    try:
+        return json.dumps(_redact(json.loads(stdout)))
+    except ValueError:
+        pass
+
+    lines = []
+    for line in stdout.splitlines(keepends=True):
+        try:
+            lines.append(json.dumps(_redact(json.loads(line))) + "\n")
+        except ValueError:
+            lines.append(line)
+    return "".join(lines)
+
+def _redact(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    redacted = {}
+    for key, item in value.items():
+        if key in ("data", "stringData") and isinstance(item, dict):
+            placeholder = base64.b64encode(REDACTED.encode("ascii")).decode("ascii") if key == "data" else REDACTED
+            item = {name: data if name in DESCRIPTIVE_DATA_KEYS else placeholder for name, data in item.items()}
+        else:
+            item = _redact(item)
+        redacted[key] = item
+    return redacted
+
+class CommandRunner(abc.ABC):
+    """Runs a command and returns its CompletedProcess (text mode).
+
+    run raises subprocess.TimeoutExpired when timeout expires; run_async also stops the
+    command when the calling task is cancelled.
+    """
+
+    @abc.abstractmethod
+    def run(self, cmd: List[str], input: Optional[str], timeout: float) -> subprocess.CompletedProcess:
+        """Run cmd with input on stdin, within timeout seconds"""
+
+    @abc.abstractmethod
+    async def run_async(self, cmd: List[str], input: Optional[str], timeout: float) -> subprocess.CompletedProcess:
+        """Async variant of run"""
+
+class SubprocessRunner(CommandRunner):
+    """Runs commands as real child processes"""
+
+    def run(self, cmd: List[str], input: Optional[str], timeout: float) -> subprocess.CompletedProcess:
+        # subprocess.run kills the child when the timeout expires
+        return subprocess.run(cmd, input=input, capture_output=True, text=True, timeout=timeout)
+
+    async def run_async(self, cmd: List[str], input: Optional[str], timeout: float) -> subprocess.CompletedProcess:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                process.communicate(input.encode() if input is not None else None),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            await self._kill(process)
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        except BaseException:
+            # Cancelled or failed: do not leave kubectl running
+            await self._kill(process)
+            raise
+
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout.decode(), stderr.decode())
+
+    async def _kill(self, process: asyncio.subprocess.Process):
+        """Kill a child that is still running and reap it"""
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+class RecordingRunner(CommandRunner):
+    """Runs commands with another runner and appends every invocation (argv, stdout, stderr,
+    exit code, latency) to a JSON Lines fixture file. Secret values in stdout are redacted
+    (see redact_secret_values)"""
+
+    def __init__(self, fixture_path: str, runner: Optional[CommandRunner] = None):
+        self.fixture_path = fixture_path
+        self.runner = runner or SubprocessRunner()
+        self._lock = threading.Lock()
+
+    def run(self, cmd: List[str], input: Optional[str], timeout: float) -> subprocess.CompletedProcess:
+        started_at = time.monotonic()
+        try:
+            result = self.runner.run(cmd, input, timeout)
+        except subprocess.TimeoutExpired:
+            self._record(cmd, None, time.monotonic() - started_at)
+            raise
+        self._record(cmd, result, time.monotonic() - started_at)
+        return result
+
+    async def run_async(self, cmd: List[str], input: Optional[str], timeout: float) -> subprocess.CompletedProcess:
+        started_at = time.monotonic()
+        try:
+            result = await self.runner.run_async(cmd, input, timeout)
+        except subprocess.TimeoutExpired:
+            self._record(cmd, None, time.monotonic() - started_at)
+            raise
+        self._record(cmd, result, time.monotonic() - started_at)
+        return result
+
+    def _record(self, cmd: List[str], result: Optional[subprocess.CompletedProcess], latency: float):
+        """Append one invocation; result None records a timeout"""
+        record = {
+            "argv": normalize_argv(cmd),
+            "stdout": redact_secret_values(result.stdout) if result is not None else "",
+            "stderr": result.stderr if result is not None else "",
+            "returncode": result.returncode if result is not None else None,
+            "timed_out": result is None,
+            "latency": round(latency, 6)
+        }
+        with self._lock:
+            with open(self.fixture_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+class Fault:
+    """Fault injected by ReplayRunner into matching invocations.
+
+    kind: "timeout" (the command hangs until its timeout), "connection_refused" (kubectl
+    cannot reach the cluster) or "error" (kubectl fails with an injected server error).
+    match: substring of the joined argv, e.g. a cluster name or "apply"; None matches all.
+    probability: chance to fire on a matching invocation. max_count: stop after this many.
+    """
+
+    def __init__(self, kind: str, match: Optional[str] = None, probability: float = 1.0, max_count: Optional[int] = None):
+        if kind not in ("timeout", "connection_refused", "error"):
+            raise ValueError(f"Unknown fault kind '{kind}'")
+        self.kind = kind
+        self.match = match
+        self.probability = probability
+        self.max_count = max_count
+        self.count = 0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Fault":
+        return cls(data["kind"], data.get("match"), data.get("probability", 1.0), data.get("max_count"))
+
+class ReplayRunner(CommandRunner):
+    """Answers commands from a fixture recorded by RecordingRunner, without running anything.
+
+    Invocations are matched by normalized argv; repeated invocations of the same argv get
+    the recorded answers in order, the last one repeating. Every answer waits for its
+    recorded latency times latency_scale (or latency, if set), so concurrency behaviour is
+    reproduced offline. Faults are drawn from a seeded generator and are deterministic.
+    """
+
+    def __init__(self, fixture_path: str, latency_scale: float = 1.0, latency: Optional[float] = None,
+                 faults: Optional[List[Fault]] = None, seed: int = 0):
+        self.fixture_path = fixture_path
+        self.latency_scale = latency_scale
+        self.latency = latency
+        self.faults = faults or []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._records: Dict[Tuple[str, ...], Deque[Dict[str, Any]]] = {}
+        with open(fixture_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._records.setdefault(tuple(record["argv"]), deque()).append(record)
+        logger.info(f"Loaded {sum(len(records) for records in self._records.values())} recorded command(s) from {fixture_path}")
+
+    def run(self, cmd: List[str], input: Optional[str], timeout: float) -> subprocess.CompletedProcess:
+        delay, result = self._answer(cmd)
+        if delay >= timeout:
+            time.sleep(timeout)
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        time.sleep(delay)
+        return result
+
+    async def run_async(self, cmd: List[str], input: Optional[str], timeout: float) -> subprocess.CompletedProcess:
+        delay, result = self._answer(cmd)
+        if delay >= timeout:
+            await asyncio.sleep(timeout)
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        await asyncio.sleep(delay)
+        return result
+
+    def _answer(self, cmd: List[str]) -> Tuple[float, Optional[subprocess.CompletedProcess]]:
+        """Pick the (delay, result) of an invocation. A delay of infinity means a timeout"""
+        argv = normalize_argv(cmd)
+        with self._lock:
+            fault = self._draw_fault(" ".join(argv))
+            records = self._records.get(tuple(argv))
+            record = None
+            if records:
+                record = records[0]
+                if len(records) > 1:
+                    records.popleft()
+
+        latency = self.latency if self.latency is not None else (record["latency"] if record else 0.0) * self.latency_scale
+
+        if fault is not None:
+            if fault.kind == "timeout":
+                return float("inf"), None
+            if fault.kind == "connection_refused":
+                return latency, subprocess.CompletedProcess(cmd, 1, "", CONNECTION_REFUSED_STDERR)
+            return latency, subprocess.CompletedProcess(cmd, 1, "", "Error from server (InternalError): injected fault\n")
+
+        if record is None:
+            logger.warning(f"No recorded response for: {' '.join(argv)}")
+            return latency, subprocess.CompletedProcess(cmd, 1, "", f"replay: no recorded response for: {' '.join(argv)}\n")
+        if record.get("timed_out"):
+            return float("inf"), None
+        return latency, subprocess.CompletedProcess(cmd, record["returncode"], record["stdout"], record["stderr"])
+
+    def _draw_fault(self, argv: str) -> Optional[Fault]:
+        """First matching fault that fires for this invocation. Called with the lock held"""
+        for fault in self.faults:
+            if fault.match is not None and fault.match not in argv:
+                continue
+            if fault.max_count is not None and fault.count >= fault.max_count:
+                continue
+            if self._random.random() < fault.probability:
+                fault.count += 1
+                return fault
+        return None
+
+def create_runner(runner_config: Dict[str, Any]) -> CommandRunner:
+    """Build the runner selected by a command_runner configuration section"""
+    mode = runner_config.get("mode", "subprocess")
+    if mode == "subprocess":
+        return SubprocessRunner()
+    if mode == "record":
+        return RecordingRunner(runner_config["fixture"])
+    if mode == "replay":
+        return ReplayRunner(
+            runner_config["fixture"],
+            latency_scale=runner_config.get("latency_scale", 1.0),
+            latency=runner_config.get("latency"),
+            faults=[Fault.from_dict(fault) for fault in runner_config.get("faults", [])],
+            seed=runner_config.get("seed", 0)
+        )
+    raise ValueError(f"Unknown command runner mode '{mode}'")
+
+# Runner shared by all SecretsHandler instances (the server builds one per request), so
+# recordings go to one file and replays keep their position across requests
+_shared_runner: Optional[CommandRunner] = None
+_shared_runner_lock = threading.Lock()
+
+def get_shared_runner(runner_config: Optional[Dict[str, Any]] = None) -> CommandRunner:
+    """Get the process-wide runner, created from the configuration of its first caller"""
+    global _shared_runner
+    with _shared_runner_lock:
+        if _shared_runner is None:
+            runner_config = runner_config or {}
+            logger.info(f"Creating command runner: {runner_config.get('mode', 'subprocess')}")
+            _shared_runner = create_runner(runner_config)
+        return _shared_runner
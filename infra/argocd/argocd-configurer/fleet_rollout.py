@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Fleet Rollout for Cluster API
+Applies a Docker registry or Helm repository credential to many clusters at once
+"""
+
+import concurrent.futures
+import logging
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from secrets_handler import ClusterUnavailableError, Deadline, DeadlineExceededError, SecretsHandler
+
+logger = logging.getLogger(__name__)
+
+# Per-cluster outcomes, in summary order
+FLEET_OUTCOMES = ["succeeded", "unchanged", "failed", "unreachable"]
+
+class FleetRollout:
+    """Upsert one credential on a set of clusters in parallel.
+
+    At most max_parallel_clusters clusters are processed at once, so a rotation takes
+    about ceil(clusters / max_parallel_clusters) single-cluster upserts. Progress is
+    yielded per cluster as it finishes, followed by a summary event.
+
+    Every cluster gets its own deadline of cluster_deadline_seconds from the moment it
+    starts, capped by the deadline of the whole rollout, so one slow cluster cannot use up
+    the time of the clusters after it.
+    """
+
+    def __init__(self, secrets_handler: SecretsHandler, max_parallel_clusters: int = 8, cluster_deadline_seconds: float = 60):
+        self.secrets_handler = secrets_handler
+        self.max_parallel_clusters = max(1, max_parallel_clusters)
+        self.cluster_deadline_seconds = cluster_deadline_seconds
+
+    def rollout_docker_secret(self, secret_name: str, password: str, username: str, namespaces: List[str],
+                              clusters: Optional[List[str]] = None, deadline: Optional[Deadline] = None) -> Iterator[Dict[str, Any]]:
+        """Upsert a Docker registry secret (and its image updater secret) on every selected cluster"""
+        return self._rollout(
+            clusters,
+            lambda cluster_name, cluster_deadline: self.secrets_handler.add_docker_secret(
+                cluster_name, secret_name, password, username, namespaces, True, cluster_deadline
+            ),
+            deadline
+        )
+
+    def rollout_helm_repo_secret(self, secret_name: str, repository_url: str, use_oci: bool, password: str, username: str,
+                                 clusters: Optional[List[str]] = None, deadline: Optional[Deadline] = None) -> Iterator[Dict[str, Any]]:
+        """Upsert a Helm repository secret on every selected cluster"""
+        # Reject a bad URL once instead of failing every cluster with it
+        self.secrets_handler._validate_repository_url(repository_url)
+        return self._rollout(
+            clusters,
+            lambda cluster_name, cluster_deadline: self.secrets_handler.add_helm_repo_secret(
+                cluster_name, secret_name, repository_url, use_oci, password, username, True, cluster_deadline
+            ),
+            deadline
+        )
+
+    def _rollout(self, clusters: Optional[List[str]], operation: Callable[[str, Deadline], Dict[str, Any]],
+                 deadline: Optional[Deadline] = None) -> Iterator[Dict[str, Any]]:
+        """Run operation(cluster_name, cluster_deadline) for every cluster with bounded parallelism.
+        Yields a "cluster" event per finished cluster in completion order, then a "summary" event"""
+        if clusters is None:
+            clusters = self.secrets_handler.list_available_clusters()
+        # Keep the first occurrence of every cluster
+        clusters = list(dict.fromkeys(clusters))
+
+        started_at = time.monotonic()
+        summary: Dict[str, List[str]] = {outcome: [] for outcome in FLEET_OUTCOMES}
+
+        logger.info(f"Rolling out credential to {len(clusters)} cluster(s), {self.max_parallel_clusters} at a time")
+
+        # A pool of its own: per-cluster operations fan out onto the shared scheduler and
+        # must not occupy its workers while they wait
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(self.max_parallel_clusters, len(clusters)) or 1,
+            thread_name_prefix="fleet-rollout"
+        )
+        futures = [executor.submit(self._run_for_cluster, cluster_name, operation, deadline) for cluster_name in clusters]
+        try:
+            for done, future in enumerate(concurrent.futures.as_completed(futures), start=1):
+                event = future.result()
+                summary[event["outcome"]].append(event["cluster"])
+                yield {
+                    "type": "cluster",
+                    "progress": f"{done}/{len(clusters)}",
+                    **event
+                }
+        finally:
+            # Stops clusters not started yet when the consumer goes away
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+        yield {
+            "type": "summary",
+            "total": len(clusters),
+            **{outcome: sorted(names) for outcome, names in summary.items()},
+            "counts": {outcome: len(names) for outcome, names in summary.items()},
+            "duration_seconds": round(time.monotonic() - started_at, 3)
+        }
+
+    def _run_for_cluster(self, cluster_name: str, operation: Callable[[str, Deadline], Dict[str, Any]],
+                         deadline: Optional[Deadline]) -> Dict[str, Any]:
+        """Run operation for one cluster and classify its outcome. Never raises"""
+        started_at = time.monotonic()
+        result = None
+        try:
+            result = operation(cluster_name, self._cluster_deadline(deadline))
+            if result.get("failed") or result.get("unknown"):
+                outcome = "failed"
+            elif result.get("created") or result.get("updated"):
+                outcome = "succeeded"
+            else:
+                outcome = "unchanged"
+            message = result.get("message", "")
+        except ClusterUnavailableError as e:
+            outcome = "unreachable"
+            message = str(e)
+        except DeadlineExceededError as e:
+            outcome = "failed"
+            message = str(e)
+        except Exception as e:
+            logger.error(f"Error rolling out credential to cluster '{cluster_name}': {e}")
+            outcome = "failed"
+            message = str(e)
+
+        event = {
+            "cluster": cluster_name,
+            "outcome": outcome,
+            "message": message,
+            "duration_seconds": round(time.monotonic() - started_at, 3)
+        }
+        if result is not None:
+            event["result"] = result
+        return event
+
+    def _cluster_deadline(self, deadline: Optional[Deadline]) -> Deadline:
+        """Deadline of one cluster starting now, capped by the rollout deadline"""
+        if deadline is None:
+            return Deadline(self.cluster_deadline_seconds)
+        return Deadline(min(self.cluster_deadline_seconds, deadline.remaining()))
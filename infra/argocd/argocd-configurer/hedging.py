@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Hedging for Cluster API
+Rolling per-cluster read latency statistics and the budget limiting duplicate (hedged) reads
+"""
+
+import concurrent.futures
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class LatencyTracker:
+    """Latencies of the last window successful reads of every cluster"""
+
+    def __init__(self, window: int = 200):
+        self.window = max(1, window)
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, cluster_name: str, latency: float):
+        with self._lock:
+            self._samples.setdefault(cluster_name, deque(maxlen=self.window)).append(latency)
+
+    def percentile(self, cluster_name: str, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """Latency percentile (0-100) of the cluster's recent reads, None with fewer than min_samples"""
+        with self._lock:
+            samples = sorted(self._samples.get(cluster_name, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def stats(self) -> Dict[str, Any]:
+        """p50/p95/p99 and sample count per cluster"""
+        with self._lock:
+            clusters = list(self._samples)
+        return {
+            cluster_name: {
+                "samples": len(self._samples.get(cluster_name, ())),
+                "p50": self.percentile(cluster_name, 50),
+                "p95": self.percentile(cluster_name, 95),
+                "p99": self.percentile(cluster_name, 99)
+            }
+            for cluster_name in clusters
+        }
+
+class HedgeBudget:
+    """Token bucket capping hedged reads to a fraction of all reads.
+
+    Every read earns ratio of a token (up to max_tokens) and every hedge spends a whole
+    one, so at most about ratio * reads hedges are issued however slow clusters get:
+    hedging cannot multiply load when everything is slow.
+    """
+
+    def __init__(self, ratio: float = 0.1, max_tokens: float = 10.0):
+        self.ratio = max(0.0, ratio)
+        self.max_tokens = max(1.0, max_tokens)
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self.reads = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self.denied = 0
+
+    def record_read(self):
+        with self._lock:
+            self.reads += 1
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Take a token for a hedge. Returns False when the budget is exhausted"""
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.hedges += 1
+                return True
+            self.denied += 1
+            return False
+
+    def record_hedge_won(self):
+        with self._lock:
+            self.hedges_won += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "reads": self.reads,
+                "hedges": self.hedges,
+                "hedges_won": self.hedges_won,
+                "denied": self.denied,
+                "tokens": round(self._tokens, 2),
+                "ratio": self.ratio
+            }
+
+# Statistics, budget and worker pool shared by all SecretsHandler instances (the server
+# builds one per request), created with the settings of their first caller
+_latency_tracker: Optional[LatencyTracker] = None
+_hedge_budget: Optional[HedgeBudget] = None
+_hedge_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_shared_lock = threading.Lock()
+
+def get_latency_tracker(window: int = 200) -> LatencyTracker:
+    """Get the process-wide read latency statistics"""
+    global _latency_tracker
+    with _shared_lock:
+        if _latency_tracker is None:
+            _latency_tracker = LatencyTracker(window)
+        return _latency_tracker
+
+def get_hedge_budget(ratio: float = 0.1) -> HedgeBudget:
+    """Get the process-wide hedge budget"""
+    global _hedge_budget
+    with _shared_lock:
+        if _hedge_budget is None:
+            _hedge_budget = HedgeBudget(ratio)
+        return _hedge_budget
+
+def get_hedge_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Pool running hedged reads. Separate from the scheduler's pool, whose tasks wait on these"""
+    global _hedge_executor
+    with _shared_lock:
+        if _hedge_executor is None:
+            _hedge_executor = concurrent.futures.ThreadPoolExecutor(max_workers=64, thread_name_prefix="hedged-read")
+        return _hedge_executor
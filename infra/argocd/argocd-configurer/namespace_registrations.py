@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Namespace Registrations for Cluster API
+Persistent record of Docker secrets registered for a namespace label selector, and
+matching of namespace labels against such selectors
+"""
+
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import yaml_codec
+
+logger = logging.getLogger(__name__)
+
+# One requirement of a label selector: "key in (a,b)", "key notin (a,b)", "key=value",
+# "key==value", "key!=value", "key" or "!key"
+_SET_REQUIREMENT = re.compile(r"^\s*([\w./-]+)\s+(in|notin)\s+\(([^)]*)\)\s*$")
+_EQUALITY_REQUIREMENT = re.compile(r"^\s*([\w./-]+)\s*(==|=|!=)\s*([\w.-]*)\s*$")
+_EXISTS_REQUIREMENT = re.compile(r"^\s*(!?)([\w./-]+)\s*$")
+
+def _split_requirements(selector: str) -> List[str]:
+    """Split a selector on commas outside of parentheses"""
+    requirements = []
+    depth = 0
+    current = ""
+    for char in selector:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            requirements.append(current)
+            current = ""
+        else:
+            current += char
+    requirements.append(current)
+    return [requirement for requirement in requirements if requirement.strip()]
+
+def validate_selector(selector: str):
+    """Raise ValueError if selector is not a Kubernetes label selector supported by matches_selector"""
+    requirements = _split_requirements(selector)
+    if not requirements:
+        raise ValueError("Namespace selector cannot be empty")
+    for requirement in requirements:
+        if not (_SET_REQUIREMENT.match(requirement) or _EQUALITY_REQUIREMENT.match(requirement) or _EXISTS_REQUIREMENT.match(requirement)):
+            raise ValueError(f"Invalid namespace selector requirement: '{requirement.strip()}'")
+
+def matches_selector(selector: str, labels: Dict[str, str]) -> bool:
+    """Check labels against a label selector, with the semantics of the Kubernetes API"""
+    for requirement in _split_requirements(selector):
+        match = _SET_REQUIREMENT.match(requirement)
+        if match:
+            key, operator, values = match.groups()
+            values = {value.strip() for value in values.split(",")}
+            if operator == "in" and labels.get(key) not in values:
+                return False
+            if operator == "notin" and key in labels and labels[key] in values:
+                return False
+            continue
+
+        match = _EQUALITY_REQUIREMENT.match(requirement)
+        if match:
+            key, operator, value = match.groups()
+            if operator == "!=":
+                if labels.get(key) == value:
+                    return False
+            elif labels.get(key) != value:
+                return False
+            continue
+
+        match = _EXISTS_REQUIREMENT.match(requirement)
+        if match:
+            negated, key = match.groups()
+            if (key in labels) == bool(negated):
+                return False
+            continue
+
+        return False
+    return True
+
+class NamespaceRegistrations:
+    """Docker secrets registered for namespace selectors, stored in a YAML file.
+
+    A registration only names the secret: credentials are read from the cluster (the
+    ArgoCD image updater secret) when the secret is copied to a new namespace.
+    """
+
+    def __init__(self, path: str = "namespace_registrations.yaml"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._registrations: List[Dict[str, Any]] = self._load()
+
+    def add(self, cluster_name: str, secret_name: str, namespace_selector: str) -> Dict[str, Any]:
+        """Register (or re-register with a new selector) a secret of a cluster"""
+        registration = {
+            "cluster": cluster_name,
+            "secret_name": secret_name,
+            "namespace_selector": namespace_selector,
+            "registered_at": datetime.now(timezone.utc).isoformat(timespec="seconds")
+        }
+        with self._lock:
+            self._registrations = [
+                existing for existing in self._registrations
+                if (existing["cluster"], existing["secret_name"]) != (cluster_name, secret_name)
+            ]
+            self._registrations.append(registration)
+            self._save()
+        logger.info(f"Registered secret '{secret_name}' of cluster '{cluster_name}' for namespaces matching '{namespace_selector}'")
+        return registration
+
+    def remove(self, cluster_name: str, secret_name: str) -> bool:
+        """Drop a registration. Returns False if there was none"""
+        with self._lock:
+            remaining = [
+                existing for existing in self._registrations
+                if (existing["cluster"], existing["secret_name"]) != (cluster_name, secret_name)
+            ]
+            if len(remaining) == len(self._registrations):
+                return False
+            self._registrations = remaining
+            self._save()
+        return True
+
+    def list(self, cluster_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Registrations, optionally of one cluster only"""
+        with self._lock:
+            return [dict(registration) for registration in self._registrations
+                    if cluster_name is None or registration["cluster"] == cluster_name]
+
+    def clusters(self) -> List[str]:
+        """Clusters with at least one registration"""
+        with self._lock:
+            return sorted({registration["cluster"] for registration in self._registrations})
+
+    def _load(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return (yaml_codec.safe_load(f) or {}).get("registrations", [])
+        except Exception as e:
+            logger.error(f"Error loading namespace registrations from {self.path}: {e}")
+            return []
+
+    def _save(self):
+        """Write all registrations atomically. Called with the lock held"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            yaml_codec.safe_dump({"registrations": self._registrations}, f, sort_keys=False)
+        os.replace(tmp_path, self.path)
+
+# Registrations shared by all SecretsHandler instances (the server builds one per request), by path
+_shared_registrations: Dict[str, NamespaceRegistrations] = {}
+_shared_registrations_lock = threading.Lock()
+
+def get_shared_registrations(path: str = "namespace_registrations.yaml") -> NamespaceRegistrations:
+    """Get the process-wide registrations stored at path"""
+    with _shared_registrations_lock:
+        registrations = _shared_registrations.get(path)
+        if registrations is None:
+            registrations = NamespaceRegistrations(path)
+            _shared_registrations[path] = registrations
+        return registrations
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Namespace Watcher for Cluster API
+Background propagation of registered Docker secrets to namespaces created (or labelled)
+after the registration
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Set, Tuple
+
+from namespace_registrations import matches_selector
+from secrets_handler import ClusterUnavailableError, Deadline, SecretsHandler
+
+logger = logging.getLogger(__name__)
+
+class NamespaceWatcher:
+    """Watches namespaces of every cluster with registrations and copies registered secrets
+    into namespaces that start matching a registration's selector.
+
+    Each cluster has one long-poll watch on its namespaces, shared by all its registrations,
+    so kubectl traffic follows namespace churn: an idle cluster costs one watch call per
+    watch_seconds, and each added or relabelled namespace costs an existence check (and an
+    apply when the secret is missing). The list of watched clusters is refreshed every
+    refresh_seconds from the registrations.
+    """
+
+    def __init__(self, handler_factory: Callable[[], SecretsHandler], watch_seconds: int = 60, refresh_seconds: float = 10.0,
+                 retry_seconds: float = 15.0):
+        self.handler_factory = handler_factory
+        self.watch_seconds = max(1, watch_seconds)
+        self.refresh_seconds = refresh_seconds
+        self.retry_seconds = retry_seconds
+        self._stop = threading.Event()
+        self._threads: Dict[str, threading.Thread] = {}
+        self._supervisor = None
+
+    def start(self):
+        """Start watching in background daemon threads"""
+        self._supervisor = threading.Thread(target=self._supervise, name="namespace-watcher", daemon=True)
+        self._supervisor.start()
+
+    def stop(self):
+        """Ask all watch threads to stop; running watches end within watch_seconds"""
+        self._stop.set()
+
+    def _supervise(self):
+        """Start a watch thread for every cluster that gets registrations"""
+        while not self._stop.is_set():
+            try:
+                for cluster_name in self.handler_factory().registrations.clusters():
+                    thread = self._threads.get(cluster_name)
+                    if thread is None or not thread.is_alive():
+                        logger.info(f"Watching namespaces of cluster '{cluster_name}'")
+                        thread = threading.Thread(target=self._watch_cluster, args=(cluster_name,),
+                                                  name=f"namespace-watch-{cluster_name}", daemon=True)
+                        self._threads[cluster_name] = thread
+                        thread.start()
+            except Exception as e:
+                logger.error(f"Error refreshing namespace registrations: {e}")
+            self._stop.wait(self.refresh_seconds)
+
+    def _watch_cluster(self, cluster_name: str):
+        """List then watch namespaces of one cluster until it has no registrations left"""
+        handler = self.handler_factory()
+        # (namespace, secret_name) pairs known to be in place, so repeated events cost nothing
+        propagated: Set[Tuple[str, str]] = set()
+        resource_version = ""
+
+        while not self._stop.is_set() and handler.registrations.list(cluster_name):
+            try:
+                if not resource_version:
+                    # (Re)start: reconcile every namespace, then watch from this listing
+                    namespaces, resource_version = handler.list_namespaces(cluster_name, deadline=Deadline(handler.timeout * 3))
+                    for namespace in namespaces:
+                        self._reconcile(handler, cluster_name, namespace, propagated)
+                    continue
+
+                for event in handler.watch_namespaces(cluster_name, resource_version, self.watch_seconds):
+                    event_type = event.get("type")
+                    namespace = event.get("object", {})
+                    if event_type == "ERROR":
+                        # Typically 410 Gone: resource version too old, relist
+                        logger.info(f"Namespace watch of cluster '{cluster_name}' expired: {namespace.get('message', '')}")
+                        resource_version = ""
+                        break
+                    resource_version = namespace.get("metadata", {}).get("resourceVersion", resource_version)
+                    if event_type in ("ADDED", "MODIFIED"):
+                        self._reconcile(handler, cluster_name, namespace, propagated)
+                    elif event_type == "DELETED":
+                        name = namespace.get("metadata", {}).get("name", "")
+                        propagated = {entry for entry in propagated if entry[0] != name}
+
+            except ClusterUnavailableError as e:
+                logger.warning(f"Namespace watch paused: {e}")
+                self._stop.wait(max(self.retry_seconds, e.retry_after))
+            except Exception as e:
+                logger.error(f"Error watching namespaces of cluster '{cluster_name}': {e}")
+                resource_version = ""
+                self._stop.wait(self.retry_seconds)
+
+        logger.info(f"Stopped watching namespaces of cluster '{cluster_name}'")
+
+    def _reconcile(self, handler: SecretsHandler, cluster_name: str, namespace: Dict[str, Any], propagated: Set[Tuple[str, str]]):
+        """Copy every registered secret whose selector matches namespace into it"""
+        metadata = namespace.get("metadata", {})
+        name = metadata.get("name", "")
+        if not name or name == "argocd" or metadata.get("deletionTimestamp") or namespace.get("status", {}).get("phase") == "Terminating":
+            return
+
+        labels = metadata.get("labels") or {}
+        for registration in handler.registrations.list(cluster_name):
+            secret_name = registration["secret_name"]
+            if (name, secret_name) in propagated or not matches_selector(registration["namespace_selector"], labels):
+                continue
+            try:
+                result = handler.propagate_docker_secret(cluster_name, secret_name, name, Deadline(handler.timeout * 3))
+                if result["success"]:
+                    propagated.add((name, secret_name))
+                    if result["status"] != "unchanged":
+                        logger.info(f"Propagated secret '{secret_name}' to namespace '{name}' of cluster '{cluster_name}'")
+                else:
+                    logger.error(f"Failed to propagate secret '{secret_name}' to namespace '{name}': {result.get('error', '')}")
+            except ClusterUnavailableError:
+                raise
+            except Exception as e:
+                logger.error(f"Error propagating secret '{secret_name}' to namespace '{name}' of cluster '{cluster_name}': {e}")
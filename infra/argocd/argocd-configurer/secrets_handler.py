@@ -4,187 +4,567 @@ Secrets Handler for Cluster API
 Handles kubectl operations to retrieve secrets from Kubernetes clusters
 """
 
+import hashlib
+import hmac
 import json
 import logging
 import os
+import re
 import subprocess
-import yaml
+import threading
+import time
 import asyncio
+import base64
 import concurrent.futures
-from typing import Dict, Any, List, Optional, Tuple
+from collections import deque
+from typing import Deque, Dict, Any, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+import yaml_codec
+from cluster_registry import ClusterRegistry, get_shared_cluster_registry
+from cluster_scheduler import ClusterScheduler, _AsyncWaiter, get_shared_scheduler
+from command_runner import CommandRunner, get_shared_runner
+from namespace_registrations import NamespaceRegistrations, get_shared_registrations, validate_selector
+from hedging import get_hedge_budget, get_hedge_executor, get_latency_tracker
+from secrets_inventory import SecretsInventory, get_shared_inventory
 
 logger = logging.getLogger(__name__)
 
+# Field manager recorded on every object written through server-side apply
+FIELD_MANAGER = "argocd-configurer"
+
+# Annotation holding the hash of the desired content of a managed secret
+CONTENT_HASH_ANNOTATION = "mcops.tech/content-hash"
+
+# Labels set on managed secrets. With the type and data they make up the hashed content
+MANAGED_LABELS = ("mcops.tech/secret-type", "argocd.argoproj.io/secret-type")
+
+# Line of kubectl apply output for one object written or left as is: "<kind>[.<group>]/<name> <outcome>"
+APPLY_OUTPUT_LINE = re.compile(r"^([\w-]+)(?:\.[\w.-]+)?/(\S+) (serverside-applied|configured|created|unchanged)$")
+
+# Secret categories of get_secrets_for_cluster: (label selector, namespace) listed, response
+# list key and response total key. Helm secrets are the helm-type repository secrets
+SECRET_CATEGORIES = {
+    "repo_creds": ("argocd.argoproj.io/secret-type=repo-creds", "argocd", "repo_creds_secrets", "total_repo_creds"),
+    "docker_creds": ("mcops.tech/secret-type=docker-creds", "kube-system", "docker_creds_secrets", "total_docker_creds"),
+    "helm_creds": ("argocd.argoproj.io/secret-type=repository", "argocd", "helm_creds_secrets", "total_helm_creds")
+}
+
+# Fields of a secret summary that can be selected with select_secrets
+SECRET_FIELDS = (
+    "name", "namespace", "labels", "type", "creation_timestamp", "repository_url",
+    "repository_name", "repository_type", "username", "enable_oci"
+)
+
+def encode_secrets_cursor(position: Tuple[int, str, str]) -> str:
+    """Opaque cursor for a (category index, namespace, name) position of select_secrets"""
+    return base64.urlsafe_b64encode(json.dumps(list(position)).encode('utf-8')).decode('ascii')
+
+def decode_secrets_cursor(cursor: str) -> Tuple[int, str, str]:
+    """Position of a select_secrets cursor. Raises ValueError if the cursor is invalid"""
+    try:
+        index, namespace, name = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return int(index), str(namespace), str(name)
+    except Exception:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+
+def load_content_hash_key(path: str) -> bytes:
+    """Key of the content hashes, read from path. A random key is generated and stored
+    (readable by the owner only) when the file does not exist"""
+    if not os.path.exists(path):
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(os.urandom(32).hex() + "\n")
+        logger.info(f"Generated content hash key at {path}")
+    with open(path, 'r', encoding='utf-8') as f:
+        key = f.read().strip()
+    if not key:
+        raise ValueError(f"Content hash key file {path} is empty")
+    return key.encode('utf-8')
+
+# Content hash keys shared by all SecretsHandler instances, by path
+_content_hash_keys: Dict[str, bytes] = {}
+_content_hash_keys_lock = threading.Lock()
+
+def get_content_hash_key(path: str = "content_hash.key") -> bytes:
+    """Get the process-wide content hash key stored at path"""
+    with _content_hash_keys_lock:
+        key = _content_hash_keys.get(path)
+        if key is None:
+            key = load_content_hash_key(path)
+            _content_hash_keys[path] = key
+        return key
+
+class ClusterUnavailableError(Exception):
+    """Raised when a cluster cannot be reached or its circuit breaker is open"""
+
+    def __init__(self, cluster_name: str, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.cluster_name = cluster_name
+        self.retry_after = retry_after
+
+class DeadlineExceededError(Exception):
+    """Raised when the per-request deadline expires before kubectl finished"""
+
+class Deadline:
+    """Absolute point in time by which a whole request must complete"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left until the deadline, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+class CircuitBreaker:
+    """Tracks connection failures of one cluster.
+
+    closed: requests pass, consecutive connection failures are counted.
+    open: after failure_threshold failures requests fail fast for reset_timeout seconds.
+    half_open: a single probe request is let through; success closes the circuit,
+    failure opens it again. Requests arriving while the probe is in flight (the sibling
+    listings of the same call) wait for its outcome instead of failing fast.
+    """
+
+    def __init__(self, cluster_name: str, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.cluster_name = cluster_name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self._lock = threading.Lock()
+        # Set when the in-flight probe finishes
+        self._probe_waiters: List[Union[threading.Event, _AsyncWaiter]] = []
+
+    def allow_request(self, wait: float = 0.0) -> bool:
+        """Check whether a request may be sent to the cluster now. While a half-open probe
+        is in flight, waits up to wait seconds for it: passes once the probe closed the
+        circuit, or as the next probe if it was cancelled"""
+        give_up_at = time.monotonic() + wait
+        while True:
+            with self._lock:
+                allowed = self._admit()
+                if allowed is not None:
+                    return allowed
+                remaining = give_up_at - time.monotonic()
+                if remaining <= 0:
+                    return False
+                waiter = threading.Event()
+                self._probe_waiters.append(waiter)
+
+            if not waiter.wait(remaining):
+                self._discard_waiter(waiter)
+                return False
+
+    async def allow_request_async(self, wait: float = 0.0) -> bool:
+        """Async variant of allow_request, waiting for the probe without blocking the event loop"""
+        give_up_at = time.monotonic() + wait
+        while True:
+            with self._lock:
+                allowed = self._admit()
+                if allowed is not None:
+                    return allowed
+                remaining = give_up_at - time.monotonic()
+                if remaining <= 0:
+                    return False
+                waiter = _AsyncWaiter(asyncio.get_running_loop())
+                self._probe_waiters.append(waiter)
+
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), remaining)
+            except asyncio.TimeoutError:
+                self._discard_waiter(waiter)
+                return False
+            except asyncio.CancelledError:
+                self._discard_waiter(waiter)
+                raise
+
+    def record_success(self):
+        """Cluster answered (whatever the kubectl result), close the circuit"""
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._finish_probe()
+
+    def record_cancelled(self):
+        """Request was cut short by its deadline, tells nothing about the cluster"""
+        with self._lock:
+            self._finish_probe()
+
+    def record_failure(self):
+        """Cluster could not be reached, open the circuit if threshold is reached or probe failed"""
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Opening circuit for cluster '{self.cluster_name}' after {self.failures} connection failure(s)")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._finish_probe()
+
+    def retry_after(self) -> float:
+        """Seconds left until the next half-open probe is allowed"""
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def _admit(self) -> Optional[bool]:
+        """Admission decision, None while another probe is in flight. Called with the lock held"""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self.probe_in_flight = False
+        if self.state == "half_open":
+            if not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return None
+        return False
+
+    def _finish_probe(self):
+        """Wake the requests waiting for the probe. Called with the lock held"""
+        self.probe_in_flight = False
+        waiters, self._probe_waiters = self._probe_waiters, []
+        for waiter in waiters:
+            waiter.set()
+
+    def _discard_waiter(self, waiter: Union[threading.Event, _AsyncWaiter]):
+        with self._lock:
+            if waiter in self._probe_waiters:
+                self._probe_waiters.remove(waiter)
+
+# Per-cluster circuit breakers, shared by all SecretsHandler instances
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+def _get_circuit_breaker(cluster_name: str, failure_threshold: int, reset_timeout: float) -> CircuitBreaker:
+    """Get (or create) the circuit breaker of a cluster"""
+    with _circuit_breakers_lock:
+        breaker = _circuit_breakers.get(cluster_name)
+        if breaker is None:
+            breaker = CircuitBreaker(cluster_name, failure_threshold, reset_timeout)
+            _circuit_breakers[cluster_name] = breaker
+        return breaker
+
+def _is_connection_error(stderr: str) -> bool:
+    """Check if kubectl stderr reports that the API server could not be reached"""
+    stderr = stderr.lower()
+    return any(marker in stderr for marker in (
+        "unable to connect to the server",
+        "connection refused",
+        "no such host",
+        "i/o timeout",
+        "tls handshake timeout",
+        "context deadline exceeded"
+    ))
+
 class SecretsHandler:
     """Handles secrets operations using kubectl"""
 
-    def __init__(self, clusters_folder: str = "clusters", timeout: int = 30):
+    def __init__(self, clusters_folder: str = "clusters", timeout: int = 30, max_parallel_per_cluster: int = 8, list_page_size: int = 100,
+                 circuit_failure_threshold: int = 3, circuit_reset_timeout: float = 30.0, max_concurrency: int = 32,
+                 scheduler: Optional[ClusterScheduler] = None, inventory_path: str = ":memory:",
+                 inventory: Optional[SecretsInventory] = None, runner: Optional[CommandRunner] = None,
+                 registrations_path: str = "namespace_registrations.yaml", registrations: Optional[NamespaceRegistrations] = None,
+                 hedge_reads: bool = False, hedge_percentile: float = 95.0, hedge_budget_ratio: float = 0.1,
+                 hedge_min_delay: float = 0.05, hedge_min_samples: int = 20, cluster_registry: Optional[ClusterRegistry] = None,
+                 content_hash_key_path: str = "content_hash.key", content_hash_key: Optional[bytes] = None):
         self.clusters_folder = clusters_folder
         self.timeout = timeout
+        self.list_page_size = max(1, list_page_size)
+        self.circuit_failure_threshold = max(1, circuit_failure_threshold)
+        self.circuit_reset_timeout = circuit_reset_timeout
+        # Kubeconfigs of clusters_folder, shared by all handlers, with the last observed reachability
+        self.cluster_registry = cluster_registry or get_shared_cluster_registry(clusters_folder)
+        # All handlers share one scheduler capping cluster operations globally and per cluster
+        self.scheduler = scheduler or get_shared_scheduler(max_concurrency, max_parallel_per_cluster)
+        # Metadata of every secret seen, shared by all handlers, for queries without kubectl
+        self.inventory = inventory or get_shared_inventory(inventory_path)
+        # Executes kubectl: real subprocesses unless a recording or replaying runner is given
+        self.runner = runner or get_shared_runner()
+        # Docker secrets registered for namespace selectors, propagated by NamespaceWatcher
+        self.registrations = registrations or get_shared_registrations(registrations_path)
+        # Hedged listing reads: a duplicate read once a read is slower than the cluster's
+        # hedge_percentile latency, within a shared budget of hedge_budget_ratio of all reads
+        self.hedge_reads = hedge_reads
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.latency_tracker = get_latency_tracker()
+        self.hedge_budget = get_hedge_budget(hedge_budget_ratio)
+        # Content hash annotations are keyed, so they cannot be used to check guessed credentials
+        self.content_hash_key = content_hash_key or get_content_hash_key(content_hash_key_path)
+
+    def _run_kubectl(self, cluster_name: str, args: List[str], timeout: float, input: Optional[str] = None,
+                     deadline: Optional[Deadline] = None) -> subprocess.CompletedProcess:
+        """Run kubectl against a cluster through its circuit breaker.
+
+        Raises ClusterUnavailableError without running kubectl while the circuit is open,
+        and when kubectl reports that the cluster could not be reached. The run holds a
+        scheduler slot of the cluster. With a deadline the call never outlives it: waiting
+        for a slot stops at the deadline, kubectl gets the remaining time as
+        --request-timeout and the child process is killed when the deadline expires
+        (DeadlineExceededError).
+        """
+        breaker = self._admit_kubectl(cluster_name, deadline)
+
+        with self.scheduler.slot(cluster_name, deadline.remaining() if deadline is not None else None) as acquired:
+            if not acquired:
+                breaker.record_cancelled()
+                raise DeadlineExceededError(f"Request deadline of {deadline.seconds} seconds exceeded")
+
+            args, timeout = self._clamp_to_deadline(args, timeout, deadline)
+            return self._run_kubectl_command(cluster_name, breaker, args, timeout, input, deadline)
+
+    def _admit_kubectl(self, cluster_name: str, deadline: Optional[Deadline]) -> CircuitBreaker:
+        """Check the deadline and the cluster's circuit before running kubectl. Returns the circuit breaker.
+        While a half-open probe is in flight, waits for its outcome until the deadline"""
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceededError(f"Request deadline of {deadline.seconds} seconds exceeded")
+
+        breaker = _get_circuit_breaker(cluster_name, self.circuit_failure_threshold, self.circuit_reset_timeout)
+        if not breaker.allow_request(deadline.remaining() if deadline is not None else self.timeout):
+            raise self._circuit_open_error(cluster_name, breaker)
+        return breaker
+
+    def _circuit_open_error(self, cluster_name: str, breaker: CircuitBreaker) -> ClusterUnavailableError:
+        retry_after = breaker.retry_after()
+        return ClusterUnavailableError(
+            cluster_name,
+            f"Cluster '{cluster_name}' is unreachable (circuit open), retry in {retry_after:.0f} seconds",
+            retry_after
+        )
+
+    def _clamp_to_deadline(self, args: List[str], timeout: float, deadline: Optional[Deadline]) -> Tuple[List[str], float]:
+        """Shorten timeout to the time left before the deadline and pass it to kubectl as --request-timeout"""
+        if deadline is not None:
+            remaining = deadline.remaining()
+            if remaining < timeout:
+                timeout = remaining
+                args = [f"--request-timeout={max(1, int(remaining))}s"] + args
+        return args, timeout
+
+    def _kubectl_cmd(self, cluster_name: str, args: List[str]) -> List[str]:
+        """Full kubectl command line for a cluster"""
+        kubeconfig_path = os.path.join(self.clusters_folder, f"{cluster_name}.kubeconfig")
+        return ["kubectl", "--kubeconfig", kubeconfig_path] + args
+
+    def _run_kubectl_command(self, cluster_name: str, breaker: "CircuitBreaker", args: List[str], timeout: float,
+                             input: Optional[str], deadline: Optional[Deadline], long_poll: bool = False) -> subprocess.CompletedProcess:
+        """Spawn kubectl and report the outcome to the cluster's circuit breaker and registry.
+        The latency of long_poll commands (watches) is not recorded as probe latency"""
+        cmd = self._kubectl_cmd(cluster_name, args)
+        started_at = time.monotonic()
 
-    def get_secrets_for_cluster(self, cluster_name: str) -> Dict[str, Any]:
-        """Get secrets for a specific cluster using kubectl (parallel execution)"""
         try:
-            # Validate cluster exists
-            kubeconfig_path = os.path.join(self.clusters_folder, f"{cluster_name}.kubeconfig")
-            if not os.path.exists(kubeconfig_path):
-                raise ValueError(f"Cluster '{cluster_name}' not found. No kubeconfig file at {kubeconfig_path}")
+            result = self.runner.run(cmd, input, timeout)
+        except subprocess.TimeoutExpired:
+            if deadline is not None and deadline.expired():
+                breaker.record_cancelled()
+                raise DeadlineExceededError(f"Request deadline of {deadline.seconds} seconds exceeded")
+            breaker.record_failure()
+            self.cluster_registry.record_probe(cluster_name, False, None if long_poll else time.monotonic() - started_at)
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
 
-            # Run all kubectl commands in parallel
-            with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-                # Submit all tasks
-                logger.info(f"Retrieving secrets for cluster '{cluster_name}'...")
+        return self._record_kubectl_result(cluster_name, breaker, result, None if long_poll else time.monotonic() - started_at)
+
+    def _record_kubectl_result(self, cluster_name: str, breaker: CircuitBreaker, result: subprocess.CompletedProcess,
+                               latency: Optional[float] = None) -> subprocess.CompletedProcess:
+        """Report a finished kubectl run to the circuit breaker and registry. Raises ClusterUnavailableError on connection errors"""
+        unreachable = result.returncode != 0 and _is_connection_error(result.stderr)
+        self.cluster_registry.record_probe(cluster_name, not unreachable, latency)
+        if unreachable:
+            breaker.record_failure()
+            raise ClusterUnavailableError(
+                cluster_name,
+                f"Cannot connect to cluster '{cluster_name}': {result.stderr.strip()}",
+                breaker.retry_after()
+            )
 
-                repo_creds_future = executor.submit(
-                    self._get_secrets_with_label,
-                    cluster_name,
-                    "argocd.argoproj.io/secret-type=repo-creds",
-                    "argocd"
-                )
-                docker_creds_future = executor.submit(
-                    self._get_secrets_with_label,
+        breaker.record_success()
+        return result
+
+    def get_secrets_for_cluster(self, cluster_name: str, deadline: Optional[Deadline] = None,
+                                categories: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Get secrets for a specific cluster using kubectl (parallel execution).
+        The whole call is bounded by deadline (defaults to the configured timeout).
+        With categories (keys of SECRET_CATEGORIES) only those are listed and returned"""
+        if deadline is None:
+            deadline = Deadline(self.timeout)
+
+        try:
+            self._validate_cluster(cluster_name)
+            categories = self._secret_categories(categories)
+
+            # Run all kubectl commands in parallel on the shared scheduler
+            # Submit all tasks
+            logger.info(f"Retrieving secrets for cluster '{cluster_name}'...")
+
+            futures = {
+                category: self.scheduler.submit(
                     cluster_name,
-                    "mcops.tech/secret-type=docker-creds",
-                    "kube-system"
-                )
-                repositories_creds_future = executor.submit(
                     self._get_secrets_with_label,
                     cluster_name,
-                    "argocd.argoproj.io/secret-type=repository",
-                    "argocd"
+                    SECRET_CATEGORIES[category][0],
+                    SECRET_CATEGORIES[category][1],
+                    deadline
                 )
-
-                # Wait for all to complete with timeout
-                try:
-                    repo_creds_secrets = repo_creds_future.result(timeout=self.timeout)
-                    docker_creds_secrets = docker_creds_future.result(timeout=self.timeout)
-                    repositories_creds_secrets = repositories_creds_future.result(timeout=self.timeout)
-                except concurrent.futures.TimeoutError:
-                    logger.warning(f"Timeout waiting for kubectl commands for cluster '{cluster_name}'")
-                    # Cancel any remaining tasks
-                    repo_creds_future.cancel()
-                    docker_creds_future.cancel()
-                    repositories_creds_future.cancel()
-                    return {
-                        "cluster": cluster_name,
-                        "repo_creds_secrets": [],
-                        "docker_creds_secrets": [],
-                        "helm_creds_secrets": [],
-                        "total_repo_creds": 0,
-                        "total_docker_creds": 0,
-                        "total_helm_creds": 0,
-                        "status": "timeout",
-                        "message": f"Commands timed out after {self.timeout} seconds"
-                    }
-                except Exception as e:
-                    logger.error(f"Error executing parallel kubectl commands for cluster '{cluster_name}': {e}")
-                    return {
-                        "cluster": cluster_name,
-                        "repo_creds_secrets": [],
-                        "docker_creds_secrets": [],
-                        "helm_creds_secrets": [],
-                        "total_repo_creds": 0,
-                        "total_docker_creds": 0,
-                        "total_helm_creds": 0,
-                        "status": "error",
-                        "message": f"Error executing commands: {str(e)}"
-                    }
-
-            # Filter repositories to only include helm type secrets
-            helm_creds_secrets = [
-                secret for secret in repositories_creds_secrets
-                if secret.get("repository_type") == "helm"
-            ]
-
-            return {
-                "cluster": cluster_name,
-                "repo_creds_secrets": repo_creds_secrets,
-                "docker_creds_secrets": docker_creds_secrets,
-                "helm_creds_secrets": helm_creds_secrets,
-                "total_repo_creds": len(repo_creds_secrets),
-                "total_docker_creds": len(docker_creds_secrets),
-                "total_helm_creds": len(helm_creds_secrets),
-                "status": "success"
+                for category in categories
             }
 
+            # Wait for all to complete within the request deadline. kubectl processes are
+            # killed at the deadline, so no worker keeps running past it
+            try:
+                listed = {category: future.result(timeout=deadline.remaining()) for category, future in futures.items()}
+            except ClusterUnavailableError as e:
+                logger.warning(str(e))
+                self._cancel_futures(list(futures.values()))
+                return self._unreachable_secrets_response(cluster_name, e)
+            except (concurrent.futures.TimeoutError, DeadlineExceededError):
+                logger.warning(f"Timeout waiting for kubectl commands for cluster '{cluster_name}'")
+                # Drop operations still queued for a slot
+                self._cancel_futures(list(futures.values()))
+                return self._failed_secrets_response(cluster_name, "timeout", f"Commands timed out after {deadline.seconds} seconds")
+            except Exception as e:
+                logger.error(f"Error executing parallel kubectl commands for cluster '{cluster_name}': {e}")
+                self._cancel_futures(list(futures.values()))
+                return self._failed_secrets_response(cluster_name, "error", f"Error executing commands: {str(e)}")
+
+            return self._secrets_response(
+                cluster_name, listed.get("repo_creds"), listed.get("docker_creds"), listed.get("helm_creds")
+            )
+
         except Exception as e:
             logger.error(f"Error getting secrets for cluster '{cluster_name}': {str(e)}")
             raise
 
-    def _get_secrets_with_label(self, cluster_name: str, label_selector: str, namespace: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get secrets with specific label selector using kubectl"""
-        try:
+    def _validate_cluster(self, cluster_name: str):
+        """Raise ValueError if the cluster has no kubeconfig file"""
+        if not self.cluster_registry.exists(cluster_name):
             kubeconfig_path = os.path.join(self.clusters_folder, f"{cluster_name}.kubeconfig")
-
-            # Run kubectl command to get secrets with label
-            cmd = [
-                "kubectl",
-                "--kubeconfig", kubeconfig_path,
-                "get", "secrets",
-                "-l", label_selector,
-                "-o", "json"
+            raise ValueError(f"Cluster '{cluster_name}' not found. No kubeconfig file at {kubeconfig_path}")
+
+    def _secret_categories(self, categories: Optional[List[str]]) -> List[str]:
+        """Requested categories in SECRET_CATEGORIES order, all of them by default. Raises ValueError on unknown ones"""
+        if not categories:
+            return list(SECRET_CATEGORIES)
+        unknown = [category for category in categories if category not in SECRET_CATEGORIES]
+        if unknown:
+            raise ValueError(f"Unknown secret category '{unknown[0]}', expected one of: {', '.join(SECRET_CATEGORIES)}")
+        return [category for category in SECRET_CATEGORIES if category in categories]
+
+    def _secrets_response(self, cluster_name: str, repo_creds_secrets: Optional[List[Dict[str, Any]]],
+                          docker_creds_secrets: Optional[List[Dict[str, Any]]],
+                          repositories_creds_secrets: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Build successful get_secrets_for_cluster response. Categories that were not listed (None) are left out"""
+        response: Dict[str, Any] = {"cluster": cluster_name}
+        if repo_creds_secrets is not None:
+            response["repo_creds_secrets"] = repo_creds_secrets
+        if docker_creds_secrets is not None:
+            response["docker_creds_secrets"] = docker_creds_secrets
+        if repositories_creds_secrets is not None:
+            # Filter repositories to only include helm type secrets
+            response["helm_creds_secrets"] = [
+                secret for secret in repositories_creds_secrets
+                if secret.get("repository_type") == "helm"
             ]
-            if namespace:
-                cmd.append("-n")
-                cmd.append(namespace)
-
-            logger.info(f"Running kubectl command: {' '.join(cmd)}")
-
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=self.timeout  # Use configurable timeout
-            )
-
-            if result.returncode != 0:
-                # Check if it's a connection error
-                if "Unable to connect to the server" in result.stderr or "connection refused" in result.stderr.lower():
-                    logger.warning(f"Cannot connect to cluster '{cluster_name}': {result.stderr.strip()}")
-                    return []
-                elif "timeout" in result.stderr.lower():
-                    logger.warning(f"Connection to cluster '{cluster_name}' timed out")
-                    return []
-                else:
-                    logger.error(f"kubectl command failed: {result.stderr}")
-                    return []
-
-            # Parse JSON output
-            secrets_data = json.loads(result.stdout)
-
-            # Extract relevant information from secrets
-            secrets = []
-            for item in secrets_data.get("items", []):
-                metadata = item.get("metadata", {})
-                labels = metadata.get("labels", {})
-
-                secret_info = {
-                    "name": metadata.get("name", ""),
-                    "namespace": metadata.get("namespace", ""),
-                    "labels": labels,
-                    "type": item.get("type", ""),
-                    "creation_timestamp": metadata.get("creationTimestamp", "")
-                }
-
-                # Add detailed metadata for helm repository secrets
-                if labels.get("argocd.argoproj.io/secret-type") == "repository":
-                    # Get stringData for helm secrets
-                    data = item.get("data", {})
-                    secret_info.update({
-                        "repository_url": self._base64_decode(data.get("url", "")),
-                        "repository_name": self._base64_decode(data.get("name", "")),
-                        "repository_type": self._base64_decode(data.get("type", "")),
-                        "username": self._base64_decode(data.get("username", ""))
-                    })
-                    if self._base64_decode(data.get("type", "")) == "helm":
-                        secret_info.update({
-                            "enable_oci": self._base64_decode(data.get("enableOCI", "ZmFsc2U=")).lower() == "true"
-                        })
-
-                secrets.append(secret_info)
+        for _, _, list_key, total_key in SECRET_CATEGORIES.values():
+            if list_key in response:
+                response[total_key] = len(response[list_key])
+        response["status"] = "success"
+        return response
+
+    def select_secrets(self, response: Dict[str, Any], namespace: Optional[str] = None, name_prefix: Optional[str] = None,
+                       fields: Optional[List[str]] = None, limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Filter, project and paginate a get_secrets_for_cluster response.
+
+        Secrets are ordered by category, namespace and name. Totals count every secret that
+        matches the filters; the lists hold at most limit secrets after cursor, and
+        next_cursor (None on the last page) continues the listing. fields selects the
+        summary fields returned (SECRET_FIELDS). Raises ValueError on an invalid cursor or field.
+        """
+        unknown = [field for field in fields or [] if field not in SECRET_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown secret field '{unknown[0]}', expected one of: {', '.join(SECRET_FIELDS)}")
+        after = decode_secrets_cursor(cursor) if cursor else None
+
+        selected = dict(response)
+        positioned = []
+        for index, (_, _, list_key, total_key) in enumerate(SECRET_CATEGORIES.values()):
+            if list_key not in response:
+                continue
+            matching = [
+                secret for secret in response[list_key]
+                if (namespace is None or secret.get("namespace") == namespace)
+                and (name_prefix is None or secret.get("name", "").startswith(name_prefix))
+            ]
+            selected[total_key] = len(matching)
+            selected[list_key] = []
+            positioned.extend(((index, secret.get("namespace", ""), secret.get("name", "")), list_key, secret) for secret in matching)
+
+        positioned.sort(key=lambda entry: entry[0])
+        if after is not None:
+            positioned = [entry for entry in positioned if entry[0] > after]
+        next_cursor = None
+        if limit is not None and len(positioned) > limit:
+            positioned = positioned[:limit]
+            next_cursor = encode_secrets_cursor(positioned[-1][0]) if positioned else None
+
+        for _, list_key, secret in positioned:
+            if fields:
+                secret = {field: secret[field] for field in fields if field in secret}
+            selected[list_key].append(secret)
+        selected["next_cursor"] = next_cursor
+        return selected
+
+    def _failed_secrets_response(self, cluster_name: str, status: str, message: str, **extra: Any) -> Dict[str, Any]:
+        """Build get_secrets_for_cluster response without secrets"""
+        return {
+            "cluster": cluster_name,
+            "repo_creds_secrets": [],
+            "docker_creds_secrets": [],
+            "helm_creds_secrets": [],
+            "total_repo_creds": 0,
+            "total_docker_creds": 0,
+            "total_helm_creds": 0,
+            "status": status,
+            "message": message,
+            **extra
+        }
 
+    def _unreachable_secrets_response(self, cluster_name: str, error: ClusterUnavailableError) -> Dict[str, Any]:
+        """Build get_secrets_for_cluster response for an unreachable cluster"""
+        return self._failed_secrets_response(
+            cluster_name,
+            "cluster_unreachable",
+            "Cannot connect to cluster. Please check if the cluster is running and accessible.",
+            retry_after=round(error.retry_after)
+        )
+
+    def _get_secrets_with_label(self, cluster_name: str, label_selector: str, namespace: Optional[str] = None,
+                                deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        """Get secrets with specific label selector using kubectl"""
+        try:
+            secrets = list(self._iter_secrets_with_label(cluster_name, label_selector, namespace, deadline))
+            self._index_listing(cluster_name, label_selector, namespace, secrets)
             return secrets
 
+        except (ClusterUnavailableError, DeadlineExceededError):
+            raise
+        except RuntimeError:
+            # kubectl failure, already logged
+            return []
         except subprocess.TimeoutExpired:
             logger.warning(f"kubectl command timed out for cluster '{cluster_name}' after {self.timeout} seconds")
             return []
@@ -195,256 +575,679 @@ class SecretsHandler:
             logger.error(f"Error getting secrets with label '{label_selector}' for cluster '{cluster_name}': {e}")
             return []
 
-    def list_available_clusters(self) -> List[str]:
-        """List all available clusters based on kubeconfig files"""
+    def _iter_secrets_with_label(self, cluster_name: str, label_selector: str, namespace: Optional[str] = None,
+                                 deadline: Optional[Deadline] = None) -> Iterator[Dict[str, Any]]:
+        """Stream secrets with specific label selector page by page (limit/continue).
+
+        Every item is reduced to its secret_info summary as soon as its page is parsed, so
+        memory is bounded by the page size rather than by the number of secrets in the cluster.
+        Raises RuntimeError when kubectl fails and ClusterUnavailableError when the cluster cannot be reached.
+        """
+        continue_token = ""
+
+        while True:
+            # Run kubectl command to get one page of secrets with label
+            args = self._list_page_args(label_selector, namespace, continue_token)
+
+            logger.info(f"Running kubectl command for cluster '{cluster_name}': kubectl {' '.join(args)}")
+
+            # Connection errors raise ClusterUnavailableError
+            result = self._run_kubectl_read(cluster_name, args, timeout=self.timeout, deadline=deadline)  # Use configurable timeout
+
+            secrets, continue_token = self._parse_list_page(cluster_name, result)
+            yield from secrets
+
+            if not continue_token:
+                return
+
+    def _index_listing(self, cluster_name: str, label_selector: str, namespace: Optional[str], secrets: List[Dict[str, Any]]):
+        """Record a complete listing in the inventory. Indexing problems never fail the request"""
         try:
-            clusters = []
-            if not os.path.exists(self.clusters_folder):
-                return clusters
+            self.inventory.record_listing(cluster_name, label_selector, namespace, secrets)
+        except Exception as e:
+            logger.warning(f"Failed to index secrets of cluster '{cluster_name}': {e}")
+
+    def _run_kubectl_read(self, cluster_name: str, args: List[str], timeout: float,
+                          deadline: Optional[Deadline] = None) -> subprocess.CompletedProcess:
+        """Run an idempotent kubectl read, hedged when enabled.
+
+        When the read takes longer than the hedge threshold and the hedge budget allows it,
+        the same read is issued again and the first one to complete wins. The other keeps
+        its slot until it ends (at the latest at its timeout or the deadline).
+        """
+        if not self.hedge_reads:
+            return self._timed_read(cluster_name, args, timeout, deadline)
+
+        self.hedge_budget.record_read()
+        threshold = self._hedge_threshold(cluster_name)
+        if threshold is None:
+            return self._timed_read(cluster_name, args, timeout, deadline)
+
+        executor = get_hedge_executor()
+        # Inside a submitted task the primary read runs in the task's slot, so the task waiting
+        # for it does not tie up a second one
+        primary = executor.submit(self.scheduler.run_with_slot, self.scheduler.held_slot(),
+                                  self._timed_read, cluster_name, args, timeout, deadline)
+        try:
+            return primary.result(timeout=min(threshold, deadline.remaining()) if deadline is not None else threshold)
+        except concurrent.futures.TimeoutError:
+            pass
 
-            for filename in os.listdir(self.clusters_folder):
-                if filename.endswith('.kubeconfig'):
-                    cluster_name = filename.replace('.kubeconfig', '')
-                    clusters.append(cluster_name)
+        remaining = deadline.remaining() if deadline is not None else None
+        if (deadline is not None and deadline.expired()) or not self.hedge_budget.try_spend():
+            try:
+                return primary.result(timeout=remaining)
+            except concurrent.futures.TimeoutError:
+                raise DeadlineExceededError(f"Request deadline of {deadline.seconds} seconds exceeded")
+
+        logger.info(f"Hedging read for cluster '{cluster_name}' after {threshold:.3f} seconds: kubectl {' '.join(args)}")
+        hedge = executor.submit(self._timed_read, cluster_name, args, timeout, deadline)
+
+        pending = {primary, hedge}
+        first_error: Optional[BaseException] = None
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending,
+                timeout=deadline.remaining() if deadline is not None else None,
+                return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            if not done:
+                raise DeadlineExceededError(f"Request deadline of {deadline.seconds} seconds exceeded")
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self.hedge_budget.record_hedge_won()
+                    return future.result()
+                first_error = first_error or future.exception()
+        raise first_error
+
+    def _timed_read(self, cluster_name: str, args: List[str], timeout: float, deadline: Optional[Deadline]) -> subprocess.CompletedProcess:
+        """Run a read and feed its latency into the cluster's rolling statistics when it succeeded"""
+        started_at = time.monotonic()
+        result = self._run_kubectl(cluster_name, args, timeout=timeout, deadline=deadline)
+        if result.returncode == 0:
+            self.latency_tracker.record(cluster_name, time.monotonic() - started_at)
+        return result
+
+    def _hedge_threshold(self, cluster_name: str) -> Optional[float]:
+        """Seconds after which a read of the cluster is hedged, None until enough reads were seen"""
+        latency = self.latency_tracker.percentile(cluster_name, self.hedge_percentile, self.hedge_min_samples)
+        if latency is None:
+            return None
+        return max(self.hedge_min_delay, latency)
+
+    def _list_page_args(self, label_selector: str, namespace: Optional[str], continue_token: str) -> List[str]:
+        """kubectl arguments fetching one page of secrets with label through the list API"""
+        api_path = f"/api/v1/namespaces/{namespace}/secrets" if namespace else "/api/v1/secrets"
+        query = {"labelSelector": label_selector, "limit": self.list_page_size}
+        if continue_token:
+            query["continue"] = continue_token
+        return ["get", "--raw", f"{api_path}?{urlencode(query)}"]
+
+    def _parse_list_page(self, cluster_name: str, result: subprocess.CompletedProcess) -> Tuple[List[Dict[str, Any]], str]:
+        """Reduce one page of the list API to secret_info summaries. Returns (secrets, continue_token).
+        Raises RuntimeError when kubectl failed"""
+        items, continue_token = self._list_page_items(cluster_name, result)
+        return [self._secret_info(item) for item in items], continue_token
+
+    def _list_page_items(self, cluster_name: str, result: subprocess.CompletedProcess) -> Tuple[List[Dict[str, Any]], str]:
+        """Raw items of one page of the list API. Returns (items, continue_token).
+        Raises RuntimeError when kubectl failed"""
+        if result.returncode != 0:
+            if "timeout" in result.stderr.lower():
+                logger.warning(f"Connection to cluster '{cluster_name}' timed out")
+            else:
+                logger.error(f"kubectl command failed: {result.stderr}")
+            raise RuntimeError(f"kubectl command failed: {result.stderr.strip()}")
+
+        # Parse JSON output of this page only
+        page = json.loads(result.stdout)
+        return page.get("items", []), page.get("metadata", {}).get("continue", "")
+
+    def _secret_info(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract relevant information from a secret"""
+        metadata = item.get("metadata", {})
+        labels = metadata.get("labels", {})
+
+        secret_info = {
+            "name": metadata.get("name", ""),
+            "namespace": metadata.get("namespace", ""),
+            "labels": labels,
+            "type": item.get("type", ""),
+            "creation_timestamp": metadata.get("creationTimestamp", "")
+        }
+
+        # Add detailed metadata for helm repository secrets
+        if labels.get("argocd.argoproj.io/secret-type") == "repository":
+            # Get stringData for helm secrets
+            data = item.get("data", {})
+            secret_info.update({
+                "repository_url": self._base64_decode(data.get("url", "")),
+                "repository_name": self._base64_decode(data.get("name", "")),
+                "repository_type": self._base64_decode(data.get("type", "")),
+                "username": self._base64_decode(data.get("username", ""))
+            })
+            if self._base64_decode(data.get("type", "")) == "helm":
+                secret_info.update({
+                    "enable_oci": self._base64_decode(data.get("enableOCI", "ZmFsc2U=")).lower() == "true"
+                })
+
+        # Registry and username of docker secrets, for inventory queries
+        if labels.get("mcops.tech/secret-type") == "docker-creds":
+            secret_info.update(self._docker_secret_identity(item))
 
-            return clusters
+        return secret_info
+
+    def _docker_secret_identity(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Registry (as repository_url) and username of a docker-creds secret, never the password"""
+        data = item.get("data", {})
+        try:
+            if ".dockerconfigjson" in data:
+                auths = json.loads(self._base64_decode(data[".dockerconfigjson"])).get("auths", {})
+                for registry, auth in auths.items():
+                    username = auth.get("username") or self._base64_decode(auth.get("auth", "")).split(":", 1)[0]
+                    return {"repository_url": registry, "username": username}
+            elif "username" in data:
+                return {"username": self._base64_decode(data["username"])}
+        except Exception:
+            pass
+        return {}
+
+    def list_available_clusters(self) -> List[str]:
+        """List all available clusters based on kubeconfig files"""
+        try:
+            return self.cluster_registry.names()
 
         except Exception as e:
             logger.error(f"Error listing clusters: {e}")
             return []
 
-    def add_docker_secret(self, cluster_name: str, secret_name: str, password: str, username: str, namespaces: List[str], upsert: bool = False) -> Dict[str, Any]:
-        """Add Docker registry secret to multiple namespaces in cluster"""
+    def add_docker_secret(self, cluster_name: str, secret_name: str, password: str, username: str, namespaces: List[str], upsert: bool = False,
+                          deadline: Optional[Deadline] = None, namespace_selector: Optional[str] = None) -> Dict[str, Any]:
+        """Add Docker registry secret to multiple namespaces in cluster, within an optional request deadline.
+        With namespace_selector the secret also goes to all namespaces matching it, and the
+        selector is registered so that namespaces created later get the secret too"""
         try:
-            # Validate cluster exists
-            kubeconfig_path = os.path.join(self.clusters_folder, f"{cluster_name}.kubeconfig")
-            if not os.path.exists(kubeconfig_path):
-                raise ValueError(f"Cluster '{cluster_name}' not found. No kubeconfig file at {kubeconfig_path}")
-
-            # Check if secrets already exist in any of the provided namespaces
-            existing_secrets = self._check_existing_secrets_in_namespaces(cluster_name, secret_name, namespaces)
-            existing_namespaces = [ns for ns, exists in existing_secrets.items() if exists['exists']]
-
-            if existing_namespaces and not upsert:
-                return {
-                    "error": True,
-                    "message": f"Secrets already exist in namespaces: {', '.join(existing_namespaces)}",
-                    "existing_secrets": existing_secrets,
-                    "upsert_required": True
-                }
+            self._validate_cluster(cluster_name)
+
+            if namespace_selector:
+                validate_selector(namespace_selector)
+                namespaces = self._with_selected_namespaces(cluster_name, namespaces, namespace_selector, deadline)
+
+            # Check if secrets already exist in any of the provided namespaces, and the
+            # ArgoCD image updater secret in argocd namespace, concurrently
+            checks = self._run_for_namespaces(
+                cluster_name,
+                self._docker_secret_targets(secret_name, namespaces),
+                lambda target: self._check_existing_secret_in_namespace(cluster_name, target[1], target[0], deadline),
+                deadline
+            )
+            existing_error = self._existing_docker_secrets_error(namespaces, checks, upsert)
+            if existing_error:
+                return existing_error
 
-            # Delete existing secrets if upsert is True
-            if upsert and existing_namespaces:
-                self._delete_existing_secrets_in_namespaces(cluster_name, secret_name, existing_namespaces)
+            # Render Docker registry secret for every namespace, plus the ArgoCD image updater
+            # secret in argocd namespace, and apply the changed ones in a single kubectl call.
+            # Server-side apply upserts existing secrets in place, no delete is needed
+            manifests = self._docker_secret_manifests(secret_name, password, username, namespaces)
+            apply_results = self._apply_changed_manifests(cluster_name, manifests, checks, deadline)
 
-            # Generate Docker registry secret YAML for each namespace
-            results = []
-            for namespace in namespaces:
-                docker_secret_yaml = self._generate_docker_secret_yaml(secret_name, password, username, namespace)
-                result = self._apply_yaml_to_cluster(cluster_name, docker_secret_yaml, namespace)
-                results.append({
-                    "namespace": namespace,
-                    "result": result
-                })
+            response = self._docker_secret_response(cluster_name, secret_name, namespaces, checks, manifests, apply_results)
+            if namespace_selector:
+                response["registration"] = self._register_namespace_selector(cluster_name, secret_name, namespace_selector, apply_results)
+            return response
 
-            # Also create ArgoCD image updater secret in argocd namespace
-            argocd_image_updater_yaml = self._generate_argocd_image_updater_yaml(secret_name, password, username)
-            argocd_result = self._apply_yaml_to_cluster(cluster_name, argocd_image_updater_yaml, "argocd")
-            results.append({
-                "namespace": "argocd",
-                "result": argocd_result
-            })
+        except Exception as e:
+            logger.error(f"Error adding Docker secret to cluster '{cluster_name}': {str(e)}")
+            raise
 
+    def _with_selected_namespaces(self, cluster_name: str, namespaces: List[str], namespace_selector: str,
+                                  deadline: Optional[Deadline]) -> List[str]:
+        """namespaces plus the ones currently matching namespace_selector (argocd excluded)"""
+        selected, _ = self.list_namespaces(cluster_name, namespace_selector, deadline)
+        selected_names = [item.get("metadata", {}).get("name", "") for item in selected]
+        return list(dict.fromkeys(namespaces + [name for name in selected_names if name and name != "argocd"]))
+
+    def _register_namespace_selector(self, cluster_name: str, secret_name: str, namespace_selector: str,
+                                     apply_results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Record the selector once the image updater secret (the credentials source for new namespaces) is in place"""
+        if not apply_results[-1]["success"]:
+            logger.warning(f"Not registering selector for secret '{secret_name}': image updater secret was not applied")
+            return None
+        return self.registrations.add(cluster_name, secret_name, namespace_selector)
+
+    def list_namespaces(self, cluster_name: str, label_selector: Optional[str] = None,
+                        deadline: Optional[Deadline] = None) -> Tuple[List[Dict[str, Any]], str]:
+        """List namespaces (optionally matching label_selector). Returns (items, resource_version)
+        so that a watch can continue from this listing. Raises RuntimeError if kubectl fails"""
+        items: List[Dict[str, Any]] = []
+        continue_token = ""
+        while True:
+            query = {"limit": self.list_page_size}
+            if label_selector:
+                query["labelSelector"] = label_selector
+            if continue_token:
+                query["continue"] = continue_token
+
+            result = self._run_kubectl(cluster_name, ["get", "--raw", f"/api/v1/namespaces?{urlencode(query)}"],
+                                       timeout=self.timeout, deadline=deadline)
+            if result.returncode != 0:
+                raise RuntimeError(f"kubectl command failed: {result.stderr.strip()}")
+
+            page = json.loads(result.stdout)
+            items.extend(page.get("items", []))
+            continue_token = page.get("metadata", {}).get("continue", "")
+            if not continue_token:
+                return items, page.get("metadata", {}).get("resourceVersion", "")
+
+    def watch_namespaces(self, cluster_name: str, resource_version: str, timeout_seconds: int) -> List[Dict[str, Any]]:
+        """Long-poll namespace changes after resource_version for up to timeout_seconds.
+        Returns the watch events (ADDED, MODIFIED, DELETED, BOOKMARK, ERROR) in order.
+        Raises RuntimeError if kubectl fails"""
+        query = urlencode({
+            "watch": "1",
+            "resourceVersion": resource_version,
+            "timeoutSeconds": timeout_seconds,
+            "allowWatchBookmarks": "true"
+        })
+        # An idle watch waits on the API server, so it goes through the circuit breaker but
+        # does not hold one of the cluster's scheduler slots
+        breaker = self._admit_kubectl(cluster_name, None)
+        result = self._run_kubectl_command(
+            cluster_name, breaker, ["get", "--raw", f"/api/v1/namespaces?{query}"], timeout_seconds + self.timeout, None, None,
+            long_poll=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"kubectl command failed: {result.stderr.strip()}")
+
+        return [json.loads(line) for line in result.stdout.splitlines() if line.strip()]
+
+    def propagate_docker_secret(self, cluster_name: str, secret_name: str, namespace: str,
+                                deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Copy a registered Docker secret into one namespace unless it is already there.
+        Credentials come from the secret's ArgoCD image updater secret in argocd namespace"""
+        existing = self._check_existing_secret_in_namespace(cluster_name, secret_name, namespace, deadline)
+        if existing["exists"]:
+            return {"success": True, "namespace": namespace, "status": "unchanged", "output": f"secret/{secret_name} unchanged"}
+
+        source = self._run_kubectl(cluster_name, ["get", "secret", f"{secret_name}-iu", "-n", "argocd", "-o", "json"],
+                                   timeout=10, deadline=deadline)
+        if source.returncode != 0:
+            raise RuntimeError(f"Source secret '{secret_name}-iu' not found in argocd namespace: {source.stderr.strip()}")
+        data = json.loads(source.stdout).get("data", {})
+
+        manifest = (namespace, self._generate_docker_secret_yaml(
+            secret_name, self._base64_decode(data.get("password", "")), self._base64_decode(data.get("username", "")), namespace
+        ))
+        return self._apply_changed_manifests(cluster_name, [manifest], [existing], deadline)[0]
+
+    def _docker_secret_targets(self, secret_name: str, namespaces: List[str]) -> List[Tuple[str, str]]:
+        """(namespace, name) of every secret written by add_docker_secret, image updater secret last"""
+        targets = [(namespace, secret_name) for namespace in namespaces]
+        targets.append(("argocd", f"{secret_name}-iu"))
+        return targets
+
+    def _docker_secret_manifests(self, secret_name: str, password: str, username: str, namespaces: List[str]) -> List[Tuple[str, str]]:
+        """(namespace, yaml_content) manifests written by add_docker_secret, in _docker_secret_targets order"""
+        manifests = [
+            (namespace, self._generate_docker_secret_yaml(secret_name, password, username, namespace))
+            for namespace in namespaces
+        ]
+        manifests.append(("argocd", self._generate_argocd_image_updater_yaml(secret_name, password, username)))
+        return manifests
+
+    def _existing_docker_secrets_error(self, namespaces: List[str], checks: List[Dict[str, Any]], upsert: bool) -> Optional[Dict[str, Any]]:
+        """Error response when secrets already exist and upsert was not requested"""
+        existing_secrets = dict(zip(namespaces, checks[:-1]))
+        existing_namespaces = [ns for ns, exists in existing_secrets.items() if exists['exists']]
+
+        if existing_namespaces and not upsert:
             return {
-                "success": True,
-                "cluster": cluster_name,
-                "secret_name": secret_name,
-                "namespaces": namespaces + ["argocd"],
-                "results": results,
-                "message": f"Docker registry secrets {'updated' if existing_namespaces else 'created'} successfully in {len(namespaces) + 1} namespace(s)"
+                "error": True,
+                "message": f"Secrets already exist in namespaces: {', '.join(existing_namespaces)}",
+                "existing_secrets": existing_secrets,
+                "upsert_required": True
+            }
+        return None
+
+    def _docker_secret_response(self, cluster_name: str, secret_name: str, namespaces: List[str], checks: List[Dict[str, Any]],
+                                manifests: List[Tuple[str, str]], apply_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build add_docker_secret response"""
+        results = [
+            {
+                "namespace": namespace,
+                "result": result
             }
+            for (namespace, _), result in zip(manifests, apply_results)
+        ]
+        counts = self._count_apply_statuses(apply_results)
+        any_existed = any(check['exists'] for check in checks[:-1])
 
-        except Exception as e:
-            logger.error(f"Error adding Docker secret to cluster '{cluster_name}': {str(e)}")
-            raise
+        if counts["created"] or counts["updated"]:
+            message = f"Docker registry secrets {'updated' if any_existed else 'created'} successfully in {len(namespaces) + 1} namespace(s)"
+        else:
+            message = f"Docker registry secrets unchanged in {len(namespaces) + 1} namespace(s)"
 
-    def add_helm_repo_secret(self, cluster_name: str, secret_name: str, repository_url: str, use_oci: bool, password: str, username: str,  upsert: bool = False) -> Dict[str, Any]:
-        """Add Helm repository secret to cluster"""
-        try:
-            # Validate repository_url format (no protocol)
-            if '://' in repository_url:
-                raise ValueError(f"Repository URL '{repository_url}' contains protocol. Please provide only hostname and port (e.g., 'ghcr.io' or 'registry.example.com:5000')")
+        return {
+            "success": True,
+            "cluster": cluster_name,
+            "secret_name": secret_name,
+            "namespaces": namespaces + ["argocd"],
+            "results": results,
+            **counts,
+            "message": message
+        }
 
-            # Validate cluster exists
-            kubeconfig_path = os.path.join(self.clusters_folder, f"{cluster_name}.kubeconfig")
-            if not os.path.exists(kubeconfig_path):
-                raise ValueError(f"Cluster '{cluster_name}' not found. No kubeconfig file at {kubeconfig_path}")
+    def add_helm_repo_secret(self, cluster_name: str, secret_name: str, repository_url: str, use_oci: bool, password: str, username: str,  upsert: bool = False,
+                             deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Add Helm repository secret to cluster, within an optional request deadline"""
+        try:
+            self._validate_repository_url(repository_url)
+            self._validate_cluster(cluster_name)
 
             # Check if secret already exists
-            existing_secret = self._check_existing_helm_secret(cluster_name, secret_name)
-
-            if existing_secret['exists']:
-                if not upsert:
-                    return {
-                        "error": True,
-                        "message": "Helm repository secret already exists",
-                        "existing_secret": existing_secret,
-                        "upsert_required": True
-                    }
-                else:
-                    # Delete existing secret if upsert is True
-                    self._delete_existing_helm_secret(cluster_name, secret_name)
+            existing_secret = self._check_existing_helm_secret(cluster_name, secret_name, deadline)
+
+            if existing_secret['exists'] and not upsert:
+                return self._existing_helm_secret_error(existing_secret)
 
             # Generate Helm repository secret YAML
             helm_secret_yaml = self._generate_helm_secret_yaml(secret_name, repository_url, use_oci, password, username)
 
-            # Apply the YAML file
-            result = self._apply_yaml_to_cluster(cluster_name, helm_secret_yaml, "argocd")
+            # Apply the YAML unless unchanged (server-side apply updates an existing secret in place)
+            result = self._apply_changed_manifests(cluster_name, [("argocd", helm_secret_yaml)], [existing_secret], deadline)[0]
 
-            return {
-                "success": True,
-                "cluster": cluster_name,
-                "secret_name": secret_name,
-                "repository_url": repository_url,
-                "helm_secret_applied": result,
-                "message": "Helm repository secret updated successfully" if existing_secret['exists'] else "Helm repository secret created successfully"
-            }
+            return self._helm_secret_response(cluster_name, secret_name, repository_url, existing_secret, result)
 
         except Exception as e:
             logger.error(f"Error adding Helm repository secret to cluster '{cluster_name}': {str(e)}")
             raise
 
-    def _check_existing_secrets(self, cluster_name: str, secret_name: str) -> Dict[str, Any]:
-        """Check if secrets already exist in both namespaces"""
-        kubeconfig_path = os.path.join(self.clusters_folder, f"{cluster_name}.kubeconfig")
+    def _validate_repository_url(self, repository_url: str):
+        """Raise ValueError if repository_url contains a protocol"""
+        if '://' in repository_url:
+            raise ValueError(f"Repository URL '{repository_url}' contains protocol. Please provide only hostname and port (e.g., 'ghcr.io' or 'registry.example.com:5000')")
 
-        # Check kube-system namespace
-        kube_system_cmd = [
-            "kubectl", "--kubeconfig", kubeconfig_path,
-            "get", "secret", secret_name, "-n", "kube-system", "-o", "json"
-        ]
+    def _existing_helm_secret_error(self, existing_secret: Dict[str, Any]) -> Dict[str, Any]:
+        """Error response when the helm secret already exists and upsert was not requested"""
+        return {
+            "error": True,
+            "message": "Helm repository secret already exists",
+            "existing_secret": existing_secret,
+            "upsert_required": True
+        }
 
-        # Check argocd namespace
-        argocd_cmd = [
-            "kubectl", "--kubeconfig", kubeconfig_path,
-            "get", "secret", secret_name, "-n", "argocd", "-o", "json"
-        ]
+    def _helm_secret_response(self, cluster_name: str, secret_name: str, repository_url: str, existing_secret: Dict[str, Any],
+                              result: Dict[str, Any]) -> Dict[str, Any]:
+        """Build add_helm_repo_secret response"""
+        if result["status"] == "unchanged":
+            message = "Helm repository secret unchanged"
+        elif existing_secret['exists']:
+            message = "Helm repository secret updated successfully"
+        else:
+            message = "Helm repository secret created successfully"
 
-        kube_system_exists = False
-        argocd_exists = False
-        kube_system_description = ""
-        argocd_description = ""
+        return {
+            "success": True,
+            "cluster": cluster_name,
+            "secret_name": secret_name,
+            "repository_url": repository_url,
+            "helm_secret_applied": result,
+            **self._count_apply_statuses([result]),
+            "message": message
+        }
 
+    def sync_secrets(self, cluster_name: str, docker_secrets: List[Dict[str, Any]], helm_secrets: List[Dict[str, Any]],
+                     prune: bool = False, dry_run: bool = False, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Converge the managed secrets of a cluster to a complete desired set.
+
+        docker_secrets items have name, username, password and namespaces (list); helm_secrets
+        items have name, repository_url, use_oci, username and password. Only the difference
+        with the live secrets is written: missing secrets are created, secrets whose content
+        hash differs are updated and, with prune, managed secrets not in the desired set are
+        deleted. Managed secrets are the mcops.tech/secret-type=docker-creds ones in any
+        namespace and the helm type argocd.argoproj.io/secret-type=repository ones in argocd.
+        Secrets of a namespace selector registration (its copies and its -iu source) are never
+        pruned: they are reported as retained.
+        """
         try:
-            result = subprocess.run(kube_system_cmd, capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                kube_system_exists = True
-                secret_data = json.loads(result.stdout)
-                kube_system_description = {
-                    "name": secret_data.get("metadata", {}).get("name", ""),
-                    "namespace": secret_data.get("metadata", {}).get("namespace", ""),
-                    "type": secret_data.get("type", ""),
-                    "labels": secret_data.get("metadata", {}).get("labels", {})
-                }
-        except Exception:
-            pass
+            self._validate_cluster(cluster_name)
+            desired = self._desired_manifests(docker_secrets, helm_secrets)
 
-        try:
-            result = subprocess.run(argocd_cmd, capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                argocd_exists = True
-                secret_data = json.loads(result.stdout)
-                argocd_description = {
-                    "name": secret_data.get("metadata", {}).get("name", ""),
-                    "namespace": secret_data.get("metadata", {}).get("namespace", ""),
-                    "type": secret_data.get("type", ""),
-                    "labels": secret_data.get("metadata", {}).get("labels", {})
-                }
-        except Exception:
-            pass
+            # Both listings must be complete: pruning from a partial view would delete live secrets
+            live = self._list_managed_secrets(cluster_name, deadline)
 
-        return {
-            "kube_system_exists": kube_system_exists,
-            "argocd_exists": argocd_exists,
-            "kube_system_description": kube_system_description,
-            "argocd_description": argocd_description
-        }
+            to_create = [key for key in desired if key not in live]
+            to_update = [key for key in desired if key in live and live[key] != desired[key][0]]
+            unchanged = [key for key in desired if key in live and live[key] == desired[key][0]]
+            # Copies made for a namespace selector registration are owned by the registration
+            registered = self._registered_secret_keys(cluster_name, [key for key in live if key not in desired])
+            to_delete = [key for key in live if key not in desired and key not in registered] if prune else []
+            retained = [key for key in live if key in registered] if prune else []
 
-    def _delete_existing_secrets(self, cluster_name: str, secret_name: str):
-        """Delete existing secrets from both namespaces"""
-        kubeconfig_path = os.path.join(self.clusters_folder, f"{cluster_name}.kubeconfig")
+            result = {
+                "success": True,
+                "cluster": cluster_name,
+                "dry_run": dry_run,
+                "created": self._sync_keys(to_create),
+                "updated": self._sync_keys(to_update),
+                "unchanged": self._sync_keys(unchanged),
+                "deleted": self._sync_keys(to_delete),
+                "retained": self._sync_keys(retained),
+                "failed": [],
+                "unknown": []
+            }
+
+            if not dry_run:
+                to_apply = to_create + to_update
+                if to_apply:
+                    manifests = [(namespace, desired[(namespace, name)][1]) for namespace, name in to_apply]
+                    apply_results = self._apply_manifests_to_cluster(cluster_name, manifests, deadline)
+                    self._index_applied(cluster_name, manifests, apply_results)
+                    self._sync_failures(result, to_apply, apply_results, ("created", "updated"))
+                if to_delete:
+                    delete_results = self._delete_secrets(cluster_name, to_delete, deadline)
+                    self._sync_failures(result, to_delete, delete_results, ("deleted",))
+
+            result["counts"] = {key: len(result[key]) for key in ("created", "updated", "unchanged", "deleted", "retained", "failed", "unknown")}
+            result["success"] = not result["failed"] and not result["unknown"]
+            changes = result["counts"]["created"] + result["counts"]["updated"] + result["counts"]["deleted"]
+            if dry_run:
+                result["message"] = f"Dry run: {changes} change(s) needed"
+            elif result["failed"] or result["unknown"]:
+                result["message"] = (f"Sync applied {changes} change(s), {len(result['failed'])} failed, "
+                                     f"{len(result['unknown'])} with unknown outcome")
+            elif changes:
+                result["message"] = f"Sync applied {changes} change(s)"
+            else:
+                result["message"] = "Cluster already in sync"
+            return result
 
-        # Delete from kube-system namespace
-        kube_system_cmd = [
-            "kubectl", "--kubeconfig", kubeconfig_path,
-            "delete", "secret", secret_name, "-n", "kube-system"
+        except Exception as e:
+            logger.error(f"Error syncing secrets of cluster '{cluster_name}': {str(e)}")
+            raise
+
+    def _registered_secret_keys(self, cluster_name: str, keys: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Keys of secrets managed by a namespace selector registration of the cluster: copies of
+        a registered secret in any namespace, and its -iu source secret in argocd"""
+        names = {registration["secret_name"] for registration in self.registrations.list(cluster_name)}
+        return [
+            (namespace, name) for namespace, name in keys
+            if name in names or (namespace == "argocd" and name.endswith("-iu") and name[:-len("-iu")] in names)
         ]
 
-        # Delete from argocd namespace
-        argocd_cmd = [
-            "kubectl", "--kubeconfig", kubeconfig_path,
-            "delete", "secret", secret_name, "-n", "argocd"
+    def _desired_manifests(self, docker_secrets: List[Dict[str, Any]], helm_secrets: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Tuple[str, str]]:
+        """Render the desired set. Returns {(namespace, name): (content_hash, stamped_yaml)}.
+        Raises ValueError for invalid or conflicting entries"""
+        rendered: List[Tuple[str, str]] = []
+        for secret in docker_secrets:
+            for field in ("name", "username", "password", "namespaces"):
+                if field not in secret:
+                    raise ValueError(f"Docker secret is missing required field: {field}")
+            namespaces = secret["namespaces"]
+            if isinstance(namespaces, str):
+                namespaces = [ns.strip() for ns in namespaces.split(",") if ns.strip()]
+            if not namespaces:
+                raise ValueError(f"Docker secret '{secret['name']}' needs at least one namespace")
+            if "argocd" in namespaces:
+                raise ValueError("Namespace 'argocd' is not allowed as it is used for CD. Please use a different namespace.")
+            rendered.extend(self._docker_secret_manifests(secret["name"], secret["password"], secret["username"], namespaces))
+
+        for secret in helm_secrets:
+            for field in ("name", "repository_url", "use_oci", "username", "password"):
+                if field not in secret:
+                    raise ValueError(f"Helm secret is missing required field: {field}")
+            self._validate_repository_url(secret["repository_url"])
+            rendered.append(("argocd", self._generate_helm_secret_yaml(
+                secret["name"], secret["repository_url"], secret["use_oci"], secret["password"], secret["username"]
+            )))
+
+        desired: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        for namespace, yaml_content in rendered:
+            name, content_hash, stamped_yaml = self._stamp_content_hash(yaml_content)
+            if (namespace, name) in desired:
+                raise ValueError(f"Secret '{name}' in namespace '{namespace}' is defined more than once")
+            desired[(namespace, name)] = (content_hash, stamped_yaml)
+        return desired
+
+    def _list_managed_secrets(self, cluster_name: str, deadline: Optional[Deadline] = None) -> Dict[Tuple[str, str], str]:
+        """Live managed secrets. Returns {(namespace, name): content_hash} (see _live_content_hash).
+        Raises if any listing fails"""
+        listings = [
+            ("mcops.tech/secret-type=docker-creds", None),
+            ("argocd.argoproj.io/secret-type=repository", "argocd")
         ]
+        pages = self._run_for_namespaces(
+            cluster_name,
+            listings,
+            lambda listing: self._list_secret_items(cluster_name, listing[0], listing[1], deadline),
+            deadline
+        )
+
+        live: Dict[Tuple[str, str], str] = {}
+        for (label_selector, _), items in zip(listings, pages):
+            for item in items:
+                # Only helm repositories are managed here, git repository secrets share the label
+                if label_selector.startswith("argocd.") and self._base64_decode(item.get("data", {}).get("type", "")) != "helm":
+                    continue
+                metadata = item.get("metadata", {})
+                live[(metadata.get("namespace", ""), metadata.get("name", ""))] = self._live_content_hash(item)
+        return live
+
+    def _list_secret_items(self, cluster_name: str, label_selector: str, namespace: Optional[str],
+                           deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        """All raw secrets matching label_selector, paged. Raises if kubectl fails"""
+        items: List[Dict[str, Any]] = []
+        continue_token = ""
+        while True:
+            result = self._run_kubectl(cluster_name, self._list_page_args(label_selector, namespace, continue_token),
+                                       timeout=self.timeout, deadline=deadline)
+            page, continue_token = self._list_page_items(cluster_name, result)
+            items.extend(page)
+            if not continue_token:
+                return items
+
+    def _delete_secrets(self, cluster_name: str, keys: List[Tuple[str, str]], deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        """Delete (namespace, name) secrets with one kubectl call per namespace. Returns per-secret results in keys order"""
+        by_namespace: Dict[str, List[str]] = {}
+        for namespace, name in keys:
+            by_namespace.setdefault(namespace, []).append(name)
+
+        def delete_namespace(namespace: str) -> subprocess.CompletedProcess:
+            return self._run_kubectl(cluster_name, ["delete", "secret", *by_namespace[namespace], "-n", namespace, "--ignore-not-found"],
+                                     timeout=30, deadline=deadline)
+
+        namespaces = list(by_namespace)
+        outcomes = dict(zip(namespaces, self._run_for_namespaces(cluster_name, namespaces, delete_namespace, deadline)))
+
+        results = []
+        for namespace, name in keys:
+            outcome = outcomes[namespace]
+            if outcome.returncode == 0:
+                results.append({"success": True, "namespace": namespace, "output": f'secret "{name}" deleted'})
+            else:
+                results.append({"success": False, "namespace": namespace, "error": outcome.stderr.strip()})
 
+        deleted = [key for key, result in zip(keys, results) if result["success"]]
         try:
-            subprocess.run(kube_system_cmd, capture_output=True, text=True, timeout=10)
-        except Exception:
-            pass
+            self.inventory.remove_secrets(cluster_name, deleted)
+        except Exception as e:
+            logger.warning(f"Failed to drop deleted secrets of cluster '{cluster_name}' from inventory: {e}")
+        return results
 
+    def _sync_keys(self, keys: List[Tuple[str, str]]) -> List[Dict[str, str]]:
+        return [{"namespace": namespace, "name": name} for namespace, name in keys]
+
+    def _sync_failures(self, result: Dict[str, Any], keys: List[Tuple[str, str]], outcomes: List[Dict[str, Any]], sections: Tuple[str, ...]):
+        """Move failed secrets from their planned section to failed, and those kubectl reported
+        nothing about to unknown"""
+        for (namespace, name), outcome in zip(keys, outcomes):
+            if outcome["success"]:
+                continue
+            entry = {"namespace": namespace, "name": name}
+            for section in sections:
+                if entry in result[section]:
+                    result[section].remove(entry)
+            result["unknown" if outcome.get("unknown") else "failed"].append({**entry, "error": outcome.get("error", "")})
+
+    def _run_for_namespaces(self, cluster_name: str, items: List[Any], func, deadline: Optional[Deadline] = None) -> List[Any]:
+        """Run func(item) for all per-namespace items concurrently on the shared scheduler, which
+        bounds them per cluster (each item runs in a slot of the cluster). Results keep items order"""
+        if len(items) <= 1:
+            return [func(item) for item in items]
+
+        futures = [self.scheduler.submit(cluster_name, func, item) for item in items]
         try:
-            subprocess.run(argocd_cmd, capture_output=True, text=True, timeout=10)
-        except Exception:
-            pass
-
-    def _check_existing_secrets_in_namespaces(self, cluster_name: str, secret_name: str, namespaces: List[str]) -> Dict[str, Any]:
-        """Check if secrets already exist in the specified namespaces"""
-        kubeconfig_path = os.path.join(self.clusters_folder, f"{cluster_name}.kubeconfig")
-        results = {}
-
-        for namespace in namespaces:
-            cmd = [
-                "kubectl", "--kubeconfig", kubeconfig_path,
-                "get", "secret", secret_name, "-n", namespace, "-o", "json"
-            ]
+            return [future.result(timeout=deadline.remaining() if deadline is not None else None) for future in futures]
+        except concurrent.futures.TimeoutError:
+            raise DeadlineExceededError(f"Request deadline of {deadline.seconds} seconds exceeded")
+        finally:
+            self._cancel_futures(futures)
 
-            exists = False
-            description = {}
+    def _cancel_futures(self, futures: List[concurrent.futures.Future]):
+        """Cancel operations still waiting on the shared scheduler (running ones stop at their deadline)"""
+        for future in futures:
+            future.cancel()
 
-            try:
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-                if result.returncode == 0:
-                    exists = True
-                    secret_data = json.loads(result.stdout)
-                    description = {
-                        "name": secret_data.get("metadata", {}).get("name", ""),
-                        "namespace": secret_data.get("metadata", {}).get("namespace", ""),
-                        "type": secret_data.get("type", ""),
-                        "labels": secret_data.get("metadata", {}).get("labels", {})
-                    }
-            except Exception:
-                pass
+    def _check_existing_secret_in_namespace(self, cluster_name: str, secret_name: str, namespace: str,
+                                            deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Check if secret already exists in a single namespace"""
+        args = ["get", "secret", secret_name, "-n", namespace, "-o", "json"]
 
-            results[namespace] = {
-                "exists": exists,
-                "description": description
-            }
+        try:
+            result = self._run_kubectl(cluster_name, args, timeout=10, deadline=deadline)
+        except (ClusterUnavailableError, DeadlineExceededError):
+            raise
+        except Exception:
+            result = None
 
-        return results
+        return self._parse_existing_secret(result)
 
-    def _delete_existing_secrets_in_namespaces(self, cluster_name: str, secret_name: str, namespaces: List[str]):
-        """Delete existing secrets from the specified namespaces"""
-        kubeconfig_path = os.path.join(self.clusters_folder, f"{cluster_name}.kubeconfig")
+    def _parse_existing_secret(self, result: Optional[subprocess.CompletedProcess]) -> Dict[str, Any]:
+        """Build existence check result from kubectl get secret output"""
+        exists = False
+        description = {}
+        content_hash = ""
 
-        for namespace in namespaces:
-            cmd = [
-                "kubectl", "--kubeconfig", kubeconfig_path,
-                "delete", "secret", secret_name, "-n", namespace
-            ]
+        try:
+            if result is not None and result.returncode == 0:
+                exists = True
+                secret_data = json.loads(result.stdout)
+                description = {
+                    "name": secret_data.get("metadata", {}).get("name", ""),
+                    "namespace": secret_data.get("metadata", {}).get("namespace", ""),
+                    "type": secret_data.get("type", ""),
+                    "labels": secret_data.get("metadata", {}).get("labels", {})
+                }
+                content_hash = self._live_content_hash(secret_data)
+        except Exception:
+            pass
 
-            try:
-                subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            except Exception:
-                pass
+        return {
+            "exists": exists,
+            "description": description,
+            "content_hash": content_hash
+        }
 
     def _generate_docker_secret_yaml(self, secret_name: str, password: str, username: str, namespace: str) -> str:
         """Generate Docker registry secret YAML"""
@@ -499,68 +1302,224 @@ data:
 
     def _base64_encode(self, data: str) -> str:
         """Base64 encode string"""
-        import base64
         return base64.b64encode(data.encode('utf-8')).decode('utf-8')
 
     def _base64_decode(self, data: str) -> str:
         """Base64 decode string"""
-        import base64
         return base64.b64decode(data.encode('utf-8')).decode('utf-8')
 
-    def _apply_yaml_to_cluster(self, cluster_name: str, yaml_content: str, namespace: str) -> Dict[str, Any]:
-        """Apply YAML content to cluster"""
-        kubeconfig_path = os.path.join(self.clusters_folder, f"{cluster_name}.kubeconfig")
-
-        # Write YAML to temporary file
-        import tempfile
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as temp_file:
-            temp_file.write(yaml_content)
-            temp_file_path = temp_file.name
-
-        try:
-            # Apply YAML using kubectl
-            cmd = [
-                "kubectl", "--kubeconfig", kubeconfig_path,
-                "apply", "-f", temp_file_path
-            ]
+    def _content_digest(self, secret: Dict[str, Any]) -> str:
+        """HMAC-SHA256, keyed with the content hash key, of what a secret holds: its type,
+        managed labels and data. stringData counts as the data the API server stores for it,
+        so a manifest and the live secret written from it have the same digest"""
+        metadata = secret.get("metadata") or {}
+        labels = metadata.get("labels") or {}
+        data = dict(secret.get("data") or {})
+        data.update({key: self._base64_encode(str(value)) for key, value in (secret.get("stringData") or {}).items()})
+        content = {
+            "type": secret.get("type") or "Opaque",
+            "labels": {key: labels[key] for key in MANAGED_LABELS if key in labels},
+            "data": data
+        }
+        return hmac.new(self.content_hash_key, json.dumps(content, sort_keys=True).encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def _live_content_hash(self, secret: Dict[str, Any]) -> str:
+        """Content hash of a live secret: the digest of its current content when its annotation
+        matches it, "" otherwise. A secret edited since it was written, or stamped with another
+        key, therefore never counts as unchanged and is written again"""
+        digest = self._content_digest(secret)
+        annotation = ((secret.get("metadata") or {}).get("annotations") or {}).get(CONTENT_HASH_ANNOTATION, "")
+        return digest if annotation == digest else ""
+
+    def _stamp_content_hash(self, yaml_content: str) -> Tuple[str, str, str]:
+        """Annotate manifest with the hash of its content. Returns (name, content_hash, stamped_yaml)"""
+        manifest = yaml_codec.safe_load(yaml_content)
+        content_hash = self._content_digest(manifest)
+        metadata = manifest["metadata"]
+        metadata.setdefault("annotations", {})[CONTENT_HASH_ANNOTATION] = content_hash
+        return metadata["name"], content_hash, yaml_codec.safe_dump(manifest, sort_keys=False)
+
+    def _apply_changed_manifests(self, cluster_name: str, manifests: List[Tuple[str, str]], existing: List[Dict[str, Any]],
+                                 deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        """Apply only manifests whose content hash differs from the existing secret's annotation.
+
+        existing holds the existence check result for each manifest, in the same order.
+        Every per-object result gets a "status" of created, updated, unchanged or failed.
+        """
+        results, to_apply, to_apply_indexes = self._plan_changed_manifests(manifests, existing)
+
+        if to_apply:
+            apply_results = self._apply_manifests_to_cluster(cluster_name, to_apply, deadline)
+            self._merge_apply_results(results, to_apply_indexes, apply_results, existing)
+            self._index_applied(cluster_name, to_apply, apply_results)
 
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        return results
 
-            if result.returncode == 0:
-                return {
+    def _plan_changed_manifests(self, manifests: List[Tuple[str, str]], existing: List[Dict[str, Any]]
+                                ) -> Tuple[List[Optional[Dict[str, Any]]], List[Tuple[str, str]], List[int]]:
+        """Stamp content hashes and split manifests into unchanged results and the ones to apply.
+        Returns (results with None for the ones to apply, stamped manifests to apply, their indexes)"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(manifests)
+        to_apply = []
+        to_apply_indexes = []
+
+        for index, ((namespace, yaml_content), current) in enumerate(zip(manifests, existing)):
+            name, content_hash, stamped_yaml = self._stamp_content_hash(yaml_content)
+            if current["exists"] and current.get("content_hash") == content_hash:
+                results[index] = {
                     "success": True,
                     "namespace": namespace,
-                    "output": result.stdout.strip()
+                    "output": f"secret/{name} unchanged",
+                    "status": "unchanged"
                 }
             else:
-                return {
+                to_apply.append((namespace, stamped_yaml))
+                to_apply_indexes.append(index)
+
+        return results, to_apply, to_apply_indexes
+
+    def _merge_apply_results(self, results: List[Optional[Dict[str, Any]]], to_apply_indexes: List[int],
+                             apply_results: List[Dict[str, Any]], existing: List[Dict[str, Any]]):
+        """Put apply results, with their status, in place of the planned manifests"""
+        for index, result in zip(to_apply_indexes, apply_results):
+            if result.get("unknown"):
+                result["status"] = "unknown"
+            elif not result["success"]:
+                result["status"] = "failed"
+            else:
+                result["status"] = "updated" if existing[index]["exists"] else "created"
+            results[index] = result
+
+    def _index_applied(self, cluster_name: str, manifests: List[Tuple[str, str]], apply_results: List[Dict[str, Any]]):
+        """Record successfully applied manifests in the inventory"""
+        try:
+            applied = []
+            for (_, yaml_content), result in zip(manifests, apply_results):
+                if not result["success"]:
+                    continue
+                item = yaml_codec.safe_load(yaml_content)
+                item.setdefault("type", "Opaque")
+                # The API server stores stringData base64-encoded in data, index it the same way
+                string_data = item.pop("stringData", None) or {}
+                item["data"] = {**item.get("data", {}), **{key: self._base64_encode(str(value)) for key, value in string_data.items()}}
+                applied.append(self._secret_info(item))
+            self.inventory.record_secrets(cluster_name, applied)
+        except Exception as e:
+            logger.warning(f"Failed to index applied secrets of cluster '{cluster_name}': {e}")
+
+    def _count_apply_statuses(self, results: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Count per-object apply results by status"""
+        counts = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0, "unknown": 0}
+        for result in results:
+            counts[result["status"]] += 1
+        return counts
+
+    def _apply_manifests_to_cluster(self, cluster_name: str, manifests: List[Tuple[str, str]],
+                                    deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        """Server-side apply (namespace, yaml_content) manifests as one multi-document stream on stdin.
+        Returns per-object results in manifests order"""
+        result = self._run_kubectl(
+            cluster_name,
+            self._apply_args(),
+            timeout=30,
+            input="---\n".join(yaml_content for _, yaml_content in manifests),
+            deadline=deadline
+        )
+
+        return self._parse_apply_results(result, self._manifest_objects(manifests))
+
+    def _apply_args(self) -> List[str]:
+        """kubectl arguments applying a multi-document stream from stdin"""
+        # Server-side apply creates or updates every object in a single write. --force-conflicts
+        # takes over fields still owned by previous client-side applies or delete-then-create upserts
+        return [
+            "apply", "--server-side",
+            f"--field-manager={FIELD_MANAGER}",
+            "--force-conflicts",
+            "-f", "-"
+        ]
+
+    def _manifest_objects(self, manifests: List[Tuple[str, str]]) -> List[Tuple[str, str, str]]:
+        """(namespace, kind, name) of (namespace, yaml_content) manifests"""
+        objects = []
+        for namespace, yaml_content in manifests:
+            manifest = yaml_codec.safe_load(yaml_content) or {}
+            objects.append((namespace, manifest.get("kind", ""), (manifest.get("metadata") or {}).get("name", "")))
+        return objects
+
+    def _parse_apply_results(self, result: subprocess.CompletedProcess, objects: List[Tuple[str, str, str]]) -> List[Dict[str, Any]]:
+        """Split output of a multi-document kubectl apply into per-object results.
+
+        objects holds the (namespace, kind, name) of every applied document. kubectl prints
+        "<kind>/<name> <outcome>" on stdout for every object it wrote and reports failed
+        objects on stderr, quoting their name, so results are matched by kind and name, never
+        by position. Output lines do not carry the namespace: objects with the same kind and
+        name take the lines in document order, once the failed ones are set aside by the
+        namespace their error quotes. An object that cannot be matched to an output line or an
+        error gets "unknown": True; it may or may not have been written.
+        """
+        outputs: Dict[Tuple[str, str], Deque[str]] = {}
+        for line in result.stdout.splitlines():
+            match = APPLY_OUTPUT_LINE.match(line.strip())
+            if match:
+                outputs.setdefault((match.group(1).lower(), match.group(2)), deque()).append(line.strip())
+        error_lines = [line.strip() for line in result.stderr.splitlines() if line.strip()] if result.returncode != 0 else []
+
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for index, (_, kind, name) in enumerate(objects):
+            groups.setdefault((kind.lower(), name), []).append(index)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(objects)
+        for (kind, name), indexes in groups.items():
+            named_errors = [line for line in error_lines if f'"{name}"' in line and kind in line.lower()]
+            pending = []
+            for index in indexes:
+                namespace = objects[index][0]
+                # With several objects of this name, an error belongs to the one whose namespace it quotes
+                errors = [line for line in named_errors if len(indexes) == 1 or f'"{namespace}"' in line]
+                if errors:
+                    results[index] = {"success": False, "namespace": namespace, "error": "\n".join(errors)}
+                else:
+                    pending.append(index)
+
+            lines = outputs.get((kind, name), deque())
+            if len(lines) == len(pending):
+                for index, line in zip(pending, lines):
+                    results[index] = {"success": True, "namespace": objects[index][0], "output": line}
+                continue
+
+            for index in pending:
+                results[index] = {
                     "success": False,
-                    "namespace": namespace,
-                    "error": result.stderr.strip()
+                    "unknown": True,
+                    "namespace": objects[index][0],
+                    "error": result.stderr.strip() or f"kubectl reported no result for {kind}/{name}"
                 }
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_file_path)
-            except Exception:
-                pass
 
-    def _check_existing_helm_secret(self, cluster_name: str, secret_name: str) -> Dict[str, Any]:
-        """Check if helm repository secret already exists in argocd namespace"""
-        kubeconfig_path = os.path.join(self.clusters_folder, f"{cluster_name}.kubeconfig")
+        return results
 
+    def _check_existing_helm_secret(self, cluster_name: str, secret_name: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Check if helm repository secret already exists in argocd namespace"""
         # Check argocd namespace for helm repository secret
-        cmd = [
-            "kubectl", "--kubeconfig", kubeconfig_path,
-            "get", "secret", secret_name, "-n", "argocd", "-o", "json"
-        ]
+        args = ["get", "secret", secret_name, "-n", "argocd", "-o", "json"]
 
+        try:
+            result = self._run_kubectl(cluster_name, args, timeout=10, deadline=deadline)
+        except (ClusterUnavailableError, DeadlineExceededError):
+            raise
+        except Exception:
+            result = None
+
+        return self._parse_existing_helm_secret(result)
+
+    def _parse_existing_helm_secret(self, result: Optional[subprocess.CompletedProcess]) -> Dict[str, Any]:
+        """Build helm secret existence check result from kubectl get secret output"""
         exists = False
         secret_description = ""
+        content_hash = ""
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
+            if result is not None and result.returncode == 0:
                 exists = True
                 secret_data = json.loads(result.stdout)
                 labels = secret_data.get("metadata", {}).get("labels", {})
@@ -573,6 +1532,7 @@ data:
                         "type": secret_data.get("type", ""),
                         "labels": labels
                     }
+                    content_hash = self._live_content_hash(secret_data)
                 else:
                     # Secret exists but doesn't have the correct label
                     exists = False
@@ -581,23 +1541,10 @@ data:
 
         return {
             "exists": exists,
-            "description": secret_description
+            "description": secret_description,
+            "content_hash": content_hash
         }
 
-    def _delete_existing_helm_secret(self, cluster_name: str, secret_name: str):
-        """Delete existing helm repository secret from argocd namespace"""
-        kubeconfig_path = os.path.join(self.clusters_folder, f"{cluster_name}.kubeconfig")
-
-        cmd = [
-            "kubectl", "--kubeconfig", kubeconfig_path,
-            "delete", "secret", secret_name, "-n", "argocd"
-        ]
-
-        try:
-            subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-        except Exception:
-            pass
-
     def _generate_helm_secret_yaml(self, secret_name: str, repository_url: str, use_oci: bool, password: str, username: str) -> str:
         """Generate Helm repository secret YAML"""
         # Common fields
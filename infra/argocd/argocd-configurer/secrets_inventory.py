@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Secrets Inventory for Cluster API
+Local SQLite index of the secret metadata seen on all clusters, queried without kubectl
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS secrets (
+    cluster TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    repository_url TEXT,
+    username TEXT,
+    observed_at TEXT NOT NULL,
+    info TEXT NOT NULL,
+    PRIMARY KEY (cluster, namespace, name)
+);
+CREATE TABLE IF NOT EXISTS secret_labels (
+    cluster TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (cluster, namespace, name, key)
+);
+CREATE INDEX IF NOT EXISTS secrets_namespace ON secrets (namespace);
+CREATE INDEX IF NOT EXISTS secrets_type ON secrets (type);
+CREATE INDEX IF NOT EXISTS secrets_repository_url ON secrets (repository_url);
+CREATE INDEX IF NOT EXISTS secrets_username ON secrets (username);
+CREATE INDEX IF NOT EXISTS secret_labels_key_value ON secret_labels (key, value);
+"""
+
+class SecretsInventory:
+    """Index of secret metadata (secret_info summaries, never secret values) by cluster.
+
+    Listings replace what was known for their scope, so secrets deleted from a cluster
+    disappear once the cluster is listed again. Writes done through the server are indexed
+    as they are applied. Records carry observed_at, the time they were last seen.
+    """
+
+    def __init__(self, db_path: str = ":memory:"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # One connection shared by all request threads, serialized by the lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def record_listing(self, cluster_name: str, label_selector: str, namespace: Optional[str], secrets: List[Dict[str, Any]]):
+        """Replace the indexed secrets of cluster_name matched by a complete listing (label_selector in namespace)"""
+        scope_sql, scope_params = self._scope_filter(label_selector, namespace)
+        with self._lock, self._conn:
+            stale = self._conn.execute(
+                f"SELECT namespace, name FROM secrets s WHERE cluster = ? AND {scope_sql}",
+                [cluster_name] + scope_params
+            ).fetchall()
+            for secret_namespace, name in stale:
+                self._delete(cluster_name, secret_namespace, name)
+            for secret in secrets:
+                self._upsert(cluster_name, secret)
+
+    def record_secrets(self, cluster_name: str, secrets: List[Dict[str, Any]]):
+        """Index individual secrets of cluster_name, e.g. right after they were applied"""
+        with self._lock, self._conn:
+            for secret in secrets:
+                self._upsert(cluster_name, secret)
+
+    def remove_secrets(self, cluster_name: str, keys: List[Tuple[str, str]]):
+        """Drop (namespace, name) secrets of cluster_name, e.g. right after they were deleted"""
+        with self._lock, self._conn:
+            for namespace, name in keys:
+                self._delete(cluster_name, namespace, name)
+
+    def query(self, label: Optional[str] = None, namespace: Optional[str] = None, repository_url: Optional[str] = None,
+              username: Optional[str] = None, type: Optional[str] = None, cluster: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Find indexed secrets. label is "key=value" or just "key"; all given filters must match"""
+        conditions = []
+        params: List[Any] = []
+        for column, value in (("cluster", cluster), ("namespace", namespace), ("repository_url", repository_url),
+                              ("username", username), ("type", type)):
+            if value is not None:
+                conditions.append(f"s.{column} = ?")
+                params.append(value)
+        if label is not None:
+            label_sql, label_params = self._label_filter(label)
+            conditions.append(label_sql)
+            params.extend(label_params)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT cluster, observed_at, info FROM secrets s {where} ORDER BY cluster, namespace, name",
+                params
+            ).fetchall()
+
+        return [
+            {"cluster": cluster_name, **json.loads(info), "observed_at": observed_at}
+            for cluster_name, observed_at, info in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of indexed secrets and clusters"""
+        with self._lock:
+            secrets, clusters = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT cluster) FROM secrets").fetchone()
+        return {"secrets": secrets, "clusters": clusters, "db_path": self.db_path}
+
+    def _upsert(self, cluster_name: str, secret: Dict[str, Any]):
+        """Insert or replace one secret_info record and its labels. Called with the lock held, in a transaction"""
+        namespace = secret.get("namespace", "")
+        name = secret.get("name", "")
+        self._conn.execute(
+            "INSERT OR REPLACE INTO secrets (cluster, namespace, name, type, repository_url, username, observed_at, info) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                cluster_name, namespace, name,
+                secret.get("type", ""),
+                secret.get("repository_url"),
+                secret.get("username"),
+                datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                json.dumps(secret)
+            )
+        )
+        self._conn.execute("DELETE FROM secret_labels WHERE cluster = ? AND namespace = ? AND name = ?", (cluster_name, namespace, name))
+        self._conn.executemany(
+            "INSERT INTO secret_labels (cluster, namespace, name, key, value) VALUES (?, ?, ?, ?, ?)",
+            [(cluster_name, namespace, name, key, str(value)) for key, value in (secret.get("labels") or {}).items()]
+        )
+
+    def _delete(self, cluster_name: str, namespace: str, name: str):
+        """Drop one secret and its labels. Called with the lock held, in a transaction"""
+        self._conn.execute("DELETE FROM secrets WHERE cluster = ? AND namespace = ? AND name = ?", (cluster_name, namespace, name))
+        self._conn.execute("DELETE FROM secret_labels WHERE cluster = ? AND namespace = ? AND name = ?", (cluster_name, namespace, name))
+
+    def _scope_filter(self, label_selector: str, namespace: Optional[str]) -> Tuple[str, List[Any]]:
+        """SQL condition on secrets s matching an equality label selector ("k=v,k2=v2") in namespace"""
+        conditions = []
+        params: List[Any] = []
+        if namespace:
+            conditions.append("s.namespace = ?")
+            params.append(namespace)
+        for requirement in filter(None, (part.strip() for part in label_selector.split(","))):
+            label_sql, label_params = self._label_filter(requirement)
+            conditions.append(label_sql)
+            params.extend(label_params)
+        return " AND ".join(conditions) or "1", params
+
+    def _label_filter(self, label: str) -> Tuple[str, List[Any]]:
+        """SQL condition on secrets s having label "key=value" (or "key" with any value)"""
+        key, separator, value = label.partition("=")
+        if separator:
+            return (
+                "EXISTS (SELECT 1 FROM secret_labels l WHERE l.cluster = s.cluster AND l.namespace = s.namespace "
+                "AND l.name = s.name AND l.key = ? AND l.value = ?)",
+                [key.strip(), value.strip()]
+            )
+        return (
+            "EXISTS (SELECT 1 FROM secret_labels l WHERE l.cluster = s.cluster AND l.namespace = s.namespace "
+            "AND l.name = s.name AND l.key = ?)",
+            [key.strip()]
+        )
+
+# Inventories shared by all SecretsHandler instances (the server builds one per request), by path
+_shared_inventories: Dict[str, SecretsInventory] = {}
+_shared_inventories_lock = threading.Lock()
+
+def get_shared_inventory(db_path: str = ":memory:") -> SecretsInventory:
+    """Get the process-wide inventory stored at db_path"""
+    with _shared_inventories_lock:
+        inventory = _shared_inventories.get(db_path)
+        if inventory is None:
+            logger.info(f"Opening secrets inventory at {db_path}")
+            inventory = SecretsInventory(db_path)
+            _shared_inventories[db_path] = inventory
+        return inventory
@@ -7,13 +7,19 @@ A simple HTTP webserver that provides health checks and cluster information
 import json
 import logging
 import os
-import glob
-import yaml
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import sys
-from typing import Dict, Any, Optional
-from secrets_handler import SecretsHandler
+from typing import Dict, Any, Iterator, List, Optional
+import yaml_codec
+from secrets_handler import (
+    SecretsHandler, ClusterUnavailableError, Deadline, DeadlineExceededError, SECRET_CATEGORIES, SECRET_FIELDS,
+    decode_secrets_cursor
+)
+from fleet_rollout import FleetRollout
+from command_runner import get_shared_runner
+from cluster_registry import get_shared_cluster_registry
+from namespace_watcher import NamespaceWatcher
 
 # Configure logging
 logging.basicConfig(
@@ -22,35 +28,55 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def load_config() -> Dict[str, Any]:
+    """Load configuration from defaults.yaml"""
+    try:
+        config_path = os.path.join("configs", "defaults.yaml")
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return yaml_codec.safe_load(f)
+    except Exception as e:
+        logger.error(f"Error loading config: {e}")
+        return {"clusters-folder": "clusters"}
+
+def create_secrets_handler(config: Dict[str, Any]) -> SecretsHandler:
+    """Build a SecretsHandler from server configuration"""
+    timeout = config.get("kubectl_timeout", 30)  # Default 30 seconds
+    clusters_folder = config.get("clusters-folder", "clusters")
+    return SecretsHandler(
+        clusters_folder,
+        timeout=timeout,
+        max_parallel_per_cluster=config.get("kubectl_max_parallel", 8),
+        list_page_size=config.get("kubectl_list_page_size", 100),
+        circuit_failure_threshold=config.get("circuit_failure_threshold", 3),
+        circuit_reset_timeout=config.get("circuit_reset_seconds", 30),
+        max_concurrency=config.get("max_concurrent_cluster_operations", 32),
+        inventory_path=config.get("inventory_db_path", ":memory:"),
+        runner=get_shared_runner(config.get("command_runner")),
+        registrations_path=config.get("namespace_registrations_path", "namespace_registrations.yaml"),
+        hedge_reads=config.get("hedge_reads", False),
+        hedge_percentile=config.get("hedge_percentile", 95),
+        hedge_budget_ratio=config.get("hedge_budget_ratio", 0.1),
+        hedge_min_delay=config.get("hedge_min_delay_seconds", 0.05),
+        hedge_min_samples=config.get("hedge_min_samples", 20),
+        cluster_registry=get_shared_cluster_registry(clusters_folder, config.get("cluster_scan_seconds", 2)),
+        content_hash_key_path=config.get("content_hash_key_path", "content_hash.key")
+    )
+
 class ClusterAPIHandler(BaseHTTPRequestHandler):
     """HTTP request handler for the Cluster API Configuration server"""
 
     def __init__(self, *args, **kwargs):
-        self.config = self._load_config()
-        timeout = self.config.get("kubectl_timeout", 30)  # Default 30 seconds
-        self.secrets_handler = SecretsHandler(
-            self.config.get("clusters-folder", "clusters"),
-            timeout=timeout
-        )
+        self.config = load_config()
+        self.secrets_handler = create_secrets_handler(self.config)
         super().__init__(*args, **kwargs)
 
-    def _load_config(self) -> Dict[str, Any]:
-        """Load configuration from defaults.yaml"""
-        try:
-            config_path = os.path.join("configs", "defaults.yaml")
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
-        except Exception as e:
-            logger.error(f"Error loading config: {e}")
-            return {"clusters-folder": "clusters"}
-
     def _set_response(self, status_code: int = 200, content_type: str = "application/json"):
         """Set the response headers"""
         self.send_response(status_code)
         self.send_header('Content-type', content_type)
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, X-Request-Timeout')
         self.end_headers()
 
     def _send_json_response(self, data: Dict[str, Any], status_code: int = 200):
@@ -68,6 +94,27 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
         }
         self._send_json_response(error_data, status_code)
 
+    def _send_stream_response(self, events: Iterator[Dict[str, Any]], status_code: int = 200):
+        """Send events as newline-delimited JSON, each written as soon as it is produced"""
+        self._set_response(status_code, "application/x-ndjson")
+        for event in events:
+            self.wfile.write((json.dumps(event) + "\n").encode('utf-8'))
+            self.wfile.flush()
+
+    def _get_request_deadline(self, default_key: str = "request_deadline_seconds", default_seconds: float = 30,
+                              max_key: str = "max_request_deadline_seconds", max_seconds: float = 120) -> Deadline:
+        """Build the per-request deadline, optionally set by the client with X-Request-Timeout (seconds)"""
+        seconds = self.config.get(default_key, default_seconds)
+        header = self.headers.get('X-Request-Timeout')
+        if header:
+            try:
+                seconds = float(header)
+            except ValueError:
+                raise ValueError(f"Invalid X-Request-Timeout header: '{header}'")
+            if seconds <= 0:
+                raise ValueError("X-Request-Timeout header must be a positive number of seconds")
+        return Deadline(min(seconds, self.config.get(max_key, max_seconds)))
+
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
         self._set_response()
@@ -84,6 +131,10 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
                 self._handle_clusters_request()
             elif parsed_path.path == '/secrets':
                 self._handle_secrets_request()
+            elif parsed_path.path == '/inventory':
+                self._handle_inventory_request()
+            elif parsed_path.path == '/namespace_registrations':
+                self._handle_namespace_registrations_request()
             else:
                 # Default server info
                 info = {
@@ -91,10 +142,16 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
                     "version": "1.0.0",
                     "endpoints": {
                         "GET /health": "Health check endpoint",
-                        "GET /clusters": "List available clusters from kubeconfig files",
-                        "GET /secrets": "Get secrets for a cluster (requires 'cluster' parameter)",
+                        "GET /clusters": "List available clusters from kubeconfig files (filters, pagination, details)",
+                        "GET /secrets": "Get secrets for a cluster (requires 'cluster' parameter; filters, fields, pagination)",
+                        "GET /inventory": "Query secrets seen on all clusters from the local index (no kubectl)",
+                        "GET /namespace_registrations": "List Docker secrets registered for namespace selectors",
                         "POST /secrets/add_docker": "Add Docker registry secret and ArgoCD image updater",
-                        "POST /secrets/add_helm_repo": "Add Helm repository secret to ArgoCD namespace"
+                        "POST /secrets/add_helm_repo": "Add Helm repository secret to ArgoCD namespace",
+                        "POST /fleet/add_docker": "Upsert Docker registry secret on many clusters (streams progress)",
+                        "POST /fleet/add_helm_repo": "Upsert Helm repository secret on many clusters (streams progress)",
+                        "POST /namespace_registrations/delete": "Stop propagating a Docker secret to new namespaces",
+                        "PUT /secrets/sync": "Converge managed Docker and Helm secrets of a cluster to a desired set"
                     }
                 }
                 self._send_json_response(info)
@@ -112,6 +169,10 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
                 self._handle_add_docker_secret_request()
             elif parsed_path.path == '/secrets/add_helm_repo':
                 self._handle_add_helm_repo_secret_request()
+            elif parsed_path.path in ('/fleet/add_docker', '/fleet/add_helm_repo'):
+                self._handle_fleet_rollout_request(parsed_path.path)
+            elif parsed_path.path == '/namespace_registrations/delete':
+                self._handle_delete_namespace_registration_request()
             else:
                 self._send_error_response(f"Unknown endpoint: {parsed_path.path}", 404)
 
@@ -119,32 +180,63 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
             logger.error(f"Error handling POST request: {str(e)}")
             self._send_error_response(f"Internal server error: {str(e)}", 500)
 
-    def _handle_clusters_request(self):
-        """Handle clusters listing request"""
+    def do_PUT(self):
+        """Handle PUT requests"""
         try:
-            clusters_folder = self.config.get("clusters-folder", "clusters")
-            clusters_path = os.path.join(os.getcwd(), clusters_folder)
+            # Parse the URL path
+            parsed_path = urlparse(self.path)
+
+            if parsed_path.path == '/secrets/sync':
+                self._handle_sync_secrets_request()
+            else:
+                self._send_error_response(f"Unknown endpoint: {parsed_path.path}", 404)
+
+        except Exception as e:
+            logger.error(f"Error handling PUT request: {str(e)}")
+            self._send_error_response(f"Internal server error: {str(e)}", 500)
 
-            if not os.path.exists(clusters_path):
-                logger.warning(f"Clusters folder does not exist: {clusters_path}")
-                self._send_json_response({"clusters": []})
+    def _handle_clusters_request(self):
+        """Handle clusters listing request, served from the cluster registry"""
+        try:
+            query_params = parse_qs(urlparse(self.path).query)
+            filters = {
+                field: query_params[field][0]
+                for field in ('search', 'auth_type', 'api_server', 'reachable')
+                if query_params.get(field, [''])[0]
+            }
+            if filters.get('reachable', 'true') not in ('true', 'false', 'unknown'):
+                self._send_error_response("'reachable' must be 'true', 'false' or 'unknown'", 400)
                 return
 
-            # Find all .kubeconfig files
-            kubeconfig_pattern = os.path.join(clusters_path, "*.kubeconfig")
-            kubeconfig_files = glob.glob(kubeconfig_pattern)
+            limit = None
+            if query_params.get('limit', [''])[0]:
+                try:
+                    limit = int(query_params['limit'][0])
+                except ValueError:
+                    limit = 0
+                if limit < 1:
+                    self._send_error_response("'limit' must be a positive integer", 400)
+                    return
+
+            clusters = self.secrets_handler.cluster_registry.list(**filters)
+            total = len(clusters)
 
-            cluster_names = []
-            for file_path in kubeconfig_files:
-                # Extract cluster name from filename (remove .kubeconfig extension)
-                filename = os.path.basename(file_path)
-                cluster_name = filename.replace('.kubeconfig', '')
-                cluster_names.append(cluster_name)
+            # The cursor is the name of the last cluster of the previous page
+            cursor = query_params.get('cursor', [''])[0]
+            if cursor:
+                clusters = [cluster for cluster in clusters if cluster["name"] > cursor]
+            next_cursor = None
+            if limit is not None and len(clusters) > limit:
+                clusters = clusters[:limit]
+                next_cursor = clusters[-1]["name"]
 
             response_data = {
-                "clusters": cluster_names,
-                "total": len(cluster_names)
+                "clusters": [cluster["name"] for cluster in clusters],
+                "total": total,
+                "next_cursor": next_cursor
             }
+            if query_params.get('details', [''])[0].lower() == 'true':
+                response_data["details"] = clusters
 
             self._send_json_response(response_data)
 
@@ -170,8 +262,17 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
                 self._send_error_response("Cluster parameter cannot be empty", 400)
                 return
 
-            # Get secrets for the cluster
-            secrets_data = self.secrets_handler.get_secrets_for_cluster(cluster_name)
+            try:
+                deadline = self._get_request_deadline()
+                selection = self._parse_secrets_selection(query_params)
+            except ValueError as e:
+                self._send_error_response(str(e), 400)
+                return
+
+            # Get secrets for the cluster, listing only the requested categories
+            secrets_data = self.secrets_handler.get_secrets_for_cluster(cluster_name, deadline, selection.pop("categories"))
+            if any(value is not None for value in selection.values()):
+                secrets_data = self.secrets_handler.select_secrets(secrets_data, **selection)
             self._send_json_response(secrets_data)
 
         except ValueError as e:
@@ -180,6 +281,67 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
             logger.error(f"Error handling secrets request: {str(e)}")
             self._send_error_response(f"Error processing request: {str(e)}", 500)
 
+    def _parse_secrets_selection(self, query_params: Dict[str, List[str]]) -> Dict[str, Any]:
+        """Parse category, namespace, name_prefix, fields, limit and cursor of a /secrets request.
+        Raises ValueError on invalid values"""
+        def split(name: str) -> Optional[List[str]]:
+            value = query_params.get(name, [''])[0]
+            return [part.strip() for part in value.split(',') if part.strip()] or None
+
+        categories = split('category')
+        unknown = [category for category in categories or [] if category not in SECRET_CATEGORIES]
+        if unknown:
+            raise ValueError(f"Unknown category '{unknown[0]}', expected one of: {', '.join(SECRET_CATEGORIES)}")
+        fields = split('fields')
+        unknown = [field for field in fields or [] if field not in SECRET_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown field '{unknown[0]}', expected one of: {', '.join(SECRET_FIELDS)}")
+
+        limit = None
+        if query_params.get('limit', [''])[0]:
+            try:
+                limit = int(query_params['limit'][0])
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                raise ValueError("'limit' must be a positive integer")
+
+        cursor = query_params.get('cursor', [''])[0] or None
+        if cursor:
+            decode_secrets_cursor(cursor)
+
+        return {
+            "categories": categories,
+            "namespace": query_params.get('namespace', [''])[0] or None,
+            "name_prefix": query_params.get('name_prefix', [''])[0] or None,
+            "fields": fields,
+            "limit": limit,
+            "cursor": cursor
+        }
+
+    def _handle_inventory_request(self):
+        """Handle secrets inventory query across clusters"""
+        try:
+            query_params = parse_qs(urlparse(self.path).query)
+            filters = {
+                field: query_params[field][0]
+                for field in ('label', 'namespace', 'repository_url', 'username', 'type', 'cluster')
+                if query_params.get(field, [''])[0]
+            }
+
+            secrets = self.secrets_handler.inventory.query(**filters)
+            response_data = {
+                "filters": filters,
+                "secrets": secrets,
+                "clusters": sorted({secret["cluster"] for secret in secrets}),
+                "total": len(secrets)
+            }
+            self._send_json_response(response_data)
+
+        except Exception as e:
+            logger.error(f"Error handling inventory request: {str(e)}")
+            self._send_error_response(f"Error querying inventory: {str(e)}", 500)
+
     def _handle_add_docker_secret_request(self):
         """Handle adding Docker registry secret request"""
         try:
@@ -199,40 +361,46 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
                 return
 
             # Validate required fields
-            required_fields = ['password', 'username', 'cluster_name', 'name', 'namespaces']
+            required_fields = ['password', 'username', 'cluster_name', 'name']
             for field in required_fields:
                 if field not in request_data:
                     self._send_error_response(f"Missing required field: {field}", 400)
                     return
+            namespace_selector = request_data.get('namespace_selector')
+            if 'namespaces' not in request_data and not namespace_selector:
+                self._send_error_response("Missing required field: namespaces (or namespace_selector)", 400)
+                return
 
             password = request_data['password']
             username = request_data['username']
             cluster_name = request_data['cluster_name']
             name = request_data['name']
-            namespaces_str = request_data['namespaces']
+            namespaces_str = request_data.get('namespaces', '')
             upsert = request_data.get('upsert', False)
 
-            # Parse and validate namespaces
+            # Parse and validate namespaces (may be empty when a selector picks them)
             try:
-                namespaces = [ns.strip() for ns in namespaces_str.split(',') if ns.strip()]
-                if not namespaces:
-                    self._send_error_response("At least one namespace must be provided", 400)
-                    return
+                namespaces = self._parse_namespaces(namespaces_str, allow_empty=bool(namespace_selector))
+            except ValueError as e:
+                self._send_error_response(str(e), 400)
+                return
 
-                # Check if argocd namespace is included (not allowed)
-                if 'argocd' in namespaces:
-                    self._send_error_response("Namespace 'argocd' is not allowed as it is used for CD. Please use a different namespace.", 400)
-                    return
-            except Exception as e:
-                self._send_error_response(f"Invalid namespaces format: {str(e)}", 400)
+            try:
+                deadline = self._get_request_deadline()
+            except ValueError as e:
+                self._send_error_response(str(e), 400)
                 return
 
             # Process the request using the secrets handler
             try:
                 response_data = self.secrets_handler.add_docker_secret(
-                    cluster_name, name, password, username, namespaces, upsert
+                    cluster_name, name, password, username, namespaces, upsert, deadline, namespace_selector
                 )
                 self._send_json_response(response_data)
+            except ClusterUnavailableError as e:
+                self._send_error_response(str(e), 503)
+            except DeadlineExceededError as e:
+                self._send_error_response(str(e), 504)
             except ValueError as e:
                 self._send_error_response(str(e), 400)
             except Exception as e:
@@ -276,12 +444,22 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
             username = request_data['username']
             upsert = request_data.get('upsert', False)
 
+            try:
+                deadline = self._get_request_deadline()
+            except ValueError as e:
+                self._send_error_response(str(e), 400)
+                return
+
             # Process the request using the secrets handler
             try:
                 response_data = self.secrets_handler.add_helm_repo_secret(
-                    cluster_name, secret_name, repository_url, use_oci, password, username, upsert
+                    cluster_name, secret_name, repository_url, use_oci, password, username, upsert, deadline
                 )
                 self._send_json_response(response_data)
+            except ClusterUnavailableError as e:
+                self._send_error_response(str(e), 503)
+            except DeadlineExceededError as e:
+                self._send_error_response(str(e), 504)
             except ValueError as e:
                 self._send_error_response(str(e), 400)
             except Exception as e:
@@ -292,12 +470,232 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
             logger.error(f"Error handling add Helm repo secret request: {str(e)}")
             self._send_error_response(f"Error processing request: {str(e)}", 500)
 
+    def _parse_namespaces(self, namespaces_str: str, allow_empty: bool = False) -> List[str]:
+        """Parse comma-separated namespaces of a Docker secret request. Raises ValueError if invalid"""
+        try:
+            namespaces = [ns.strip() for ns in namespaces_str.split(',') if ns.strip()]
+        except Exception as e:
+            raise ValueError(f"Invalid namespaces format: {str(e)}")
+
+        if not namespaces and not allow_empty:
+            raise ValueError("At least one namespace must be provided")
+
+        # Check if argocd namespace is included (not allowed)
+        if 'argocd' in namespaces:
+            raise ValueError("Namespace 'argocd' is not allowed as it is used for CD. Please use a different namespace.")
+
+        return namespaces
+
+    def _handle_fleet_rollout_request(self, path: str):
+        """Handle upserting a Docker or Helm credential on many clusters"""
+        try:
+            # Parse JSON request body
+            content_length = int(self.headers.get('Content-Length', 0))
+
+            if content_length == 0:
+                self._send_error_response("Request body is required", 400)
+                return
+
+            post_data = self.rfile.read(content_length)
+
+            try:
+                request_data = json.loads(post_data.decode('utf-8'))
+            except json.JSONDecodeError as e:
+                self._send_error_response(f"Invalid JSON: {str(e)}", 400)
+                return
+
+            # Validate required fields, same as the single-cluster endpoints without cluster_name
+            if path == '/fleet/add_docker':
+                required_fields = ['password', 'username', 'name', 'namespaces']
+            else:
+                required_fields = ['name', 'repository_url', 'use_oci', 'username', 'password']
+            for field in required_fields:
+                if field not in request_data:
+                    self._send_error_response(f"Missing required field: {field}", 400)
+                    return
+
+            # Optional cluster selection: list or comma-separated string, all clusters when omitted
+            clusters = request_data.get('clusters')
+            if isinstance(clusters, str):
+                clusters = [cluster.strip() for cluster in clusters.split(',') if cluster.strip()]
+            if clusters is not None and (not isinstance(clusters, list) or not clusters):
+                self._send_error_response("'clusters' must be a non-empty list or comma-separated string", 400)
+                return
+
+            try:
+                deadline = self._get_request_deadline(
+                    "fleet_deadline_seconds", 300, "max_fleet_deadline_seconds", 1800
+                )
+                rollout = FleetRollout(
+                    self.secrets_handler,
+                    self.config.get("fleet_max_parallel_clusters", 8),
+                    self.config.get("fleet_cluster_deadline_seconds", 60)
+                )
+                if path == '/fleet/add_docker':
+                    events = rollout.rollout_docker_secret(
+                        request_data['name'],
+                        request_data['password'],
+                        request_data['username'],
+                        self._parse_namespaces(request_data['namespaces']),
+                        clusters,
+                        deadline
+                    )
+                else:
+                    events = rollout.rollout_helm_repo_secret(
+                        request_data['name'],
+                        request_data['repository_url'],
+                        request_data['use_oci'],
+                        request_data['password'],
+                        request_data['username'],
+                        clusters,
+                        deadline
+                    )
+            except ValueError as e:
+                self._send_error_response(str(e), 400)
+                return
+
+            if request_data.get('stream', True):
+                self._send_stream_response(events)
+            else:
+                # Collect progress events and send them along with the summary in one response
+                results = list(events)
+                response_data = results.pop()
+                response_data["results"] = results
+                self._send_json_response(response_data)
+
+        except Exception as e:
+            logger.error(f"Error handling fleet rollout request: {str(e)}")
+            self._send_error_response(f"Error processing request: {str(e)}", 500)
+
+    def _handle_sync_secrets_request(self):
+        """Handle converging the managed secrets of a cluster to the desired set in the body"""
+        try:
+            # Parse JSON request body
+            content_length = int(self.headers.get('Content-Length', 0))
+
+            if content_length == 0:
+                self._send_error_response("Request body is required", 400)
+                return
+
+            post_data = self.rfile.read(content_length)
+
+            try:
+                request_data = json.loads(post_data.decode('utf-8'))
+            except json.JSONDecodeError as e:
+                self._send_error_response(f"Invalid JSON: {str(e)}", 400)
+                return
+
+            if 'cluster_name' not in request_data:
+                self._send_error_response("Missing required field: cluster_name", 400)
+                return
+
+            # The desired set is complete: an omitted list would read as "no secrets of this kind"
+            # and prune all of them, so both lists must be given, empty if there are none
+            for field in ('docker_secrets', 'helm_secrets'):
+                if field not in request_data:
+                    self._send_error_response(f"Missing required field: {field}", 400)
+                    return
+
+            docker_secrets = request_data['docker_secrets']
+            helm_secrets = request_data['helm_secrets']
+            if not isinstance(docker_secrets, list) or not isinstance(helm_secrets, list):
+                self._send_error_response("'docker_secrets' and 'helm_secrets' must be lists", 400)
+                return
+
+            try:
+                deadline = self._get_request_deadline()
+            except ValueError as e:
+                self._send_error_response(str(e), 400)
+                return
+
+            try:
+                response_data = self.secrets_handler.sync_secrets(
+                    request_data['cluster_name'],
+                    docker_secrets,
+                    helm_secrets,
+                    prune=request_data.get('prune', False),
+                    dry_run=request_data.get('dry_run', False),
+                    deadline=deadline
+                )
+                self._send_json_response(response_data)
+            except ClusterUnavailableError as e:
+                self._send_error_response(str(e), 503)
+            except DeadlineExceededError as e:
+                self._send_error_response(str(e), 504)
+            except ValueError as e:
+                self._send_error_response(str(e), 400)
+            except Exception as e:
+                logger.error(f"Error syncing secrets: {str(e)}")
+                self._send_error_response(f"Error syncing secrets: {str(e)}", 500)
+
+        except Exception as e:
+            logger.error(f"Error handling sync secrets request: {str(e)}")
+            self._send_error_response(f"Error processing request: {str(e)}", 500)
+
+    def _handle_namespace_registrations_request(self):
+        """Handle listing namespace selector registrations"""
+        try:
+            query_params = parse_qs(urlparse(self.path).query)
+            cluster_name = query_params.get('cluster', [None])[0] or None
+
+            registrations = self.secrets_handler.registrations.list(cluster_name)
+            self._send_json_response({
+                "registrations": registrations,
+                "total": len(registrations)
+            })
+
+        except Exception as e:
+            logger.error(f"Error handling namespace registrations request: {str(e)}")
+            self._send_error_response(f"Error listing namespace registrations: {str(e)}", 500)
+
+    def _handle_delete_namespace_registration_request(self):
+        """Handle removing a namespace selector registration (secrets already copied stay in place)"""
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+
+            if content_length == 0:
+                self._send_error_response("Request body is required", 400)
+                return
+
+            try:
+                request_data = json.loads(self.rfile.read(content_length).decode('utf-8'))
+            except json.JSONDecodeError as e:
+                self._send_error_response(f"Invalid JSON: {str(e)}", 400)
+                return
+
+            for field in ['cluster_name', 'name']:
+                if field not in request_data:
+                    self._send_error_response(f"Missing required field: {field}", 400)
+                    return
+
+            if not self.secrets_handler.registrations.remove(request_data['cluster_name'], request_data['name']):
+                self._send_error_response(
+                    f"No namespace registration for secret '{request_data['name']}' in cluster '{request_data['cluster_name']}'", 404
+                )
+                return
+
+            self._send_json_response({
+                "success": True,
+                "message": f"Secret '{request_data['name']}' is no longer propagated to new namespaces"
+            })
+
+        except Exception as e:
+            logger.error(f"Error handling delete namespace registration request: {str(e)}")
+            self._send_error_response(f"Error processing request: {str(e)}", 500)
+
     def _handle_health_check(self):
         """Handle health check requests"""
         health_data = {
             "status": "healthy",
             "service": "Cluster API Configuration Server",
-            "timestamp": self.date_time_string()
+            "timestamp": self.date_time_string(),
+            "scheduler": self.secrets_handler.scheduler.stats(),
+            "inventory": self.secrets_handler.inventory.stats(),
+            "hedging": {
+                "enabled": self.secrets_handler.hedge_reads,
+                "budget": self.secrets_handler.hedge_budget.stats(),
+                "read_latency_seconds": self.secrets_handler.latency_tracker.stats()
+            }
         }
         self._send_json_response(health_data)
 
@@ -308,20 +706,37 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
 def run_server(host: str = 'localhost', port: int = 8091):
     """Run the HTTP server"""
     server_address = (host, port)
-    httpd = HTTPServer(server_address, ClusterAPIHandler)
+    # Requests are served concurrently; kubectl operations are bounded by the shared cluster scheduler
+    httpd = ThreadingHTTPServer(server_address, ClusterAPIHandler)
+
+    # Copy secrets registered for namespace selectors into new namespaces
+    config = load_config()
+    watcher = None
+    if config.get("namespace_watch_enabled", True):
+        watcher = NamespaceWatcher(
+            lambda: create_secrets_handler(load_config()),
+            watch_seconds=config.get("namespace_watch_seconds", 60)
+        )
+        watcher.start()
 
     logger.info(f"Starting Cluster API Configuration Server on {host}:{port}")
     logger.info(f"Server will accept GET requests to /health for health checks")
     logger.info(f"Server will accept GET requests to /clusters to list available clusters")
     logger.info(f"Server will accept GET requests to /secrets?cluster=<name> to get secrets")
+    logger.info(f"Server will accept GET requests to /inventory to query secrets seen on all clusters")
+    logger.info(f"Server will accept GET requests to /namespace_registrations to list namespace selector registrations")
     logger.info(f"Server will accept POST requests to /secrets/add_docker to add Docker secrets")
     logger.info(f"Server will accept POST requests to /secrets/add_helm_repo to add Helm repository secrets")
+    logger.info(f"Server will accept PUT requests to /secrets/sync to converge managed secrets to a desired set")
+    logger.info(f"Server will accept POST requests to /fleet/add_docker and /fleet/add_helm_repo to roll out credentials to many clusters")
     logger.info("Press Ctrl+C to stop the server")
 
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
         logger.info("Shutting down server...")
+        if watcher is not None:
+            watcher.stop()
         httpd.server_close()
         logger.info("Server stopped")
 
@@ -0,0 +1,147 @@
+"""
+Shared fixtures for the Cluster API Configuration Server tests
+"""
+
+import base64
+import json
+import os
+import subprocess
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# The server modules are flat files next to this folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yaml_codec  # noqa: E402
+
+from cluster_registry import ClusterRegistry  # noqa: E402
+from cluster_scheduler import ClusterScheduler  # noqa: E402
+from command_runner import CommandRunner  # noqa: E402
+import secrets_handler  # noqa: E402
+from namespace_registrations import NamespaceRegistrations  # noqa: E402
+from secrets_handler import SecretsHandler  # noqa: E402
+from secrets_inventory import SecretsInventory  # noqa: E402
+
+CLUSTER_NAME = "test-cluster"
+
+def completed(returncode: int = 0, stdout: str = "", stderr: str = "") -> subprocess.CompletedProcess:
+    return subprocess.CompletedProcess(["kubectl"], returncode, stdout, stderr)
+
+class ScriptedRunner(CommandRunner):
+    """Answers kubectl commands with respond(args, input), args without the kubeconfig prefix,
+    and keeps every call"""
+
+    def __init__(self, respond: Callable[[List[str], Optional[str]], subprocess.CompletedProcess]):
+        self.respond = respond
+        self.calls: List[List[str]] = []
+        self._lock = threading.Lock()
+
+    def run(self, cmd: List[str], input: Optional[str], timeout: float) -> subprocess.CompletedProcess:
+        args = cmd[3:]
+        with self._lock:
+            self.calls.append(args)
+        return self.respond(args, input)
+
+    async def run_async(self, cmd: List[str], input: Optional[str], timeout: float) -> subprocess.CompletedProcess:
+        return self.run(cmd, input, timeout)
+
+class FakeCluster:
+    """Secrets of one cluster, answering the kubectl commands SecretsHandler runs: get secret,
+    list API reads, server-side apply from stdin and delete"""
+
+    def __init__(self, namespaces: Tuple[str, ...] = ("default", "kube-system", "argocd")):
+        self.namespaces = list(namespaces)
+        self.secrets: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.applied: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+    def put(self, secret: Dict[str, Any]):
+        """Store a secret the way the API server does: stringData folded into data"""
+        secret = json.loads(json.dumps(secret))
+        for key, value in (secret.pop("stringData", None) or {}).items():
+            secret.setdefault("data", {})[key] = base64.b64encode(str(value).encode('utf-8')).decode('ascii')
+        secret.setdefault("type", "Opaque")
+        metadata = secret["metadata"]
+        self.secrets[(metadata["namespace"], metadata["name"])] = secret
+
+    def __call__(self, args: List[str], input: Optional[str]) -> subprocess.CompletedProcess:
+        args = [arg for arg in args if not arg.startswith("--request-timeout=")]
+        with self._lock:
+            if args[:2] == ["get", "secret"]:
+                secret = self.secrets.get((args[args.index("-n") + 1], args[2]))
+                if secret is None:
+                    return completed(1, "", f'Error from server (NotFound): secrets "{args[2]}" not found\n')
+                return completed(0, json.dumps(secret))
+            if args[:2] == ["get", "--raw"]:
+                return self._get_raw(args[2])
+            if args[0] == "apply":
+                lines = []
+                for document in yaml_codec.safe_load_all(input):
+                    metadata = document["metadata"]
+                    self.put(document)
+                    self.applied.append((metadata["namespace"], metadata["name"]))
+                    lines.append(f"secret/{metadata['name']} serverside-applied")
+                return completed(0, "\n".join(lines) + "\n")
+            if args[:2] == ["delete", "secret"]:
+                namespace = args[args.index("-n") + 1]
+                names = args[2:args.index("-n")]
+                for name in names:
+                    self.secrets.pop((namespace, name), None)
+                return completed(0, "".join(f'secret "{name}" deleted\n' for name in names))
+        raise AssertionError(f"unexpected kubectl {args}")
+
+    def _get_raw(self, path: str) -> subprocess.CompletedProcess:
+        url = urlparse(path)
+        query = parse_qs(url.query)
+        parts = url.path.strip("/").split("/")
+        if parts[-1] == "namespaces":
+            items = [{"metadata": {"name": namespace, "labels": {}}} for namespace in self.namespaces]
+            return completed(0, json.dumps({"items": items, "metadata": {"resourceVersion": "1"}}))
+
+        namespace = parts[3] if parts[2] == "namespaces" else None
+        key, _, value = query.get("labelSelector", [""])[0].partition("=")
+        items = [
+            secret for (secret_namespace, _), secret in sorted(self.secrets.items())
+            if (namespace is None or secret_namespace == namespace)
+            and (secret["metadata"].get("labels") or {}).get(key) == value
+        ]
+        return completed(0, json.dumps({"items": items, "metadata": {}}))
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breakers():
+    """Circuit breakers are process-wide: start every test with closed circuits"""
+    secrets_handler._circuit_breakers.clear()
+    yield
+    secrets_handler._circuit_breakers.clear()
+
+@pytest.fixture
+def make_handler(tmp_path):
+    """Build a SecretsHandler for CLUSTER_NAME with its own scheduler, inventory and
+    registrations, running kubectl through a ScriptedRunner"""
+    clusters_folder = tmp_path / "clusters"
+    clusters_folder.mkdir()
+    (clusters_folder / f"{CLUSTER_NAME}.kubeconfig").write_text("apiVersion: v1\nkind: Config\n")
+
+    schedulers: List[ClusterScheduler] = []
+
+    def make(respond: Callable[[List[str], Optional[str]], subprocess.CompletedProcess], handler_class: type = SecretsHandler,
+             **kwargs) -> SecretsHandler:
+        kwargs.setdefault("registrations", NamespaceRegistrations(str(tmp_path / "namespace_registrations.yaml")))
+        kwargs.setdefault("content_hash_key", b"test-content-hash-key")
+        schedulers.append(ClusterScheduler(8, 4))
+        return handler_class(
+            clusters_folder=str(clusters_folder),
+            scheduler=schedulers[-1],
+            inventory=SecretsInventory(":memory:"),
+            runner=ScriptedRunner(respond),
+            cluster_registry=ClusterRegistry(str(clusters_folder)),
+            **kwargs
+        )
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.shutdown()
@@ -0,0 +1,89 @@
+"""
+Tests of matching kubectl apply output to the applied objects
+"""
+
+import json
+
+from conftest import CLUSTER_NAME, completed
+
+OBJECTS = [
+    ("team-a", "Secret", "d1"),
+    ("team-b", "Secret", "d1"),
+    ("argocd", "Secret", "d1-iu"),
+    ("argocd", "Secret", "h1"),
+]
+
+def parse(make_handler, returncode, stdout, stderr, objects=OBJECTS):
+    handler = make_handler(lambda args, input: completed())
+    return handler._parse_apply_results(completed(returncode, stdout, stderr), objects)
+
+def test_all_applied(make_handler):
+    results = parse(make_handler, 0, "secret/d1 serverside-applied\nsecret/d1 serverside-applied\n"
+                                     "secret/d1-iu serverside-applied\nsecret/h1 serverside-applied\n", "")
+    assert [result["success"] for result in results] == [True, True, True, True]
+    assert results[2]["output"] == "secret/d1-iu serverside-applied"
+    assert results[3]["output"] == "secret/h1 serverside-applied"
+
+def test_invalid_error_without_namespace_fails_only_its_object(make_handler):
+    results = parse(
+        make_handler, 1,
+        "secret/d1 serverside-applied\nsecret/d1 serverside-applied\nsecret/d1-iu serverside-applied\n",
+        'Error from server (Invalid): Secret "h1" is invalid: data[password]: Invalid value: "": must not be empty\n'
+    )
+    assert [result["success"] for result in results] == [True, True, True, False]
+    assert results[2]["output"] == "secret/d1-iu serverside-applied"
+    assert "h1" in results[3]["error"]
+    assert not results[3].get("unknown")
+
+def test_error_quoting_a_namespace_spares_other_objects_there(make_handler):
+    results = parse(
+        make_handler, 1,
+        "secret/d1 serverside-applied\nsecret/d1 serverside-applied\nsecret/d1-iu serverside-applied\n",
+        'Error from server (Forbidden): secrets "h1" is forbidden: User "ci" cannot patch resource "secrets" '
+        'in API group "" in the namespace "argocd"\n'
+    )
+    assert [result["success"] for result in results] == [True, True, True, False]
+
+def test_same_name_in_several_namespaces_is_split_by_quoted_namespace(make_handler):
+    results = parse(
+        make_handler, 1,
+        "secret/d1 serverside-applied\nsecret/d1-iu unchanged\nsecret/h1 configured\n",
+        'Error from server (Forbidden): secrets "d1" is forbidden: User "ci" cannot patch resource "secrets" '
+        'in API group "" in the namespace "team-a"\n'
+    )
+    assert [result["success"] for result in results] == [False, True, True, True]
+    assert results[0]["namespace"] == "team-a"
+    assert results[1] == {"success": True, "namespace": "team-b", "output": "secret/d1 serverside-applied"}
+
+def test_unmatched_objects_are_unknown_not_succeeded(make_handler):
+    # The apply stopped after the first object
+    results = parse(make_handler, 1, "secret/d1 serverside-applied\n", "error: unexpected EOF\n",
+                    [("team-a", "Secret", "d1"), ("argocd", "Secret", "d1-iu")])
+    assert results[0]["success"]
+    assert results[1]["unknown"] and not results[1]["success"]
+    assert results[1]["error"] == "error: unexpected EOF"
+
+def test_ambiguous_error_leaves_same_named_objects_unknown(make_handler):
+    results = parse(make_handler, 1, "secret/d1 serverside-applied\n", 'Error from server (Invalid): Secret "d1" is invalid\n',
+                    [("team-a", "Secret", "d1"), ("team-b", "Secret", "d1")])
+    assert [result.get("unknown") for result in results] == [True, True]
+
+def test_add_docker_secret_reports_mixed_outcome(make_handler):
+    def respond(args, input):
+        if args[:2] == ["get", "secret"]:
+            return completed(1, "", f'Error from server (NotFound): secrets "{args[2]}" not found\n')
+        if args[0] == "apply":
+            return completed(
+                1,
+                "secret/d1 serverside-applied\nsecret/d1-iu serverside-applied\n",
+                'Error from server (Forbidden): secrets "d1" is forbidden: cannot patch resource "secrets" '
+                'in the namespace "team-b"\n'
+            )
+        raise AssertionError(f"unexpected kubectl {args}")
+
+    response = make_handler(respond).add_docker_secret(CLUSTER_NAME, "d1", "secret", "user", ["team-a", "team-b"])
+
+    statuses = [(entry["namespace"], entry["result"]["status"]) for entry in response["results"]]
+    assert statuses == [("team-a", "created"), ("team-b", "failed"), ("argocd", "created")]
+    assert (response["created"], response["failed"], response["unknown"]) == (2, 1, 0)
+    json.dumps(response)
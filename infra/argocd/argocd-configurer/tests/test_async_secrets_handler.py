@@ -0,0 +1,63 @@
+"""
+Tests of the asyncio variant of the secrets handler
+"""
+
+import asyncio
+import threading
+
+from conftest import CLUSTER_NAME, FakeCluster
+from async_secrets_handler import AsyncSecretsHandler
+
+def record_inventory_threads(handler):
+    """Wrap the inventory writes to collect the threads they run on"""
+    threads = []
+    for method in ("record_listing", "record_secrets"):
+        original = getattr(handler.inventory, method)
+
+        def wrapper(*args, original=original):
+            threads.append(threading.current_thread())
+            return original(*args)
+
+        setattr(handler.inventory, method, wrapper)
+    return threads
+
+def test_sync_methods_keep_their_contract(make_handler):
+    handler = make_handler(FakeCluster(), handler_class=AsyncSecretsHandler)
+    response = handler.add_docker_secret(CLUSTER_NAME, "ghcr", "s3cret", "user", ["team-a"])
+    assert response["success"]
+    assert handler.get_secrets_for_cluster(CLUSTER_NAME)["status"] == "success"
+
+def test_async_methods_match_sync_responses(make_handler):
+    sync_cluster, async_cluster = FakeCluster(), FakeCluster()
+    sync_handler = make_handler(sync_cluster)
+    async_handler = make_handler(async_cluster, handler_class=AsyncSecretsHandler)
+
+    async def scenario():
+        docker = await async_handler.add_docker_secret_async(CLUSTER_NAME, "ghcr", "s3cret", "user", ["team-a"])
+        helm = await async_handler.add_helm_repo_secret_async(CLUSTER_NAME, "charts", "charts.example.com", False,
+                                                              "s3cret", "user")
+        return docker, helm, await async_handler.get_secrets_for_cluster_async(CLUSTER_NAME)
+
+    docker, helm, listed = asyncio.run(scenario())
+    assert docker == sync_handler.add_docker_secret(CLUSTER_NAME, "ghcr", "s3cret", "user", ["team-a"])
+    assert helm == sync_handler.add_helm_repo_secret(CLUSTER_NAME, "charts", "charts.example.com", False,
+                                                     "s3cret", "user")
+    assert async_cluster.secrets == sync_cluster.secrets
+
+    expected = sync_handler.get_secrets_for_cluster(CLUSTER_NAME)
+    for response in (listed, expected):
+        response.pop("timestamp", None)
+    assert listed == expected
+
+def test_inventory_writes_run_off_the_event_loop(make_handler):
+    handler = make_handler(FakeCluster(), handler_class=AsyncSecretsHandler)
+    threads = record_inventory_threads(handler)
+
+    async def scenario():
+        await handler.add_docker_secret_async(CLUSTER_NAME, "ghcr", "s3cret", "user", ["team-a"])
+        await handler.get_secrets_for_cluster_async(CLUSTER_NAME)
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(scenario())
+    assert len(threads) == 4
+    assert loop_thread not in threads
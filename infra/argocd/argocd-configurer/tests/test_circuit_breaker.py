@@ -0,0 +1,107 @@
+"""
+Tests of the per-cluster circuit breaker and its half-open probe
+"""
+
+import asyncio
+import threading
+import time
+
+from conftest import CLUSTER_NAME, FakeCluster
+import secrets_handler
+from secrets_handler import CircuitBreaker
+
+def half_open_breaker() -> CircuitBreaker:
+    """Breaker whose reset timeout has passed, so the next request is the probe"""
+    breaker = CircuitBreaker(CLUSTER_NAME, failure_threshold=1, reset_timeout=30.0)
+    breaker.record_failure()
+    breaker.opened_at -= 30.0
+    return breaker
+
+def allow_in_thread(breaker: CircuitBreaker, wait: float):
+    outcome = {}
+    thread = threading.Thread(target=lambda: outcome.setdefault("allowed", breaker.allow_request(wait)))
+    thread.start()
+    return thread, outcome
+
+def test_open_circuit_fails_fast():
+    breaker = CircuitBreaker(CLUSTER_NAME, failure_threshold=2, reset_timeout=30.0)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request(wait=1.0)
+    assert breaker.retry_after() > 0
+
+def test_siblings_wait_for_successful_probe():
+    breaker = half_open_breaker()
+    assert breaker.allow_request()
+    assert breaker.probe_in_flight
+
+    thread, outcome = allow_in_thread(breaker, 5.0)
+    time.sleep(0.05)
+    assert thread.is_alive()
+    breaker.record_success()
+    thread.join(1.0)
+    assert outcome == {"allowed": True}
+    assert breaker.state == "closed"
+
+def test_siblings_fail_when_probe_fails():
+    breaker = half_open_breaker()
+    assert breaker.allow_request()
+
+    thread, outcome = allow_in_thread(breaker, 5.0)
+    time.sleep(0.05)
+    breaker.record_failure()
+    thread.join(1.0)
+    assert outcome == {"allowed": False}
+    assert breaker.state == "open"
+
+def test_sibling_becomes_probe_when_probe_is_cancelled():
+    breaker = half_open_breaker()
+    assert breaker.allow_request()
+
+    thread, outcome = allow_in_thread(breaker, 5.0)
+    time.sleep(0.05)
+    breaker.record_cancelled()
+    thread.join(1.0)
+    assert outcome == {"allowed": True}
+    assert breaker.state == "half_open" and breaker.probe_in_flight
+
+def test_sibling_gives_up_after_wait():
+    breaker = half_open_breaker()
+    assert breaker.allow_request()
+    started_at = time.monotonic()
+    assert not breaker.allow_request(wait=0.1)
+    assert time.monotonic() - started_at >= 0.1
+    assert not breaker._probe_waiters
+
+def test_async_sibling_waits_for_probe():
+    breaker = half_open_breaker()
+    assert breaker.allow_request()
+
+    async def scenario():
+        sibling = asyncio.ensure_future(breaker.allow_request_async(5.0))
+        await asyncio.sleep(0.05)
+        assert not sibling.done()
+        # The probe may finish on another thread
+        threading.Thread(target=breaker.record_success).start()
+        return await sibling
+
+    assert asyncio.run(scenario())
+
+def test_parallel_listings_pass_through_half_open_circuit(make_handler):
+    cluster = FakeCluster()
+
+    def slow_cluster(args, input):
+        time.sleep(0.05)
+        return cluster(args, input)
+
+    handler = make_handler(slow_cluster, circuit_failure_threshold=1)
+    breaker = secrets_handler._get_circuit_breaker(CLUSTER_NAME, 1, handler.circuit_reset_timeout)
+    breaker.record_failure()
+    breaker.opened_at -= handler.circuit_reset_timeout
+
+    response = handler.get_secrets_for_cluster(CLUSTER_NAME)
+    assert response["status"] == "success"
+    assert len(handler.runner.calls) == 3
+    assert breaker.state == "closed"
@@ -0,0 +1,128 @@
+"""
+Tests of the fair per-cluster scheduler
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from cluster_scheduler import ClusterScheduler
+
+@pytest.fixture
+def scheduler():
+    scheduler = ClusterScheduler(4, 1)
+    yield scheduler
+    scheduler.shutdown()
+
+def test_busy_cluster_does_not_delay_another(scheduler):
+    started_at = time.monotonic()
+    busy = [scheduler.submit("cluster-a", time.sleep, 0.05) for _ in range(40)]
+    other = scheduler.submit("cluster-b", time.monotonic)
+
+    # cluster-a runs one task at a time; cluster-b gets a free slot right away
+    assert other.result(timeout=1) - started_at < 0.2
+    assert scheduler.stats()["waiting_per_cluster"]["cluster-a"] > 30
+    for future in busy:
+        future.cancel()
+
+def test_waiting_clusters_are_served_round_robin():
+    scheduler = ClusterScheduler(1, 1)
+    order = []
+    gate = threading.Event()
+    try:
+        first = scheduler.submit("cluster-a", gate.wait)
+        futures = [scheduler.submit(cluster, order.append, cluster)
+                   for cluster in ("cluster-a", "cluster-a", "cluster-a", "cluster-b", "cluster-b", "cluster-c")]
+        gate.set()
+        first.result(timeout=1)
+        for future in futures:
+            future.result(timeout=1)
+    finally:
+        scheduler.shutdown()
+    assert order == ["cluster-a", "cluster-b", "cluster-c", "cluster-a", "cluster-b", "cluster-a"]
+
+def test_kubectl_runs_inside_a_task_use_its_slot(scheduler):
+    def task():
+        with scheduler.slot("cluster-a", timeout=0) as acquired:
+            return acquired, scheduler.stats()["running_per_cluster"]
+
+    assert scheduler.submit("cluster-a", task).result(timeout=1) == (True, {"cluster-a": 1})
+    assert scheduler.stats()["running"] == 0
+
+def test_caps_hold_for_submitted_tasks():
+    scheduler = ClusterScheduler(3, 2)
+    peak = {"total": 0}
+    lock = threading.Lock()
+
+    def task():
+        with lock:
+            stats = scheduler.stats()
+            peak["total"] = max(peak["total"], stats["running"])
+            assert max(stats["running_per_cluster"].values()) <= 2
+        time.sleep(0.01)
+
+    try:
+        futures = [scheduler.submit(f"cluster-{i % 4}", task) for i in range(24)]
+        for future in futures:
+            future.result(timeout=2)
+    finally:
+        scheduler.shutdown()
+    assert peak["total"] == 3
+
+def test_cancelled_tasks_never_run(scheduler):
+    gate = threading.Event()
+    ran = []
+    blocker = scheduler.submit("cluster-a", gate.wait)
+    queued = scheduler.submit("cluster-a", ran.append, "queued")
+    assert queued.cancel()
+    gate.set()
+    blocker.result(timeout=1)
+    assert scheduler.submit("cluster-a", ran.append, "next").result(timeout=1) is None
+    assert ran == ["next"]
+    assert scheduler.stats()["waiting_per_cluster"] == {}
+
+def test_exceptions_reach_the_future_and_free_the_slot(scheduler):
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        scheduler.submit("cluster-a", fail).result(timeout=1)
+    assert scheduler.stats()["running"] == 0
+
+def test_lent_slot_is_released_by_the_last_holder(scheduler):
+    lent = threading.Event()
+    finish = threading.Event()
+    helper_done = threading.Event()
+
+    def helper():
+        lent.set()
+        finish.wait(1)
+
+    def task():
+        hold = scheduler.held_slot()
+        threading.Thread(target=lambda: (scheduler.run_with_slot(hold, helper), helper_done.set())).start()
+        lent.wait(1)
+
+    scheduler.submit("cluster-a", task).result(timeout=1)
+    # The task is done but the helper still runs with its slot
+    assert scheduler.stats()["running_per_cluster"] == {"cluster-a": 1}
+    finish.set()
+    helper_done.wait(1)
+    assert scheduler.stats()["running"] == 0
+
+def test_threads_and_coroutines_share_slots(scheduler):
+    async def scenario():
+        assert await scheduler.acquire_async("cluster-a", timeout=1)
+        assert not await scheduler.acquire_async("cluster-a", timeout=0.05)
+        granted = asyncio.ensure_future(scheduler.acquire_async("cluster-a", timeout=1))
+        await asyncio.sleep(0.01)
+        threading.Thread(target=scheduler.release, args=("cluster-a",)).start()
+        assert await granted
+        scheduler.release("cluster-a")
+
+    asyncio.run(scenario())
+    assert scheduler.stats()["running"] == 0
+    assert scheduler.acquire("cluster-b", timeout=0)
+    scheduler.release("cluster-b")
@@ -0,0 +1,72 @@
+"""
+Tests of recording and replaying kubectl invocations
+"""
+
+import base64
+import json
+
+import pytest
+
+from conftest import ScriptedRunner, completed
+from command_runner import CommandRunner, RecordingRunner, ReplayRunner, redact_secret_values
+
+def encode(value: str) -> str:
+    return base64.b64encode(value.encode()).decode()
+
+HELM_SECRET = {
+    "kind": "Secret",
+    "metadata": {"name": "charts", "namespace": "argocd"},
+    "data": {"type": encode("helm"), "url": encode("charts.example.com"), "username": encode("user"),
+             "password": encode("s3cret")}
+}
+
+DOCKER_SECRET = {
+    "metadata": {"name": "ghcr", "namespace": "team-a"},
+    "data": {".dockerconfigjson": encode('{"auths": {"ghcr.io": {"username": "user", "password": "s3cret"}}}')},
+    "stringData": {"token": "s3cret"}
+}
+
+def test_command_runner_is_abstract():
+    with pytest.raises(TypeError):
+        CommandRunner()
+
+    class SyncOnly(CommandRunner):
+        def run(self, cmd, input, timeout):
+            return completed()
+
+    with pytest.raises(TypeError):
+        SyncOnly()
+
+def test_redacts_data_of_documents_and_lists():
+    listing = json.loads(redact_secret_values(json.dumps({"items": [HELM_SECRET, DOCKER_SECRET]})))
+    helm, docker = listing["items"]
+    assert helm["data"]["type"] == HELM_SECRET["data"]["type"]
+    assert helm["data"]["url"] == HELM_SECRET["data"]["url"]
+    assert base64.b64decode(helm["data"]["password"]) == b"REDACTED"
+    assert base64.b64decode(helm["data"]["username"]) == b"REDACTED"
+    assert base64.b64decode(docker["data"][".dockerconfigjson"]) == b"REDACTED"
+    assert docker["stringData"] == {"token": "REDACTED"}
+    assert docker["metadata"] == DOCKER_SECRET["metadata"]
+
+def test_redacts_json_lines_and_keeps_plain_output():
+    watch = json.dumps({"type": "ADDED", "object": DOCKER_SECRET}) + "\nnot json\n"
+    lines = redact_secret_values(watch).splitlines()
+    assert "s3cret" not in lines[0]
+    assert lines[1] == "not json"
+    assert redact_secret_values("secret/ghcr serverside-applied\n") == "secret/ghcr serverside-applied\n"
+
+def test_recording_never_writes_secret_values(tmp_path):
+    fixture = tmp_path / "kubectl.jsonl"
+    inner = ScriptedRunner(lambda args, input: completed(0, json.dumps(HELM_SECRET, indent=4)))
+    runner = RecordingRunner(str(fixture), inner)
+    cmd = ["kubectl", "--kubeconfig", "/clusters/test-cluster.kubeconfig", "get", "secret", "charts", "-n", "argocd", "-o", "json"]
+
+    # The caller still gets the real output
+    assert json.loads(runner.run(cmd, None, 10).stdout) == HELM_SECRET
+
+    recorded = fixture.read_text()
+    assert encode("s3cret") not in recorded and encode("user") not in recorded
+
+    replayed = json.loads(ReplayRunner(str(fixture), latency=0).run(cmd, None, 10).stdout)
+    assert replayed["metadata"] == HELM_SECRET["metadata"]
+    assert replayed["data"]["url"] == HELM_SECRET["data"]["url"]
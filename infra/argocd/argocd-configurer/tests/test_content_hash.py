@@ -0,0 +1,78 @@
+"""
+Tests of the keyed content hash annotations and of skipping unchanged secrets
+"""
+
+import base64
+import hashlib
+import json
+
+from conftest import CLUSTER_NAME, FakeCluster
+from secrets_handler import CONTENT_HASH_ANNOTATION
+
+def add(handler, namespaces=("team-a", "team-b"), password="s3cret"):
+    return handler.add_docker_secret(CLUSTER_NAME, "ghcr", password, "user", list(namespaces), upsert=True)
+
+def statuses(response):
+    return [entry["result"]["status"] for entry in response["results"]]
+
+def test_annotation_is_keyed(make_handler):
+    cluster = FakeCluster()
+    add(make_handler(cluster))
+    secret = cluster.secrets[("team-a", "ghcr")]
+    annotation = secret["metadata"]["annotations"][CONTENT_HASH_ANNOTATION]
+
+    # Not the plain hash of anything derived from the manifest without the key
+    unkeyed = dict(secret)
+    unkeyed["metadata"] = {key: value for key, value in secret["metadata"].items() if key != "annotations"}
+    assert annotation != hashlib.sha256(json.dumps(unkeyed, sort_keys=True).encode()).hexdigest()
+    assert annotation != hashlib.sha256(json.dumps(secret["data"], sort_keys=True).encode()).hexdigest()
+
+    other = FakeCluster()
+    add(make_handler(other, content_hash_key=b"another-key"))
+    assert other.secrets[("team-a", "ghcr")]["data"] == secret["data"]
+    assert other.secrets[("team-a", "ghcr")]["metadata"]["annotations"][CONTENT_HASH_ANNOTATION] != annotation
+
+def test_unchanged_secrets_are_not_written_again(make_handler):
+    cluster = FakeCluster()
+    handler = make_handler(cluster)
+    assert statuses(add(handler)) == ["created", "created", "created"]
+    cluster.applied.clear()
+
+    response = add(handler)
+    assert statuses(response) == ["unchanged", "unchanged", "unchanged"]
+    assert cluster.applied == []
+
+    assert statuses(add(handler, password="rotated")) == ["updated", "updated", "updated"]
+
+def test_secret_edited_out_of_band_is_repaired(make_handler):
+    cluster = FakeCluster()
+    handler = make_handler(cluster)
+    add(handler)
+    desired = dict(cluster.secrets[("team-b", "ghcr")]["data"])
+
+    # Someone replaces the credentials but leaves the annotation in place
+    tampered = {"auths": {"ghcr.io": {"auth": base64.b64encode(b"user:wrong").decode()}}}
+    cluster.secrets[("team-b", "ghcr")]["data"][".dockerconfigjson"] = base64.b64encode(json.dumps(tampered).encode()).decode()
+    cluster.applied.clear()
+
+    assert statuses(add(handler)) == ["unchanged", "updated", "unchanged"]
+    assert cluster.applied == [("team-b", "ghcr")]
+    assert cluster.secrets[("team-b", "ghcr")]["data"] == desired
+
+def test_unkeyed_annotation_is_replaced(make_handler):
+    cluster = FakeCluster()
+    handler = make_handler(cluster)
+    add(handler, namespaces=("team-a",))
+    secret = cluster.secrets[("team-a", "ghcr")]
+    secret["metadata"]["annotations"][CONTENT_HASH_ANNOTATION] = hashlib.sha256(b"old-style").hexdigest()
+
+    assert statuses(add(handler, namespaces=("team-a",))) == ["updated", "unchanged"]
+    assert statuses(add(handler, namespaces=("team-a",))) == ["unchanged", "unchanged"]
+
+def test_helm_secret_string_data_matches_live_data(make_handler):
+    cluster = FakeCluster()
+    handler = make_handler(cluster)
+    first = handler.add_helm_repo_secret(CLUSTER_NAME, "charts", "ghcr.io/org/charts", True, "token", "user", upsert=True)
+    second = handler.add_helm_repo_secret(CLUSTER_NAME, "charts", "ghcr.io/org/charts", True, "token", "user", upsert=True)
+    assert first["helm_secret_applied"]["status"] == "created"
+    assert second["helm_secret_applied"]["status"] == "unchanged"
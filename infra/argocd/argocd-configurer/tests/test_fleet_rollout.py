@@ -0,0 +1,65 @@
+"""
+Tests of fleet rollouts: per-cluster deadlines and stopping when the consumer goes away
+"""
+
+import threading
+import time
+
+from fleet_rollout import FleetRollout
+from secrets_handler import Deadline, DeadlineExceededError
+
+class FakeFleetHandler:
+    """Stands in for SecretsHandler: slow clusters hang until their deadline expires"""
+
+    def __init__(self, clusters, slow=()):
+        self.clusters = list(clusters)
+        self.slow = set(slow)
+        self.deadlines = {}
+        self.started = []
+        self._lock = threading.Lock()
+
+    def list_available_clusters(self):
+        return self.clusters
+
+    def add_docker_secret(self, cluster_name, secret_name, password, username, namespaces, upsert, deadline):
+        with self._lock:
+            self.started.append(cluster_name)
+            self.deadlines[cluster_name] = deadline
+        if cluster_name in self.slow:
+            time.sleep(deadline.remaining())
+            raise DeadlineExceededError(f"Request deadline of {deadline.seconds} seconds exceeded")
+        return {"created": [{"namespace": namespace} for namespace in namespaces]}
+
+def rollout(handler, deadline=None, max_parallel_clusters=1, cluster_deadline_seconds=0.1):
+    return FleetRollout(handler, max_parallel_clusters, cluster_deadline_seconds).rollout_docker_secret(
+        "ghcr", "s3cret", "user", ["team-a"], deadline=deadline
+    )
+
+def test_slow_cluster_does_not_use_up_the_next_clusters_time():
+    handler = FakeFleetHandler(["slow-1", "slow-2", "fast"], slow=("slow-1", "slow-2"))
+    summary = list(rollout(handler, Deadline(5)))[-1]
+
+    assert summary["failed"] == ["slow-1", "slow-2"]
+    assert summary["succeeded"] == ["fast"]
+    assert handler.deadlines["fast"].seconds <= 0.1
+
+def test_cluster_deadline_is_capped_by_rollout_deadline():
+    handler = FakeFleetHandler(["cluster-a"])
+    list(rollout(handler, Deadline(0.05), cluster_deadline_seconds=10))
+    assert handler.deadlines["cluster-a"].seconds <= 0.05
+
+def test_cluster_deadline_without_rollout_deadline():
+    handler = FakeFleetHandler(["cluster-a"])
+    list(rollout(handler, cluster_deadline_seconds=7))
+    assert handler.deadlines["cluster-a"].seconds == 7
+
+def test_clusters_not_started_are_cancelled_when_consumer_stops():
+    clusters = [f"cluster-{i}" for i in range(10)]
+    handler = FakeFleetHandler(clusters, slow=clusters)
+    events = rollout(handler, cluster_deadline_seconds=0.05)
+    first = next(events)
+    assert first["cluster"] == "cluster-0"
+    events.close()
+
+    time.sleep(0.1)
+    assert len(handler.started) <= 2
@@ -0,0 +1,97 @@
+"""
+Tests of converging a cluster to a desired set of secrets, and of pruning
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from conftest import CLUSTER_NAME, FakeCluster
+
+DOCKER_SECRET = {"name": "ghcr", "username": "user", "password": "s3cret", "namespaces": ["team-a"]}
+
+def docker_creds(namespace, name):
+    return {
+        "metadata": {"name": name, "namespace": namespace, "labels": {"mcops.tech/secret-type": "docker-creds"}},
+        "stringData": {"username": "old", "password": "old"}
+    }
+
+def keys(entries):
+    return sorted((entry["namespace"], entry["name"]) for entry in entries)
+
+@pytest.fixture
+def cluster():
+    cluster = FakeCluster()
+    cluster.put(docker_creds("team-b", "old-registry"))
+    return cluster
+
+def test_creates_desired_secrets_and_keeps_others_by_default(make_handler, cluster):
+    result = make_handler(cluster).sync_secrets(CLUSTER_NAME, [DOCKER_SECRET], [])
+
+    assert result["success"]
+    assert keys(result["created"]) == [("argocd", "ghcr-iu"), ("team-a", "ghcr")]
+    assert result["deleted"] == [] and result["retained"] == []
+    assert ("team-b", "old-registry") in cluster.secrets
+
+def test_second_sync_is_a_no_op(make_handler, cluster):
+    handler = make_handler(cluster)
+    handler.sync_secrets(CLUSTER_NAME, [DOCKER_SECRET], [])
+    cluster.applied.clear()
+
+    result = handler.sync_secrets(CLUSTER_NAME, [DOCKER_SECRET], [])
+    assert result["message"] == "Cluster already in sync"
+    assert result["counts"]["unchanged"] == 2
+    assert cluster.applied == []
+
+def test_prune_deletes_managed_secrets_missing_from_desired_set(make_handler, cluster):
+    result = make_handler(cluster).sync_secrets(CLUSTER_NAME, [DOCKER_SECRET], [], prune=True)
+
+    assert keys(result["deleted"]) == [("team-b", "old-registry")]
+    assert ("team-b", "old-registry") not in cluster.secrets
+
+def test_prune_keeps_registered_secrets(make_handler, cluster):
+    handler = make_handler(cluster)
+    handler.registrations.add(CLUSTER_NAME, "quay", "pull-secrets=quay")
+    cluster.put(docker_creds("team-c", "quay"))
+    cluster.put(docker_creds("argocd", "quay-iu"))
+
+    result = handler.sync_secrets(CLUSTER_NAME, [DOCKER_SECRET], [], prune=True)
+
+    assert keys(result["deleted"]) == [("team-b", "old-registry")]
+    assert keys(result["retained"]) == [("argocd", "quay-iu"), ("team-c", "quay")]
+    assert result["counts"]["retained"] == 2
+    assert ("team-c", "quay") in cluster.secrets and ("argocd", "quay-iu") in cluster.secrets
+
+def test_dry_run_writes_nothing(make_handler, cluster):
+    result = make_handler(cluster).sync_secrets(CLUSTER_NAME, [DOCKER_SECRET], [], prune=True, dry_run=True)
+
+    assert result["counts"]["created"] == 2 and result["counts"]["deleted"] == 1
+    assert cluster.applied == []
+    assert ("team-b", "old-registry") in cluster.secrets
+
+def test_sync_endpoint_requires_both_lists(tmp_path, monkeypatch):
+    import server
+
+    monkeypatch.chdir(tmp_path)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), server.ClusterAPIHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        for body in ({"cluster_name": CLUSTER_NAME, "docker_secrets": []},
+                     {"cluster_name": CLUSTER_NAME, "helm_secrets": []}):
+            request = urllib.request.Request(
+                f"http://127.0.0.1:{httpd.server_port}/secrets/sync",
+                data=json.dumps(body).encode(),
+                method="PUT",
+                headers={"Content-Type": "application/json"}
+            )
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(request, timeout=5)
+            assert error.value.code == 400
+            assert "Missing required field" in json.loads(error.value.read())["message"]
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
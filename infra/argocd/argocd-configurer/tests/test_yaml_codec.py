@@ -0,0 +1,32 @@
+"""
+Tests that the YAML codec writes the same bytes with and without libyaml
+"""
+
+import os
+
+import pytest
+import yaml
+
+import yaml_codec
+
+CDKTF_CODEC = os.path.join(os.path.dirname(os.path.abspath(yaml_codec.__file__)),
+                           "..", "..", "cdktf", "cluster_api_configurer", "yaml_codec.py")
+
+def registrations(value):
+    return {"registrations": [{"cluster": "test-cluster", value: {"selector": value}, "other": [value]}]}
+
+@pytest.mark.skipif(not yaml_codec.LIBYAML, reason="PyYAML was built without libyaml")
+@pytest.mark.parametrize("value", ["plan é " * 40, "ascii words " * 30, "x" * 125, "é" * 70, "😀" * 33, "multi\nline"])
+def test_pure_python_and_libyaml_dumps_are_identical(value):
+    data = registrations(value)
+    assert yaml.dump(data, Dumper=yaml_codec.PythonSafeDumper, sort_keys=False, width=yaml_codec.WIDTH) == \
+        yaml_codec.safe_dump(data, sort_keys=False)
+    assert yaml_codec.safe_load(yaml_codec.safe_dump(data, sort_keys=False)) == data
+
+def test_long_values_are_not_folded():
+    assert yaml_codec.safe_dump({"value": "word é " * 40}).count("\n") == 1
+
+@pytest.mark.skipif(not os.path.exists(CDKTF_CODEC), reason="Cluster API configurer not checked out")
+def test_codec_matches_the_cluster_api_configurer_copy():
+    with open(yaml_codec.__file__, encoding="utf-8") as ours, open(CDKTF_CODEC, encoding="utf-8") as theirs:
+        assert ours.read() == theirs.read()
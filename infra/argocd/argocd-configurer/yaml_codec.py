@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+YAML Codec for Cluster API
+YAML loading and dumping through libyaml when PyYAML was built with it, falling back to the
+pure-Python implementation otherwise. Both produce the same output for the plain data
+(dicts, lists, strings, numbers, booleans, None) used here: lines are not folded (see WIDTH)
+and the pure-Python dumpers measure long mapping keys the way libyaml does.
+"""
+
+from typing import IO, Any, Iterator, Optional, Union
+
+import yaml
+
+LIBYAML = getattr(yaml, "__with_libyaml__", False)
+
+class _LibyamlKeyLength:
+    """Emitter mixin deciding like libyaml whether a scalar mapping key is written as a simple
+    "key: value". PyYAML counts characters plus the implicit tag and requires fewer than 128,
+    libyaml counts UTF-8 bytes, adds the tag only when it is written, and allows 128"""
+
+    def check_simple_key(self):
+        event = self.event
+        if not isinstance(event, yaml.ScalarEvent):
+            return super().check_simple_key()
+        if self.analysis is None:
+            self.analysis = self.analyze_scalar(event.value)
+        if self.analysis.multiline:
+            return False
+        length = len(event.value.encode("utf-8"))
+        if event.anchor is not None:
+            if self.prepared_anchor is None:
+                self.prepared_anchor = self.prepare_anchor(event.anchor)
+            length += len(self.prepared_anchor)
+        if event.tag is not None and not any(event.implicit):
+            if self.prepared_tag is None:
+                self.prepared_tag = self.prepare_tag(event.tag)
+            length += len(self.prepared_tag)
+        return length <= 128
+
+class PythonDumper(_LibyamlKeyLength, yaml.Dumper):
+    """Pure-Python yaml.Dumper with the output of yaml.CDumper"""
+
+class PythonSafeDumper(_LibyamlKeyLength, yaml.SafeDumper):
+    """Pure-Python yaml.SafeDumper with the output of yaml.CSafeDumper"""
+
+SafeLoader = yaml.CSafeLoader if LIBYAML else yaml.SafeLoader
+Dumper = yaml.CDumper if LIBYAML else PythonDumper
+SafeDumper = yaml.CSafeDumper if LIBYAML else PythonSafeDumper
+
+Stream = Union[str, bytes, IO]
+
+# Line width of the dumps. The emitters break long scalars at different points (pure Python
+# escapes the break of a double-quoted string with non-ASCII characters, libyaml does not), so
+# lines are never folded. libyaml takes a C int, float("inf") is rejected
+WIDTH = 2 ** 31 - 1
+
+def safe_load(stream: Stream) -> Any:
+    """Drop-in for yaml.safe_load"""
+    return yaml.load(stream, Loader=SafeLoader)
+
+def safe_load_all(stream: Stream) -> Iterator[Any]:
+    """Drop-in for yaml.safe_load_all"""
+    return yaml.load_all(stream, Loader=SafeLoader)
+
+def dump(data: Any, stream: Optional[IO] = None, **kwargs) -> Optional[str]:
+    """Drop-in for yaml.dump, without line folding unless width is given. Returns the YAML when stream is None"""
+    kwargs.setdefault("width", WIDTH)
+    return yaml.dump(data, stream, Dumper=Dumper, **kwargs)
+
+def safe_dump(data: Any, stream: Optional[IO] = None, **kwargs) -> Optional[str]:
+    """Drop-in for yaml.safe_dump, without line folding unless width is given"""
+    kwargs.setdefault("width", WIDTH)
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwargs)
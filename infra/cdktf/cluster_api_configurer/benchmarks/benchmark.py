@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Cluster API Configuration Server
+Microbenchmarks of ConfigurationHandler rendering, diffing and persistence for growing
+numbers of worker groups, a comparison of the YAML codec with its pure-Python dumper that also
+checks their output is byte-identical, and an end-to-end throughput run of POST /configure
+and POST /preview against server.py. Results are written as JSON, and --compare reports
+the change against the results of a previous version.
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, SERVER_DIR)
+
+import yaml  # noqa: E402
+
+import yaml_codec  # noqa: E402
+from config_handler import YAML_OPTIONS, ClusterConfig, ConfigurationHandler, WorkerGroup  # noqa: E402
+
+PLANS = ["vc2-1c-2gb", "vc2-2c-4gb", "vc2-4c-8gb", "vhf-2c-4gb"]
+TAINT_EFFECTS = [None, "NoSchedule", "PreferNoSchedule", "NoExecute"]
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def config_request(cluster_name: str, group_count: int, variant: int = 0) -> Dict[str, Any]:
+    """/configure request body with group_count worker groups. Different variants change
+    about a third of the groups, and add and remove a few of them"""
+    groups = {}
+    for i in range(group_count):
+        # Variants drop every 10th group (shifted) and rename it, so groups are added and deleted
+        name = f"group-{i}" if (i + variant) % 10 else f"group-{i}-v{variant}"
+        group = {"count": 1 + (i + (variant if i % 3 == 0 else 0)) % 5, "planId": PLANS[i % len(PLANS)]}
+        taint_effect = TAINT_EFFECTS[i % len(TAINT_EFFECTS)]
+        if taint_effect:
+            group["taintEffect"] = taint_effect
+        groups[name] = group
+    return {
+        "region": "ewr" if variant % 2 == 0 else "ams",
+        "clusterName": cluster_name,
+        "controlPlaneHighAvailability": variant % 2 == 0,
+        "workerGroups": groups
+    }
+
+def cluster_config(request: Dict[str, Any]) -> ClusterConfig:
+    """ClusterConfig of a request body, as built by _prepare_config_response"""
+    return ClusterConfig(
+        region=request["region"],
+        cluster_name=request["clusterName"],
+        control_plane_high_availability=request["controlPlaneHighAvailability"],
+        worker_groups={
+            name: WorkerGroup(group["count"], group["planId"], group.get("taintEffect"))
+            for name, group in request["workerGroups"].items()
+        }
+    )
+
+def edge_case_config() -> ClusterConfig:
+    """Configuration where plain PyYAML and libyaml differ: long non-ASCII values, which they
+    fold at different points, and names near the 128 character limit of simple mapping keys,
+    which they measure differently"""
+    return ClusterConfig(
+        region="région-" * 12,
+        cluster_name="edge-" + "x" * 120,
+        control_plane_high_availability=True,
+        worker_groups={
+            "g0-é": WorkerGroup(1, "vc2-1c-2gb"),
+            "x" * 125: WorkerGroup(1, "vc2-1c-2gb"),
+            "grupo-é" * 10: WorkerGroup(2, "plan é " * 20, "NoSchedule"),
+            "grupo-é" * 20: WorkerGroup(1, "vc2-1c-2gb")
+        }
+    )
+
+def render_template(handler: ConfigurationHandler, config: ClusterConfig) -> str:
+    """The cluster template as /configure writes it, rendered in full: the cluster's cached
+    documents are dropped first"""
+    with handler._cache_lock:
+        handler._document_cache.pop(config.cluster_name, None)
+    return '---\n'.join(handler._render_cluster_documents(config))
+
+def measure(function: Callable[[], Any], min_time: float, min_iterations: int) -> Dict[str, Any]:
+    """Call function repeatedly for at least min_time seconds and min_iterations calls"""
+    timings: List[float] = []
+    started_at = time.perf_counter()
+    while len(timings) < min_iterations or time.perf_counter() - started_at < min_time:
+        call_started_at = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - call_started_at)
+    timings.sort()
+    return {
+        "iterations": len(timings),
+        "ops_per_second": round(len(timings) / sum(timings), 2),
+        "time_ms": {
+            "mean": round(statistics.mean(timings) * 1000, 4),
+            "min": round(timings[0] * 1000, 4),
+            "p50": round(percentile(timings, 50) * 1000, 4),
+            "p95": round(percentile(timings, 95) * 1000, 4),
+            "p99": round(percentile(timings, 99) * 1000, 4)
+        }
+    }
+
+def run_microbenchmarks(sizes: List[int], min_time: float, min_iterations: int) -> List[Dict[str, Any]]:
+    """Benchmark the rendering pipeline in the current directory (a scratch working directory)"""
+    handler = ConfigurationHandler("cluster_configs")
+    runs = []
+    for size in sizes:
+        cluster_name = f"bench-{size}"
+        previous = config_request(cluster_name, size, variant=0)
+        current = config_request(cluster_name, size, variant=1)
+        old_config = cluster_config(previous)
+        new_config = cluster_config(current)
+        # An existing configuration on disk, so previews compute a real diff
+        handler._save_config(old_config)
+        alternating = itertools.cycle([current, previous])
+        # The same configuration with the count of one worker group changed
+        one_group_changed = cluster_config(current)
+        first_group = next(iter(one_group_changed.worker_groups))
+        one_group_changed.worker_groups[first_group] = WorkerGroup(
+            one_group_changed.worker_groups[first_group].count + 1,
+            one_group_changed.worker_groups[first_group].plan_id,
+            one_group_changed.worker_groups[first_group].taint_effect
+        )
+        alternating_group = itertools.cycle([new_config, one_group_changed])
+
+        benchmarks = [
+            ("prepare_config_response_preview", lambda: handler._prepare_config_response(current, save=False)),
+            # Saves alternate between the two variants, so every save has changes
+            ("prepare_config_response_save", lambda: handler._prepare_config_response(next(alternating), save=True)),
+            ("calculate_diff", lambda: handler._calculate_diff(old_config, new_config)),
+            ("render_cluster_template", lambda: render_template(handler, new_config)),
+            # Unchanged configuration: nothing is rendered or written
+            ("save_config", lambda: handler._save_config(new_config)),
+            # Only the documents of one worker group are rendered
+            ("save_config_one_group_changed", lambda: handler._save_config(next(alternating_group)))
+        ]
+        for name, function in benchmarks:
+            run = {"benchmark": name, "worker_groups": size, **measure(function, min_time, min_iterations)}
+            runs.append(run)
+            print(f"  {name:<32} groups={size:<4} {run['ops_per_second']:>10.1f} ops/s  "
+                  f"p50 {run['time_ms']['p50']:>9.3f} ms  p95 {run['time_ms']['p95']:>9.3f} ms")
+    return runs
+
+def http_json(url: str, body: Dict[str, Any], timeout: float = 60) -> Tuple[int, Dict[str, Any]]:
+    """POST a JSON body and return (status code, decoded JSON body)"""
+    request = urllib.request.Request(url, data=json.dumps(body).encode('utf-8'), method="POST",
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+def run_load(request: Callable[[int], bool], concurrency: int, requests: int, duration: Optional[float]) -> Dict[str, Any]:
+    """Call request(i) from concurrency threads, requests times in total or for duration seconds"""
+    latencies: List[float] = []
+    errors = 0
+    counter = 0
+    lock = threading.Lock()
+    started_at = time.monotonic()
+
+    def worker():
+        nonlocal errors, counter
+        while True:
+            with lock:
+                if duration is not None:
+                    if time.monotonic() - started_at >= duration:
+                        return
+                elif counter >= requests:
+                    return
+                index = counter
+                counter += 1
+            request_started_at = time.monotonic()
+            try:
+                ok = request(index)
+            except Exception:
+                ok = False
+            with lock:
+                latencies.append(time.monotonic() - request_started_at)
+                if not ok:
+                    errors += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started_at
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0
+        }
+    }
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def run_macrobenchmarks(workdir: str, args: argparse.Namespace, concurrencies: List[int]) -> List[Dict[str, Any]]:
+    """Throughput of POST /configure and POST /preview against server.py running in workdir"""
+    port = args.port or free_port()
+    log = open(os.path.join(workdir, "server.log"), 'w', encoding='utf-8')
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(SERVER_DIR, "server.py"), "--host", "127.0.0.1", "--port", str(port)],
+        cwd=workdir, stdout=log, stderr=subprocess.STDOUT
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    runs = []
+    try:
+        deadline = time.monotonic() + 15
+        while True:
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f"Server did not start, see {log.name}")
+            try:
+                with urllib.request.urlopen(f"{base_url}/health", timeout=1):
+                    break
+            except OSError:
+                time.sleep(0.1)
+
+        for endpoint in ("configure", "preview"):
+            for concurrency in concurrencies:
+                def request(index: int, endpoint: str = endpoint) -> bool:
+                    # Clusters rotate and alternate between two variants, so every request changes its cluster
+                    body = config_request(f"e2e-{index % args.clusters}", args.groups, variant=(index // args.clusters) % 2)
+                    status, response = http_json(f"{base_url}/{endpoint}", body)
+                    return status == 200 and response.get("success", False)
+
+                run = {"benchmark": f"e2e_{endpoint}", "worker_groups": args.groups,
+                       **run_load(request, concurrency, args.requests, args.duration)}
+                runs.append(run)
+                print(f"  {run['benchmark']:<32} c={concurrency:<4} {run['requests']:>5} requests  "
+                      f"{run['throughput_rps']:>8.2f} req/s  p50 {run['latency_ms']['p50']:>8.1f} ms  "
+                      f"p95 {run['latency_ms']['p95']:>8.1f} ms  errors {run['errors']}")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return runs
+
+def run_codec_benchmarks(sizes: List[int], min_time: float, min_iterations: int) -> List[Dict[str, Any]]:
+    """Time the YAML codec against its pure-Python dumper on cluster templates and configuration
+    files, and check that both produce the same bytes (the "identical" field of every run)"""
+    handler = ConfigurationHandler("cluster_configs")
+    runs = []
+    print(f"  libyaml: {'available' if yaml_codec.LIBYAML else 'not available, the codec uses pure Python'}")
+
+    # Identity only, too small to time
+    edge = edge_case_config()
+    edge_template = render_template(handler, edge)
+    edge_identical = (
+        edge_template ==
+        '---\n'.join(yaml.dump(resource, Dumper=yaml_codec.PythonDumper, **YAML_OPTIONS)
+                      for resource in yaml_codec.safe_load_all(edge_template)) and
+        yaml_codec.dump(edge.to_dict(), **YAML_OPTIONS) == yaml.dump(edge.to_dict(), Dumper=yaml_codec.PythonDumper, **YAML_OPTIONS)
+    )
+    runs.append({"benchmark": "yaml_dump_edge_cases", "worker_groups": len(edge.worker_groups), "identical": edge_identical})
+    print(f"  {'yaml_dump_edge_cases':<32} {'identical' if edge_identical else 'OUTPUT DIFFERS'}")
+
+    for size in sizes:
+        config = cluster_config(config_request(f"bench-{size}", size, variant=1))
+        # The template as /configure writes it, and the resources it holds
+        rendered = render_template(handler, config)
+        resources = list(yaml_codec.safe_load_all(rendered))
+        config_dict = config.to_dict()
+
+        # Both dump one resource at a time and join them with document separators, like /configure
+        def template_python() -> str:
+            return '---\n'.join(yaml.dump(resource, Dumper=yaml_codec.PythonDumper, **YAML_OPTIONS) for resource in resources)
+
+        def template_codec() -> str:
+            return '---\n'.join(yaml_codec.dump(resource, **YAML_OPTIONS) for resource in resources)
+
+        template = template_python()
+        config_yaml = yaml.dump(config_dict, Dumper=yaml_codec.PythonDumper, **YAML_OPTIONS)
+        checks = {
+            "template": rendered == template and template_codec() == template,
+            "config": yaml_codec.dump(config_dict, **YAML_OPTIONS) == config_yaml,
+            "load": list(yaml_codec.safe_load_all(template)) == resources and yaml_codec.safe_load(config_yaml) == config_dict
+        }
+
+        benchmarks = [
+            ("yaml_dump_template_python", template_python, checks["template"]),
+            ("yaml_dump_template_codec", template_codec, checks["template"]),
+            ("yaml_dump_config_python", lambda: yaml.dump(config_dict, Dumper=yaml_codec.PythonDumper, **YAML_OPTIONS), checks["config"]),
+            ("yaml_dump_config_codec", lambda: yaml_codec.dump(config_dict, **YAML_OPTIONS), checks["config"]),
+            ("yaml_load_template_python", lambda: list(yaml.load_all(template, Loader=yaml.SafeLoader)), checks["load"]),
+            ("yaml_load_template_codec", lambda: list(yaml_codec.safe_load_all(template)), checks["load"])
+        ]
+        for name, function, identical in benchmarks:
+            run = {"benchmark": name, "worker_groups": size, "identical": identical, **measure(function, min_time, min_iterations)}
+            runs.append(run)
+            print(f"  {name:<32} groups={size:<4} {run['ops_per_second']:>10.1f} ops/s  "
+                  f"p50 {run['time_ms']['p50']:>9.3f} ms  {'identical' if identical else 'OUTPUT DIFFERS'}")
+    return runs
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+def run_key(run: Dict[str, Any]) -> Tuple[str, int, int]:
+    return run["benchmark"], run["worker_groups"], run.get("concurrency", 0)
+
+def compare(results: Dict[str, Any], baseline_path: str, threshold: float) -> bool:
+    """Print throughput changes against a baseline. Returns False on a regression beyond threshold percent"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {run_key(run): run for run in baseline.get("results", [])}
+
+    ok = True
+    print(f"\nComparison with {baseline_path} (revision {baseline.get('revision', 'unknown')}):")
+    for run in results["results"]:
+        before = previous.get(run_key(run))
+        if before is None:
+            continue
+        field = "ops_per_second" if "ops_per_second" in run else "throughput_rps"
+        if field not in run or field not in before:
+            # Identity-only runs have no timings
+            continue
+        change = (run[field] - before[field]) / before[field] * 100 if before[field] else 0.0
+        regression = change < -threshold
+        ok = ok and not regression
+        label = f"{run['benchmark']} groups={run['worker_groups']}" + (f" c={run['concurrency']}" if "concurrency" in run else "")
+        print(f"  {label:<50} {change:+7.1f}%{'  REGRESSION' if regression else ''}")
+    return ok
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ConfigurationHandler and the Cluster API Configuration Server")
+    parser.add_argument("--suites", default="micro,codec,e2e", help="Comma-separated suites: micro, codec, e2e")
+    parser.add_argument("--sizes", default="1,10,100,500", help="Comma-separated worker group counts of the microbenchmarks")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Minimum seconds per microbenchmark")
+    parser.add_argument("--min-iterations", type=int, default=5, help="Minimum calls per microbenchmark")
+    parser.add_argument("--concurrency", default="1,4", help="Comma-separated client concurrencies of the e2e run")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per e2e endpoint and concurrency")
+    parser.add_argument("--duration", type=float, help="Seconds per e2e endpoint and concurrency, instead of --requests")
+    parser.add_argument("--groups", type=int, default=10, help="Worker groups per e2e request")
+    parser.add_argument("--clusters", type=int, default=10, help="Clusters the e2e requests rotate over")
+    parser.add_argument("--port", type=int, help="Server port (default: a free port)")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--compare", help="Results file of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent for --compare")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary working directory")
+    args = parser.parse_args()
+
+    suites = [suite.strip() for suite in args.suites.split(",") if suite.strip()]
+    sizes = [int(value) for value in args.sizes.split(",") if value.strip()]
+    concurrencies = [int(value) for value in args.concurrency.split(",") if value.strip()]
+    output = os.path.abspath(args.output)
+
+    # The handler writes cluster_configs/ and capi_kubernetes/ relative to the working directory
+    workdir = tempfile.mkdtemp(prefix="cluster-api-configurer-bench-")
+    shutil.copytree(os.path.join(SERVER_DIR, "configs"), os.path.join(workdir, "configs"))
+    # Handler logging would dominate the timings
+    logging.basicConfig(level=logging.WARNING)
+
+    cwd = os.getcwd()
+    runs = []
+    try:
+        os.chdir(workdir)
+        if "micro" in suites:
+            print(f"Microbenchmarks (working directory {workdir})")
+            runs += run_microbenchmarks(sizes, args.min_time, args.min_iterations)
+        if "codec" in suites:
+            print("YAML codec benchmarks")
+            runs += run_codec_benchmarks(sizes, args.min_time, args.min_iterations)
+        if "e2e" in suites:
+            print("End-to-end benchmarks")
+            runs += run_macrobenchmarks(workdir, args, concurrencies)
+    finally:
+        os.chdir(cwd)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "benchmark": "cluster-api-configurer",
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "sizes": sizes,
+            "min_time_seconds": args.min_time,
+            "e2e_requests": args.requests,
+            "e2e_duration_seconds": args.duration,
+            "e2e_worker_groups": args.groups,
+            "e2e_clusters": args.clusters
+        },
+        "results": runs
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    ok = True
+    if any(not run.get("identical", True) for run in runs):
+        print("YAML codec output differs from its pure-Python dumper")
+        ok = False
+    if args.compare:
+        ok = compare(results, args.compare, args.threshold) and ok
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Cluster Models for Cluster API
+Cluster configuration and worker group models, shared by the handler, registry and storage
+"""
+
+from typing import Dict, Any, Optional
+
+class WorkerGroup:
+    """Worker group configuration"""
+    __slots__ = ("count", "plan_id", "taint_effect")
+    
+    def __init__(self, count: int, plan_id: str, taint_effect: str = None):
+        self.count = count
+        self.plan_id = plan_id
+        self.taint_effect = taint_effect
+    
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "count": self.count,
+            "planId": self.plan_id
+        }
+        if self.taint_effect:
+            result["taintEffect"] = self.taint_effect
+        return result
+    
+    def __eq__(self, other):
+        if not isinstance(other, WorkerGroup):
+            return False
+        return (self.count == other.count and 
+                self.plan_id == other.plan_id and 
+                self.taint_effect == other.taint_effect)
+    
+    def __hash__(self):
+        return hash((self.count, self.plan_id, self.taint_effect))
+
+class ClusterConfig:
+    """Cluster configuration model"""
+    __slots__ = ("region", "cluster_name", "control_plane_high_availability", "worker_groups")
+    
+    def __init__(
+        self,
+        region: str,
+        cluster_name: str,
+        control_plane_high_availability: bool = True,
+        worker_groups: Optional[Dict[str, WorkerGroup]] = None
+    ):
+        self.region = region
+        self.cluster_name = cluster_name
+        self.control_plane_high_availability = control_plane_high_availability
+        self.worker_groups = worker_groups or {}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], cluster_name: str = "") -> "ClusterConfig":
+        """Build from the stored (request) format. cluster_name is used if data has no clusterName"""
+        worker_groups = {}
+        for name, group_data in (data.get('workerGroups') or {}).items():
+            worker_groups[name] = WorkerGroup(
+                count=group_data.get('count', 0),
+                plan_id=group_data.get('planId', ''),
+                taint_effect=group_data.get('taintEffect')
+            )
+        
+        return cls(
+            region=data.get('region', ''),
+            cluster_name=data.get('clusterName', cluster_name),
+            control_plane_high_availability=data.get('controlPlaneHighAvailability', True),
+            worker_groups=worker_groups
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for YAML serialization"""
+        return {
+            "region": self.region,
+            "clusterName": self.cluster_name,
+            "controlPlaneHighAvailability": self.control_plane_high_availability,
+            "workerGroups": {
+                name: group.to_dict() for name, group in self.worker_groups.items()
+            }
+        }
+    
+    def __eq__(self, other):
+        if not isinstance(other, ClusterConfig):
+            return False
+        return (
+            self.region == other.region and
+            self.cluster_name == other.cluster_name and
+            self.control_plane_high_availability == other.control_plane_high_availability and
+            self.worker_groups == other.worker_groups
+        )
@@ -4,73 +4,18 @@ Configuration Handler for Cluster API
 Handles cluster configuration processing, YAML conversion, and diff calculation
 """
 
-import yaml
 import os
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from typing import Dict, Any, Hashable, List, Optional, Tuple
 
-logger = logging.getLogger(__name__)
-
-class WorkerGroup:
-    """Worker group configuration"""
-    def __init__(self, count: int, plan_id: str, taint_effect: str = None):
-        self.count = count
-        self.plan_id = plan_id
-        self.taint_effect = taint_effect
-    
-    def to_dict(self) -> Dict[str, Any]:
-        result = {
-            "count": self.count,
-            "planId": self.plan_id
-        }
-        if self.taint_effect:
-            result["taintEffect"] = self.taint_effect
-        return result
-    
-    def __eq__(self, other):
-        if not isinstance(other, WorkerGroup):
-            return False
-        return (self.count == other.count and 
-                self.plan_id == other.plan_id and 
-                self.taint_effect == other.taint_effect)
-    
-    def __hash__(self):
-        return hash((self.count, self.plan_id, self.taint_effect))
+import yaml_codec
+from cluster_models import ClusterConfig, WorkerGroup
+from config_registry import ClusterConfigRegistry
+from config_storage import YAML_OPTIONS, ConfigStorage, FileWriter, YamlDirectoryStorage, file_signature
 
-class ClusterConfig:
-    """Cluster configuration model"""
-    def __init__(
-        self,
-        region: str,
-        cluster_name: str,
-        control_plane_high_availability: bool = True,
-        worker_groups: Optional[Dict[str, WorkerGroup]] = None
-    ):
-        self.region = region
-        self.cluster_name = cluster_name
-        self.control_plane_high_availability = control_plane_high_availability
-        self.worker_groups = worker_groups or {}
-    
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for YAML serialization"""
-        return {
-            "region": self.region,
-            "clusterName": self.cluster_name,
-            "controlPlaneHighAvailability": self.control_plane_high_availability,
-            "workerGroups": {
-                name: group.to_dict() for name, group in self.worker_groups.items()
-            }
-        }
-    
-    def __eq__(self, other):
-        if not isinstance(other, ClusterConfig):
-            return False
-        return (
-            self.region == other.region and
-            self.cluster_name == other.cluster_name and
-            self.control_plane_high_availability == other.control_plane_high_availability and
-            self.worker_groups == other.worker_groups
-        )
+logger = logging.getLogger(__name__)
 
 class ConfigDiff:
     """Configuration difference result"""
@@ -83,65 +28,80 @@ class ConfigDiff:
         self.has_changes = False
 
 class ConfigurationHandler:
-    """Handles cluster configuration processing and storage"""
+    """Handles cluster configuration processing and storage.
+
+    Cluster configurations are kept in a storage backend: YAML files in config_dir by
+    default, or an SQLite database (see config_storage). Parsed configurations and defaults
+    are cached in memory together with the storage signature they were read at. Every
+    lookup checks the signature and loads the configuration again only if it changed, so
+    changes made outside the server are picked up while repeated previews do no parsing.
+    Cached objects are shared and must not be modified.
+
+    Saving renders the cluster template incrementally: the YAML of the control plane
+    documents and of every worker group's documents is cached under the inputs it was
+    rendered from, so only the documents of changed groups (or all of them after a region,
+    HA or defaults change) are rendered again. Files are replaced atomically and only when
+    their content changes.
+
+    The registry holds the configurations of all clusters for fleet queries. It is filled
+    by load_registry() at startup and updated on every save, and whenever a lookup finds
+    that a configuration was changed or deleted outside the server.
+    """
     
-    def __init__(self, config_dir: str = "cluster_configs"):
+    def __init__(self, config_dir: str = "cluster_configs", storage: Optional[ConfigStorage] = None):
         self.config_dir = config_dir
-        self._ensure_config_dir()
-    
-    def _ensure_config_dir(self):
-        """Ensure configuration directory exists"""
-        if not os.path.exists(self.config_dir):
-            os.makedirs(self.config_dir)
-            logger.info(f"Created configuration directory: {self.config_dir}")
-    
-    def _get_config_file_path(self, cluster_name: str) -> str:
-        """Get the file path for a cluster configuration"""
-        safe_name = self._sanitize_filename(cluster_name)
-        return os.path.join(self.config_dir, f"{safe_name}.yaml")
-    
-    def _sanitize_filename(self, filename: str) -> str:
-        """Sanitize filename to be filesystem safe"""
-        # Replace invalid characters with underscores
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            filename = filename.replace(char, '_')
-        return filename
+        self._cache_lock = threading.Lock()
+        # Per cluster: storage signature and configuration read at it
+        self._config_cache: Dict[str, Tuple[Hashable, Optional[ClusterConfig]]] = {}
+        self._defaults_cache: Optional[Tuple[Optional[Tuple[int, int, int]], Dict[str, Any]]] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Per cluster: rendered YAML documents, by the inputs they were rendered from
+        self._document_cache: Dict[str, Dict[Tuple, Tuple[str, ...]]] = {}
+        # Atomic write-if-different of configuration files and cluster templates
+        self.file_writer = FileWriter()
+        self.documents_rendered = 0
+        self.documents_reused = 0
+        self.storage = storage or YamlDirectoryStorage(config_dir, self.file_writer)
+        self.registry = ClusterConfigRegistry()
     
     def _load_existing_config(self, cluster_name: str) -> Optional[ClusterConfig]:
-        """Load existing configuration from file"""
-        config_path = self._get_config_file_path(cluster_name)
+        """Load existing configuration, from the cache unless it changed in storage"""
+        # Signature before loading: a change during the load leaves a stale signature, so
+        # the next lookup loads the configuration again
+        signature = self.storage.signature(cluster_name)
         
-        if not os.path.exists(config_path):
+        if signature is None:
+            with self._cache_lock:
+                deleted = self._config_cache.pop(cluster_name, None) is not None
+            if deleted:
+                self.registry.remove(cluster_name)
             return None
         
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f)
-            
-            if not data:
-                return None
-            
-            # Parse worker groups
-            worker_groups = {}
-            if 'workerGroups' in data:
-                for name, group_data in data['workerGroups'].items():
-                    worker_groups[name] = WorkerGroup(
-                        count=group_data.get('count', 0),
-                        plan_id=group_data.get('planId', ''),
-                        taint_effect=group_data.get('taintEffect')
-                    )
-            
-            return ClusterConfig(
-                region=data.get('region', ''),
-                cluster_name=data.get('clusterName', cluster_name),
-                control_plane_high_availability=data.get('controlPlaneHighAvailability', True),
-                worker_groups=worker_groups
-            )
-            
-        except Exception as e:
-            logger.error(f"Error loading existing config for {cluster_name}: {e}")
-            return None
+        with self._cache_lock:
+            cached = self._config_cache.get(cluster_name)
+            if cached is not None and cached[0] == signature:
+                self.cache_hits += 1
+                return cached[1]
+            self.cache_misses += 1
+        
+        config = self.storage.load(cluster_name)
+        with self._cache_lock:
+            self._config_cache[cluster_name] = (signature, config)
+        if config is not None:
+            self.registry.put(config)
+        else:
+            self.registry.remove(cluster_name)
+        return config
+    
+    def load_registry(self):
+        """Load every stored configuration into the registry and the configuration cache"""
+        started_at = time.monotonic()
+        for signature, config in self.storage.load_all():
+            with self._cache_lock:
+                self._config_cache[config.cluster_name] = (signature, config)
+            self.registry.put(config)
+        logger.info(f"Loaded {len(self.registry)} cluster configurations in {time.monotonic() - started_at:.2f}s")
     
     def _calculate_diff(self, old_config: Optional[ClusterConfig], new_config: ClusterConfig) -> ConfigDiff:
         """Calculate differences between old and new configurations"""
@@ -241,17 +201,17 @@ class ConfigurationHandler:
         return diff
     
     def _save_config(self, config: ClusterConfig) -> bool:
-        """Save configuration to YAML file and generate Kubernetes manifests"""
+        """Save configuration to storage and generate Kubernetes manifests"""
         try:
-            config_path = self._get_config_file_path(config.cluster_name)
-            
-            # Convert to dictionary and save as YAML
-            config_dict = config.to_dict()
+            self.storage.save(config)
             
-            with open(config_path, 'w', encoding='utf-8') as f:
-                yaml.dump(config_dict, f, default_flow_style=False, indent=2, sort_keys=False)
+            signature = self.storage.signature(config.cluster_name)
+            with self._cache_lock:
+                if signature is not None:
+                    self._config_cache[config.cluster_name] = (signature, config)
+            self.registry.put(config)
             
-            logger.info(f"Configuration saved to: {config_path}")
+            logger.info(f"Configuration saved to: {self.storage.location(config.cluster_name)}")
             
             # Generate Kubernetes manifests
             self._generate_kubernetes_manifests(config)
@@ -269,24 +229,36 @@ class ConfigurationHandler:
             capi_dir = os.path.join("capi_kubernetes", config.cluster_name)
             os.makedirs(capi_dir, exist_ok=True)
             
-            # Generate cluster template YAML
-            cluster_template = self._generate_cluster_template(config)
-            
-            # Save cluster template
+            # Generate the cluster template and save it if it changed
             template_path = os.path.join(capi_dir, "cluster-template.yaml")
-            with open(template_path, 'w', encoding='utf-8') as f:
-                f.write(cluster_template)
-            
-            logger.info(f"Kubernetes manifests generated in: {capi_dir}")
+            if self.file_writer.write_if_changed(template_path, '---\n'.join(self._render_cluster_documents(config))):
+                logger.info(f"Kubernetes manifests generated in: {capi_dir}")
+            else:
+                logger.info(f"Kubernetes manifests in {capi_dir} are unchanged")
             
         except Exception as e:
             logger.error(f"Error generating Kubernetes manifests: {e}")
             raise
     
     def _load_default_config(self) -> Dict[str, Any]:
-        """Load default configuration values from configs/defaults.yaml"""
+        """Load default configuration values, from the cache unless configs/defaults.yaml changed"""
+        config_path = os.path.join("configs", "defaults.yaml")
+        signature = file_signature(config_path)
+        
+        with self._cache_lock:
+            if self._defaults_cache is not None and self._defaults_cache[0] == signature:
+                self.cache_hits += 1
+                return self._defaults_cache[1]
+            self.cache_misses += 1
+        
+        defaults = self._read_default_config(config_path)
+        with self._cache_lock:
+            self._defaults_cache = (signature, defaults)
+        return defaults
+    
+    def _read_default_config(self, config_path: str) -> Dict[str, Any]:
+        """Read default configuration values from configs/defaults.yaml"""
         try:
-            config_path = os.path.join("configs", "defaults.yaml")
             if not os.path.exists(config_path):
                 # Fallback to hardcoded defaults if file doesn't exist
                 logger.warning(f"Default config file not found at {config_path}, using hardcoded defaults")
@@ -296,7 +268,7 @@ class ConfigurationHandler:
                 }
             
             with open(config_path, 'r', encoding='utf-8') as f:
-                defaults = yaml.safe_load(f)
+                defaults = yaml_codec.safe_load(f)
             
             # Validate required fields
             required_fields = ["kubernetesVersion", "controlPlanePlan"]
@@ -315,21 +287,59 @@ class ConfigurationHandler:
                 "controlPlanePlan": "vc2-2c-4gb"
             }
 
-    def _generate_cluster_template(self, config: ClusterConfig) -> str:
-        """Generate cluster template YAML based on cluster_template.ts logic"""
-        
-        # Load default configuration values
+    def _render_cluster_documents(self, config: ClusterConfig) -> List[str]:
+        """YAML documents of the cluster template, in document order. Documents whose inputs
+        did not change since the cluster was last rendered come from the cache"""
         defaults = self._load_default_config()
+        versions = (defaults["kubernetesVersion"], defaults["controlPlanePlan"])
+        with self._cache_lock:
+            previous = self._document_cache.get(config.cluster_name, {})
+        current: Dict[Tuple, Tuple[str, ...]] = {}
+        rendered = 0
         
-        # Default values (should match config.ts)
-        default_config = {
-            "region": config.region,
-            "kubernetesVersion": defaults["kubernetesVersion"],
-            "controlPlaneCount": 3 if config.control_plane_high_availability else 1,
-            "controlPlanePlan": defaults["controlPlanePlan"],
-            "workerGroups": config.worker_groups
-        }
+        def documents(key: Tuple, generate) -> Tuple[str, ...]:
+            nonlocal rendered
+            yaml_documents = previous.get(key)
+            if yaml_documents is None:
+                yaml_documents = tuple(yaml_codec.dump(resource, **YAML_OPTIONS) for resource in generate())
+                rendered += len(yaml_documents)
+            current[key] = yaml_documents
+            return yaml_documents
+        
+        control_plane = documents(
+            ("control-plane", config.region, config.control_plane_high_availability, *versions),
+            lambda: self._generate_control_plane_resources(config, defaults)
+        )
+        worker_groups = [
+            documents(
+                ("worker-group", group_name, group.count, group.plan_id, group.taint_effect, config.region, *versions),
+                lambda group_name=group_name, group=group: self._generate_worker_group_resources(config, group_name, group, defaults)
+            )
+            for group_name, group in config.worker_groups.items()
+        ]
+        yaml_documents = self._order_documents(list(control_plane), worker_groups)
         
+        # Keep only the documents of this render, so the cache does not grow with every change
+        with self._cache_lock:
+            self._document_cache[config.cluster_name] = current
+            self.documents_rendered += rendered
+            self.documents_reused += len(yaml_documents) - rendered
+        logger.info(f"Rendered {rendered} of {len(yaml_documents)} template documents for cluster: {config.cluster_name}")
+        return yaml_documents
+
+    def _order_documents(self, control_plane: List[Any], worker_groups: List[Tuple[Any, Any, Any]]) -> List[Any]:
+        """Template document order: the control plane, then the MachineDeployments, the
+        VultrMachineTemplates and the KubeadmConfigTemplates of all worker groups"""
+        return [
+            *control_plane,
+            *(group[0] for group in worker_groups),
+            *(group[1] for group in worker_groups),
+            *(group[2] for group in worker_groups),
+        ]
+
+    def _generate_control_plane_resources(self, config: ClusterConfig, defaults: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Cluster, VultrCluster, KubeadmControlPlane and control plane VultrMachineTemplate.
+        They depend on the cluster name, region, control plane HA and defaults only"""
         # Generate Cluster resource
         cluster = {
             "apiVersion": "cluster.x-k8s.io/v1beta1",
@@ -379,8 +389,8 @@ class ConfigurationHandler:
                 "name": f"{config.cluster_name}-control-plane"
             },
             "spec": {
-                "replicas": default_config["controlPlaneCount"],
-                "version": default_config["kubernetesVersion"],
+                "replicas": 3 if config.control_plane_high_availability else 1,
+                "version": defaults["kubernetesVersion"],
                 "machineTemplate": {
                     "infrastructureRef": {
                         "apiVersion": "infrastructure.cluster.x-k8s.io/v1beta1",
@@ -437,7 +447,7 @@ class ConfigurationHandler:
             "spec": {
                 "template": {
                     "spec": {
-                        "planID": default_config["controlPlanePlan"],
+                        "planID": defaults["controlPlanePlan"],
                         "region": config.region,
                         "snapshot_id": "${SNAPSHOT_ID}",
                         "vpc_id": "${VPC_ID}",
@@ -447,124 +457,108 @@ class ConfigurationHandler:
             }
         }
         
-        # Generate MachineDeployment templates for each worker group
-        worker_machine_deployments = []
-        vultr_worker_machine_templates = []
-        kubeadm_config_templates = []
-        
-        for group_name, group in config.worker_groups.items():
-            # MachineDeployment
-            worker_machine_deployments.append({
-                "apiVersion": "cluster.x-k8s.io/v1beta1",
-                "kind": "MachineDeployment",
-                "metadata": {
-                    "name": f"{config.cluster_name}-{group_name}",
-                    "labels": {
-                        "cluster.x-k8s.io/cluster-name": config.cluster_name
+        return [cluster, vultr_cluster, kubeadm_control_plane, control_plane_machine_template]
+
+    def _generate_worker_group_resources(self, config: ClusterConfig, group_name: str, group: WorkerGroup,
+                                         defaults: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """MachineDeployment, VultrMachineTemplate and KubeadmConfigTemplate of a worker group.
+        They depend on the cluster name, region, the group and defaults only"""
+        # MachineDeployment
+        machine_deployment = {
+            "apiVersion": "cluster.x-k8s.io/v1beta1",
+            "kind": "MachineDeployment",
+            "metadata": {
+                "name": f"{config.cluster_name}-{group_name}",
+                "labels": {
+                    "cluster.x-k8s.io/cluster-name": config.cluster_name
+                }
+            },
+            "spec": {
+                "clusterName": config.cluster_name,
+                "replicas": group.count,
+                "selector": {
+                    "matchLabels": {
+                        "cluster.x-k8s.io/cluster-name": config.cluster_name,
                     }
                 },
-                "spec": {
-                    "clusterName": config.cluster_name,
-                    "replicas": group.count,
-                    "selector": {
-                        "matchLabels": {
+                "template": {
+                    "metadata": {
+                        "labels": {
                             "cluster.x-k8s.io/cluster-name": config.cluster_name,
+                            f"node-role.kubernetes.io/{group_name}": "",
                         }
                     },
-                    "template": {
-                        "metadata": {
-                            "labels": {
-                                "cluster.x-k8s.io/cluster-name": config.cluster_name,
-                                f"node-role.kubernetes.io/{group_name}": "",
-                            }
-                        },
-                        "spec": {
-                            "clusterName": config.cluster_name,
-                            "version": default_config["kubernetesVersion"],
-                            "bootstrap": {
-                                "configRef": {
-                                    "apiVersion": "bootstrap.cluster.x-k8s.io/v1beta1",
-                                    "kind": "KubeadmConfigTemplate",
-                                    "name": f"{config.cluster_name}-{group_name}"
-                                }
-                            },
-                            "infrastructureRef": {
-                                "apiVersion": "infrastructure.cluster.x-k8s.io/v1beta1",
-                                "kind": "VultrMachineTemplate",
+                    "spec": {
+                        "clusterName": config.cluster_name,
+                        "version": defaults["kubernetesVersion"],
+                        "bootstrap": {
+                            "configRef": {
+                                "apiVersion": "bootstrap.cluster.x-k8s.io/v1beta1",
+                                "kind": "KubeadmConfigTemplate",
                                 "name": f"{config.cluster_name}-{group_name}"
                             }
+                        },
+                        "infrastructureRef": {
+                            "apiVersion": "infrastructure.cluster.x-k8s.io/v1beta1",
+                            "kind": "VultrMachineTemplate",
+                            "name": f"{config.cluster_name}-{group_name}"
                         }
                     }
                 }
-            })
-            
-            # VultrMachineTemplate
-            vultr_worker_machine_templates.append({
-                "apiVersion": "infrastructure.cluster.x-k8s.io/v1beta1",
-                "kind": "VultrMachineTemplate",
-                "metadata": {
-                    "name": f"{config.cluster_name}-{group_name}"
-                },
-                "spec": {
-                    "template": {
-                        "spec": {
-                            "planID": group.plan_id,
-                            "region": config.region,
-                            "snapshot_id": "${SNAPSHOT_ID}",
-                            "vpc_id": "${VPC_ID}",
-                            "sshKey": ["${SSH_KEY_ID}"]
-                        }
+            }
+        }
+        
+        # VultrMachineTemplate
+        machine_template = {
+            "apiVersion": "infrastructure.cluster.x-k8s.io/v1beta1",
+            "kind": "VultrMachineTemplate",
+            "metadata": {
+                "name": f"{config.cluster_name}-{group_name}"
+            },
+            "spec": {
+                "template": {
+                    "spec": {
+                        "planID": group.plan_id,
+                        "region": config.region,
+                        "snapshot_id": "${SNAPSHOT_ID}",
+                        "vpc_id": "${VPC_ID}",
+                        "sshKey": ["${SSH_KEY_ID}"]
                     }
                 }
-            })
-            
-            # KubeadmConfigTemplate
-            kubeadm_config_templates.append({
-                "apiVersion": "bootstrap.cluster.x-k8s.io/v1beta1",
-                "kind": "KubeadmConfigTemplate",
-                "metadata": {
-                    "name": f"{config.cluster_name}-{group_name}"
-                },
-                "spec": {
-                    "template": {
-                        "spec": {
-                            "joinConfiguration": {
-                                "nodeRegistration": {
-                                    "criSocket": "unix:///var/run/containerd/containerd.sock",
-                                    "kubeletExtraArgs": {
-                                        "cloud-provider": "external",
-                                        "cgroup-driver": "systemd",
-                                        "eviction-hard": "nodefs.available<0%,nodefs.inodesFree<0%,imagefs.available<0%",
-                                    },
-                                    "taints": [{
-                                        "key": "node-role",
-                                        "value": group_name,
-                                        "effect": group.taint_effect if group.taint_effect else "PreferNoSchedule"
-                                    }]
-                                }
+            }
+        }
+        
+        # KubeadmConfigTemplate
+        config_template = {
+            "apiVersion": "bootstrap.cluster.x-k8s.io/v1beta1",
+            "kind": "KubeadmConfigTemplate",
+            "metadata": {
+                "name": f"{config.cluster_name}-{group_name}"
+            },
+            "spec": {
+                "template": {
+                    "spec": {
+                        "joinConfiguration": {
+                            "nodeRegistration": {
+                                "criSocket": "unix:///var/run/containerd/containerd.sock",
+                                "kubeletExtraArgs": {
+                                    "cloud-provider": "external",
+                                    "cgroup-driver": "systemd",
+                                    "eviction-hard": "nodefs.available<0%,nodefs.inodesFree<0%,imagefs.available<0%",
+                                },
+                                "taints": [{
+                                    "key": "node-role",
+                                    "value": group_name,
+                                    "effect": group.taint_effect if group.taint_effect else "PreferNoSchedule"
+                                }]
                             }
                         }
                     }
                 }
-            })
-        
-        # Combine all resources
-        all_resources = [
-            cluster,
-            vultr_cluster,
-            kubeadm_control_plane,
-            control_plane_machine_template,
-            *worker_machine_deployments,
-            *vultr_worker_machine_templates,
-            *kubeadm_config_templates,
-        ]
-        
-        # Convert to YAML with proper document separators
-        yaml_documents = []
-        for resource in all_resources:
-            yaml_documents.append(yaml.dump(resource, default_flow_style=False, indent=2, sort_keys=False))
+            }
+        }
         
-        return '---\n'.join(yaml_documents)
+        return machine_deployment, machine_template, config_template
     
     def _prepare_config_response(self, config_data: Dict[str, Any], save: bool = False) -> Dict[str, Any]:
         """Shared logic for processing or previewing configuration changes"""
@@ -637,7 +631,7 @@ class ConfigurationHandler:
             "worker_groups_count": len(worker_groups),
         }
         if save:
-            response_data["config_file"] = self._get_config_file_path(cluster_name)
+            response_data["config_file"] = self.storage.location(cluster_name)
         response_data["changes_detected"] = diff.has_changes
         response_data["changes"] = {
             "region": {
@@ -654,6 +648,20 @@ class ConfigurationHandler:
         }
         return response_data
 
+    def cache_stats(self) -> Dict[str, Any]:
+        """Size and hit counts of the configuration cache, and template rendering and file write counts"""
+        with self._cache_lock:
+            return {
+                "cluster_configs": len(self._config_cache),
+                "defaults_loaded": self._defaults_cache is not None,
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "documents_rendered": self.documents_rendered,
+                "documents_reused": self.documents_reused,
+                "files_written": self.file_writer.files_written,
+                "files_unchanged": self.file_writer.files_unchanged
+            }
+
     def process_configuration(self, config_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process cluster configuration request"""
         try:
@@ -670,4 +678,19 @@ class ConfigurationHandler:
             return self._prepare_config_response(config_data, save=False)
         except Exception as e:
             logger.error(f"Error previewing configuration changes: {e}")
-            raise 
\ No newline at end of file
+            raise 
+
+# Handlers shared by all requests (the server builds a request handler per connection), by directory
+_shared_handlers: Dict[str, ConfigurationHandler] = {}
+_shared_handlers_lock = threading.Lock()
+
+def get_shared_configuration_handler(config_dir: str = "cluster_configs",
+                                     storage: Optional[ConfigStorage] = None) -> ConfigurationHandler:
+    """Get the process-wide handler of config_dir. storage is used when the handler is
+    created, by the first call"""
+    with _shared_handlers_lock:
+        handler = _shared_handlers.get(config_dir)
+        if handler is None:
+            handler = ConfigurationHandler(config_dir, storage)
+            _shared_handlers[config_dir] = handler
+        return handler
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Cluster Config Registry for Cluster API
+In-memory index of the configurations of all managed clusters, answering fleet queries
+(by region, control plane HA, plan ID or worker group name) and aggregate counts without
+reading cluster_configs/
+"""
+
+import copy
+import sys
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from cluster_models import ClusterConfig, WorkerGroup
+
+class ClusterConfigRegistry:
+    """Configurations of all clusters, with indexes by region, plan ID and worker group name.
+
+    Stored configurations are compact copies: region, group name and plan strings are
+    interned, and equal worker groups share one WorkerGroup object, so thousands of
+    clusters with similar groups take little memory. Shared worker groups are counted and
+    dropped with their last cluster. get() and list() return copies, so callers can
+    modify them freely.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._configs: Dict[str, ClusterConfig] = {}
+        # Shared worker groups and the number of stored groups using each
+        self._worker_groups: Dict[Tuple[int, str, Optional[str]], WorkerGroup] = {}
+        self._worker_group_refs: Dict[Tuple[int, str, Optional[str]], int] = {}
+        self._by_region: Dict[str, Set[str]] = {}
+        self._by_plan: Dict[str, Set[str]] = {}
+        self._by_worker_group: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._configs)
+
+    def put(self, config: ClusterConfig):
+        """Add or replace the configuration of a cluster"""
+        compact = copy.copy(config)
+        compact.region = sys.intern(config.region)
+        with self._lock:
+            self._unindex(config.cluster_name)
+            compact.worker_groups = {
+                sys.intern(group_name): self._shared_worker_group(group)
+                for group_name, group in config.worker_groups.items()
+            }
+            self._configs[config.cluster_name] = compact
+            self._by_region.setdefault(compact.region, set()).add(config.cluster_name)
+            for group_name, group in compact.worker_groups.items():
+                self._by_plan.setdefault(group.plan_id, set()).add(config.cluster_name)
+                self._by_worker_group.setdefault(group_name, set()).add(config.cluster_name)
+
+    def remove(self, cluster_name: str):
+        """Forget a cluster"""
+        with self._lock:
+            self._unindex(cluster_name)
+
+    def get(self, cluster_name: str) -> Optional[ClusterConfig]:
+        with self._lock:
+            config = self._configs.get(cluster_name)
+        return None if config is None else _copy_config(config)
+
+    def list(self, region: Optional[str] = None, control_plane_ha: Optional[bool] = None, plan_id: Optional[str] = None,
+             worker_group: Optional[str] = None) -> List[ClusterConfig]:
+        """Configurations sorted by cluster name, filtered by region, control plane HA, a plan ID
+        used by any worker group, and a worker group name"""
+        return [_copy_config(config) for config in self._select(region, control_plane_ha, plan_id, worker_group)]
+
+    def _select(self, region: Optional[str], control_plane_ha: Optional[bool], plan_id: Optional[str],
+                worker_group: Optional[str]) -> List[ClusterConfig]:
+        """The stored configurations matching the list() filters, sorted by cluster name"""
+        with self._lock:
+            names: Optional[Set[str]] = None
+            for index, value in ((self._by_region, region), (self._by_plan, plan_id), (self._by_worker_group, worker_group)):
+                if value is not None:
+                    matches = index.get(value, set())
+                    names = matches if names is None else names & matches
+            configs = [self._configs[name] for name in (self._configs if names is None else names)]
+
+        if control_plane_ha is not None:
+            configs = [config for config in configs if config.control_plane_high_availability == control_plane_ha]
+        return sorted(configs, key=lambda config: config.cluster_name)
+
+    def stats(self, region: Optional[str] = None, control_plane_ha: Optional[bool] = None, plan_id: Optional[str] = None,
+              worker_group: Optional[str] = None) -> Dict[str, Any]:
+        """Aggregate counts of the clusters matching the list() filters"""
+        configs = self._select(region, control_plane_ha, plan_id, worker_group)
+        regions: Dict[str, int] = {}
+        plans: Dict[str, Dict[str, int]] = {}
+        worker_nodes = 0
+        worker_groups = 0
+        for config in configs:
+            regions[config.region] = regions.get(config.region, 0) + 1
+            for group in config.worker_groups.values():
+                plan = plans.setdefault(group.plan_id, {"worker_groups": 0, "worker_nodes": 0})
+                plan["worker_groups"] += 1
+                plan["worker_nodes"] += group.count
+                worker_groups += 1
+                worker_nodes += group.count
+        ha_clusters = sum(1 for config in configs if config.control_plane_high_availability)
+
+        return {
+            "clusters": len(configs),
+            "control_plane_ha": ha_clusters,
+            "control_plane_nodes": 3 * ha_clusters + (len(configs) - ha_clusters),
+            "worker_groups": worker_groups,
+            "worker_nodes": worker_nodes,
+            "regions": dict(sorted(regions.items())),
+            "plans": dict(sorted(plans.items()))
+        }
+
+    def _shared_worker_group(self, group: WorkerGroup) -> WorkerGroup:
+        """The registry's instance of a worker group equal to group, counting one more use.
+        Called with the lock held"""
+        key = _worker_group_key(group)
+        shared = self._worker_groups.get(key)
+        if shared is None:
+            shared = copy.copy(group)
+            shared.plan_id = sys.intern(group.plan_id)
+            self._worker_groups[key] = shared
+        self._worker_group_refs[key] = self._worker_group_refs.get(key, 0) + 1
+        return shared
+
+    def _release_worker_group(self, group: WorkerGroup):
+        """Count one use less of a shared worker group, dropping it when unused. Called with the lock held"""
+        key = _worker_group_key(group)
+        refs = self._worker_group_refs.get(key, 0) - 1
+        if refs > 0:
+            self._worker_group_refs[key] = refs
+        else:
+            self._worker_group_refs.pop(key, None)
+            self._worker_groups.pop(key, None)
+
+    def _unindex(self, cluster_name: str):
+        """Remove a cluster from the configurations and indexes. Called with the lock held"""
+        config = self._configs.pop(cluster_name, None)
+        if config is None:
+            return
+        _discard(self._by_region, config.region, cluster_name)
+        for group_name, group in config.worker_groups.items():
+            _discard(self._by_plan, group.plan_id, cluster_name)
+            _discard(self._by_worker_group, group_name, cluster_name)
+            self._release_worker_group(group)
+
+def _worker_group_key(group: WorkerGroup) -> Tuple[int, str, Optional[str]]:
+    return (group.count, group.plan_id, group.taint_effect)
+
+def _copy_config(config: ClusterConfig) -> ClusterConfig:
+    """A copy of a stored configuration, with its own worker groups"""
+    return ClusterConfig(
+        region=config.region,
+        cluster_name=config.cluster_name,
+        control_plane_high_availability=config.control_plane_high_availability,
+        worker_groups={
+            group_name: WorkerGroup(group.count, group.plan_id, group.taint_effect)
+            for group_name, group in config.worker_groups.items()
+        }
+    )
+
+def _discard(index: Dict[str, Set[str]], key: str, cluster_name: str):
+    names = index.get(key)
+    if names is not None:
+        names.discard(cluster_name)
+        if not names:
+            del index[key]
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Configuration Storage for Cluster API
+Storage backends of cluster configurations: one YAML file per cluster in a directory, or an
+embedded SQLite database indexed by region, plan ID and worker group. Run as a script to
+migrate configurations between them and to export YAML files from a database.
+"""
+
+import abc
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+import yaml_codec
+from cluster_models import ClusterConfig
+
+logger = logging.getLogger(__name__)
+
+# Layout of every YAML file written. Lines are never folded, so libyaml and pure-Python PyYAML
+# write the same bytes
+YAML_OPTIONS = {"default_flow_style": False, "indent": 2, "sort_keys": False, "width": yaml_codec.WIDTH}
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """(mtime, size, inode) of a file, None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+class FileWriter:
+    """Atomic write-if-different of files.
+
+    Remembers the signature and content hash of every file it wrote, so rewriting a file
+    with what it already holds costs a stat. A file changed by someone else is compared by
+    content. Changed files are written to a temporary file that replaces the old one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._written: Dict[str, Tuple[Tuple[int, int, int], str]] = {}
+        self.files_written = 0
+        self.files_unchanged = 0
+
+    def write_if_changed(self, path: str, content: str) -> bool:
+        """Atomically replace path with content unless it already holds it. Returns True if written"""
+        data = content.encode('utf-8')
+        content_hash = hashlib.sha256(data).hexdigest()
+        signature = file_signature(path)
+
+        if signature is not None:
+            with self._lock:
+                unchanged = self._written.get(path) == (signature, content_hash)
+            if not unchanged:
+                # Not written by this writer, or changed since: compare the content
+                try:
+                    with open(path, 'rb') as f:
+                        unchanged = f.read() == data
+                except OSError:
+                    unchanged = False
+            if unchanged:
+                with self._lock:
+                    self._written[path] = (signature, content_hash)
+                    self.files_unchanged += 1
+                return False
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        signature = file_signature(path)
+        with self._lock:
+            if signature is not None:
+                self._written[path] = (signature, content_hash)
+            self.files_written += 1
+        return True
+
+class ConfigStorage(abc.ABC):
+    """Interface of cluster configuration storage.
+
+    signature() returns a value that changes whenever the stored configuration of a cluster
+    changes, also when it is changed by another process, and None if there is none. The
+    handler compares it to decide whether its cached configuration is current.
+    """
+
+    @abc.abstractmethod
+    def signature(self, cluster_name: str) -> Optional[Hashable]:
+        """Signature of a cluster's stored configuration (see the class docstring)"""
+
+    @abc.abstractmethod
+    def load(self, cluster_name: str) -> Optional[ClusterConfig]:
+        """Stored configuration of a cluster, None if there is none or it cannot be read"""
+
+    @abc.abstractmethod
+    def load_all(self) -> Iterator[Tuple[Hashable, ClusterConfig]]:
+        """(signature, configuration) of every stored cluster"""
+
+    @abc.abstractmethod
+    def save(self, config: ClusterConfig) -> bool:
+        """Store a configuration. Returns False if it was stored unchanged already"""
+
+    def save_many(self, configs: Iterable[ClusterConfig]) -> int:
+        """Store several configurations. Returns the number that changed"""
+        return sum(1 for config in configs if self.save(config))
+
+    def find(self, region: Optional[str] = None, control_plane_ha: Optional[bool] = None, plan_id: Optional[str] = None,
+             worker_group: Optional[str] = None) -> List[str]:
+        """Sorted names of the stored clusters matching all given filters"""
+        return sorted(
+            config.cluster_name for _, config in self.load_all()
+            if (region is None or config.region == region)
+            and (control_plane_ha is None or config.control_plane_high_availability == control_plane_ha)
+            and (plan_id is None or any(group.plan_id == plan_id for group in config.worker_groups.values()))
+            and (worker_group is None or worker_group in config.worker_groups)
+        )
+
+    @abc.abstractmethod
+    def location(self, cluster_name: str) -> str:
+        """Where a cluster's configuration is stored, for responses and logs"""
+
+class YamlDirectoryStorage(ConfigStorage):
+    """One <cluster>.yaml file per cluster in a directory. Signatures are file signatures.
+    Writes are atomic per file; save_many is not atomic across files"""
+
+    def __init__(self, config_dir: str = "cluster_configs", writer: Optional[FileWriter] = None):
+        self.config_dir = config_dir
+        self.writer = writer or FileWriter()
+        self._ensure_config_dir()
+
+    def _ensure_config_dir(self):
+        """Ensure configuration directory exists"""
+        if not os.path.exists(self.config_dir):
+            os.makedirs(self.config_dir)
+            logger.info(f"Created configuration directory: {self.config_dir}")
+
+    def _get_config_file_path(self, cluster_name: str) -> str:
+        """Get the file path for a cluster configuration"""
+        safe_name = self._sanitize_filename(cluster_name)
+        return os.path.join(self.config_dir, f"{safe_name}.yaml")
+
+    def _sanitize_filename(self, filename: str) -> str:
+        """Sanitize filename to be filesystem safe"""
+        # Replace invalid characters with underscores
+        invalid_chars = '<>:"/\\|?*'
+        for char in invalid_chars:
+            filename = filename.replace(char, '_')
+        return filename
+
+    def signature(self, cluster_name: str) -> Optional[Tuple[int, int, int]]:
+        return file_signature(self._get_config_file_path(cluster_name))
+
+    def load(self, cluster_name: str) -> Optional[ClusterConfig]:
+        return self._read_config_file(cluster_name, self._get_config_file_path(cluster_name))
+
+    def load_all(self) -> Iterator[Tuple[Hashable, ClusterConfig]]:
+        if not os.path.isdir(self.config_dir):
+            return
+        for entry in sorted(os.scandir(self.config_dir), key=lambda entry: entry.name):
+            if not entry.name.endswith(".yaml") or not entry.is_file():
+                continue
+            # Stat before reading: a change during the read leaves a stale signature
+            signature = file_signature(entry.path)
+            config = self._read_config_file(entry.name[:-len(".yaml")], entry.path)
+            if signature is not None and config is not None:
+                yield signature, config
+
+    def save(self, config: ClusterConfig) -> bool:
+        return self.writer.write_if_changed(
+            self._get_config_file_path(config.cluster_name),
+            yaml_codec.dump(config.to_dict(), **YAML_OPTIONS)
+        )
+
+    def location(self, cluster_name: str) -> str:
+        return self._get_config_file_path(cluster_name)
+
+    def _read_config_file(self, cluster_name: str, config_path: str) -> Optional[ClusterConfig]:
+        """Parse a configuration file"""
+        if not os.path.exists(config_path):
+            return None
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                data = yaml_codec.safe_load(f)
+            return ClusterConfig.from_dict(data, cluster_name) if data else None
+        except Exception as e:
+            logger.error(f"Error loading existing config for {cluster_name}: {e}")
+            return None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clusters (
+    name TEXT PRIMARY KEY,
+    region TEXT NOT NULL,
+    control_plane_ha INTEGER NOT NULL,
+    config TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    updated_ns INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS worker_groups (
+    cluster TEXT NOT NULL,
+    name TEXT NOT NULL,
+    plan_id TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    taint_effect TEXT,
+    PRIMARY KEY (cluster, name)
+);
+CREATE INDEX IF NOT EXISTS clusters_region ON clusters (region);
+CREATE INDEX IF NOT EXISTS worker_groups_plan_id ON worker_groups (plan_id);
+CREATE INDEX IF NOT EXISTS worker_groups_name ON worker_groups (name);
+"""
+
+class SqliteStorage(ConfigStorage):
+    """Configurations in an embedded SQLite database.
+
+    The clusters table holds every configuration as JSON, with its region and control plane
+    HA as indexed columns; worker_groups holds one indexed row per worker group. A save that
+    changes nothing is not written. save_many stores all configurations in one transaction.
+    Signatures are (revision, update time), so changes made by other processes are seen.
+    """
+
+    def __init__(self, db_path: str = "cluster_configs.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # One connection shared by all request threads, serialized by the lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def signature(self, cluster_name: str) -> Optional[Tuple[int, int]]:
+        with self._lock:
+            row = self._conn.execute("SELECT revision, updated_ns FROM clusters WHERE name = ?", (cluster_name,)).fetchone()
+        return tuple(row) if row else None
+
+    def load(self, cluster_name: str) -> Optional[ClusterConfig]:
+        with self._lock:
+            row = self._conn.execute("SELECT config FROM clusters WHERE name = ?", (cluster_name,)).fetchone()
+        return ClusterConfig.from_dict(json.loads(row[0]), cluster_name) if row else None
+
+    def load_all(self) -> Iterator[Tuple[Hashable, ClusterConfig]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT name, config, revision, updated_ns FROM clusters ORDER BY name").fetchall()
+        for name, config, revision, updated_ns in rows:
+            yield (revision, updated_ns), ClusterConfig.from_dict(json.loads(config), name)
+
+    def save(self, config: ClusterConfig) -> bool:
+        return self.save_many([config]) > 0
+
+    def save_many(self, configs: Iterable[ClusterConfig]) -> int:
+        changed = 0
+        with self._lock, self._conn:
+            for config in configs:
+                changed += self._upsert(config)
+        return changed
+
+    def find(self, region: Optional[str] = None, control_plane_ha: Optional[bool] = None, plan_id: Optional[str] = None,
+             worker_group: Optional[str] = None) -> List[str]:
+        conditions = []
+        params: List[Any] = []
+        if region is not None:
+            conditions.append("c.region = ?")
+            params.append(region)
+        if control_plane_ha is not None:
+            conditions.append("c.control_plane_ha = ?")
+            params.append(int(control_plane_ha))
+        if plan_id is not None:
+            conditions.append("EXISTS (SELECT 1 FROM worker_groups w WHERE w.cluster = c.name AND w.plan_id = ?)")
+            params.append(plan_id)
+        if worker_group is not None:
+            conditions.append("EXISTS (SELECT 1 FROM worker_groups w WHERE w.cluster = c.name AND w.name = ?)")
+            params.append(worker_group)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT c.name FROM clusters c {where} ORDER BY c.name", params).fetchall()
+        return [name for name, in rows]
+
+    def location(self, cluster_name: str) -> str:
+        return f"{self.db_path}#{cluster_name}"
+
+    def _upsert(self, config: ClusterConfig) -> bool:
+        """Store one configuration unless unchanged. Called with the lock held, in a transaction"""
+        document = json.dumps(config.to_dict())
+        row = self._conn.execute("SELECT config, revision FROM clusters WHERE name = ?", (config.cluster_name,)).fetchone()
+        if row is not None and row[0] == document:
+            return False
+
+        self._conn.execute(
+            "INSERT OR REPLACE INTO clusters (name, region, control_plane_ha, config, revision, updated_ns, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                config.cluster_name,
+                config.region,
+                int(config.control_plane_high_availability),
+                document,
+                (row[1] if row else 0) + 1,
+                time.time_ns(),
+                datetime.now(timezone.utc).isoformat(timespec="seconds")
+            )
+        )
+        self._conn.execute("DELETE FROM worker_groups WHERE cluster = ?", (config.cluster_name,))
+        self._conn.executemany(
+            "INSERT INTO worker_groups (cluster, name, plan_id, count, taint_effect) VALUES (?, ?, ?, ?, ?)",
+            [
+                (config.cluster_name, name, group.plan_id, group.count, group.taint_effect)
+                for name, group in config.worker_groups.items()
+            ]
+        )
+        return True
+
+def copy_configs(source: ConfigStorage, target: ConfigStorage, cluster_names: Optional[List[str]] = None) -> Tuple[int, int]:
+    """Copy configurations (all, or those of cluster_names) from source to target.
+    Returns (configurations copied, configurations changed in target)"""
+    wanted = set(cluster_names) if cluster_names is not None else None
+    configs = [config for _, config in source.load_all() if wanted is None or config.cluster_name in wanted]
+    return len(configs), target.save_many(configs)
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migrate cluster configurations between YAML files and SQLite")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser("migrate", help="Copy all YAML configurations into a SQLite database")
+    migrate.add_argument("--config-dir", default="cluster_configs", help="YAML directory (default: cluster_configs)")
+    migrate.add_argument("--db-path", default="cluster_configs.db", help="SQLite database (default: cluster_configs.db)")
+
+    export = subparsers.add_parser("export", help="Write configurations from a SQLite database as YAML files")
+    export.add_argument("--db-path", default="cluster_configs.db", help="SQLite database (default: cluster_configs.db)")
+    export.add_argument("--config-dir", default="cluster_configs", help="YAML directory (default: cluster_configs)")
+    export.add_argument("--region", help="Only clusters in this region")
+    export.add_argument("--plan-id", help="Only clusters with a worker group of this plan")
+    export.add_argument("--worker-group", help="Only clusters with a worker group of this name")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == "migrate":
+        if not os.path.isdir(args.config_dir):
+            logger.error(f"Configuration directory does not exist: {args.config_dir}")
+            return 1
+        copied, changed = copy_configs(YamlDirectoryStorage(args.config_dir), SqliteStorage(args.db_path))
+        logger.info(f"Migrated {copied} configurations from {args.config_dir} to {args.db_path} ({changed} new or changed)")
+    else:
+        if not os.path.exists(args.db_path):
+            logger.error(f"Database does not exist: {args.db_path}")
+            return 1
+        source = SqliteStorage(args.db_path)
+        names = source.find(region=args.region, plan_id=args.plan_id, worker_group=args.worker_group)
+        copied, changed = copy_configs(source, YamlDirectoryStorage(args.config_dir), names)
+        logger.info(f"Exported {copied} configurations from {args.db_path} to {args.config_dir} ({changed} files written)")
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -9,8 +9,9 @@ import logging
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import sys
-from typing import Dict, Any
-from config_handler import ConfigurationHandler
+from typing import Dict, Any, List
+from config_handler import get_shared_configuration_handler
+from config_storage import SqliteStorage
 
 # Configure logging
 logging.basicConfig(
@@ -23,7 +24,7 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
     """HTTP request handler for the Cluster API Configuration server"""
     
     def __init__(self, *args, **kwargs):
-        self.config_handler = ConfigurationHandler()
+        self.config_handler = get_shared_configuration_handler()
         super().__init__(*args, **kwargs)
     
     def _set_response(self, status_code: int = 200, content_type: str = "application/json"):
@@ -62,6 +63,12 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
             
             if parsed_path.path == '/health':
                 self._handle_health_check()
+            elif parsed_path.path == '/clusters':
+                self._handle_clusters_request()
+            elif parsed_path.path == '/clusters/stats':
+                self._handle_cluster_stats_request()
+            elif parsed_path.path == '/clusters/config':
+                self._handle_cluster_config_request()
             else:
                 # Default server info
                 info = {
@@ -70,6 +77,9 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
                     "endpoints": {
                         "POST /configure": "Accept cluster configuration with region, clusterName, and workerGroups",
                         "POST /preview": "Preview configuration changes without applying them",
+                        "GET /clusters": "List managed clusters (filters: region, ha, plan_id, worker_group; pagination, details)",
+                        "GET /clusters/stats": "Aggregate counts of managed clusters (same filters as GET /clusters)",
+                        "GET /clusters/config": "Configuration of a managed cluster (requires 'cluster' parameter)",
                         "GET /health": "Health check endpoint"
                     },
                     "example_request": {
@@ -179,12 +189,110 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
             logger.error(f"Error processing preview request: {str(e)}")
             self._send_error_response(f"Error processing request: {str(e)}", 500)
     
+    def _parse_cluster_filters(self, query_params: Dict[str, List[str]]) -> Dict[str, Any]:
+        """Parse the region, ha, plan_id and worker_group filters of a fleet query"""
+        filters: Dict[str, Any] = {
+            field: query_params[param][0]
+            for param, field in (('region', 'region'), ('plan_id', 'plan_id'), ('worker_group', 'worker_group'))
+            if query_params.get(param, [''])[0]
+        }
+        ha = query_params.get('ha', [''])[0].lower()
+        if ha:
+            if ha not in ('true', 'false'):
+                raise ValueError("'ha' must be 'true' or 'false'")
+            filters['control_plane_ha'] = ha == 'true'
+        return filters
+    
+    def _handle_clusters_request(self):
+        """Handle managed clusters listing request, served from the registry"""
+        try:
+            query_params = parse_qs(urlparse(self.path).query)
+            try:
+                filters = self._parse_cluster_filters(query_params)
+            except ValueError as e:
+                self._send_error_response(str(e), 400)
+                return
+            
+            limit = None
+            if query_params.get('limit', [''])[0]:
+                try:
+                    limit = int(query_params['limit'][0])
+                except ValueError:
+                    limit = 0
+                if limit < 1:
+                    self._send_error_response("'limit' must be a positive integer", 400)
+                    return
+            
+            configs = self.config_handler.registry.list(**filters)
+            total = len(configs)
+            
+            # The cursor is the name of the last cluster of the previous page
+            cursor = query_params.get('cursor', [''])[0]
+            if cursor:
+                configs = [config for config in configs if config.cluster_name > cursor]
+            next_cursor = None
+            if limit is not None and len(configs) > limit:
+                configs = configs[:limit]
+                next_cursor = configs[-1].cluster_name
+            
+            response_data = {
+                "clusters": [config.cluster_name for config in configs],
+                "total": total,
+                "next_cursor": next_cursor
+            }
+            if query_params.get('details', [''])[0].lower() == 'true':
+                response_data["details"] = [config.to_dict() for config in configs]
+            
+            self._send_json_response(response_data)
+            
+        except Exception as e:
+            logger.error(f"Error handling clusters request: {str(e)}")
+            self._send_error_response(f"Error listing clusters: {str(e)}", 500)
+    
+    def _handle_cluster_stats_request(self):
+        """Handle fleet aggregate counts request, served from the registry"""
+        try:
+            query_params = parse_qs(urlparse(self.path).query)
+            try:
+                filters = self._parse_cluster_filters(query_params)
+            except ValueError as e:
+                self._send_error_response(str(e), 400)
+                return
+            
+            self._send_json_response(self.config_handler.registry.stats(**filters))
+            
+        except Exception as e:
+            logger.error(f"Error handling cluster stats request: {str(e)}")
+            self._send_error_response(f"Error computing cluster stats: {str(e)}", 500)
+    
+    def _handle_cluster_config_request(self):
+        """Handle request for the configuration of one managed cluster"""
+        try:
+            query_params = parse_qs(urlparse(self.path).query)
+            cluster_name = query_params.get('cluster', [''])[0]
+            if not cluster_name:
+                self._send_error_response("Missing required parameter: 'cluster'", 400)
+                return
+            
+            config = self.config_handler.registry.get(cluster_name)
+            if config is None:
+                self._send_error_response(f"Cluster '{cluster_name}' not found", 404)
+                return
+            
+            self._send_json_response(config.to_dict())
+            
+        except Exception as e:
+            logger.error(f"Error handling cluster config request: {str(e)}")
+            self._send_error_response(f"Error getting cluster configuration: {str(e)}", 500)
+    
     def _handle_health_check(self):
         """Handle health check requests"""
         health_data = {
             "status": "healthy",
             "service": "Cluster API Configuration Server",
-            "timestamp": self.date_time_string()
+            "timestamp": self.date_time_string(),
+            "config_cache": self.config_handler.cache_stats(),
+            "managed_clusters": len(self.config_handler.registry)
         }
         self._send_json_response(health_data)
     
@@ -192,14 +300,21 @@ class ClusterAPIHandler(BaseHTTPRequestHandler):
         """Override to use our logger"""
         logger.info(f"{self.address_string()} - {format % args}")
 
-def run_server(host: str = 'localhost', port: int = 8091):
+def run_server(host: str = 'localhost', port: int = 8091, storage: str = 'yaml', db_path: str = 'cluster_configs.db'):
     """Run the HTTP server"""
     server_address = (host, port)
+    # Without a storage the handler keeps YAML files in cluster_configs/
+    config_storage = SqliteStorage(db_path) if storage == 'sqlite' else None
+    config_handler = get_shared_configuration_handler(storage=config_storage)
+    logger.info(f"Storing cluster configurations in {storage} storage")
+    # Load all cluster configurations before serving fleet queries
+    config_handler.load_registry()
     httpd = HTTPServer(server_address, ClusterAPIHandler)
     
     logger.info(f"Starting Cluster API Configuration Server on {host}:{port}")
     logger.info(f"Server will accept POST requests to /configure with JSON containing cluster configuration")
     logger.info(f"Server will accept POST requests to /preview to preview configuration changes")
+    logger.info(f"Server will accept GET requests to /clusters, /clusters/stats and /clusters/config for fleet queries")
     logger.info(f"Server will accept GET requests to /health for health checks")
     logger.info("Press Ctrl+C to stop the server")
     
@@ -217,7 +332,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Cluster API Configuration Server')
     parser.add_argument('--host', default='localhost', help='Host to bind to (default: localhost)')
     parser.add_argument('--port', type=int, default=8080, help='Port to bind to (default: 8080)')
+    parser.add_argument('--storage', choices=['yaml', 'sqlite'], default='yaml',
+                        help='Cluster configuration storage: YAML files in cluster_configs/ or an SQLite database (default: yaml)')
+    parser.add_argument('--db-path', default='cluster_configs.db', help='SQLite database of --storage sqlite (default: cluster_configs.db)')
     
     args = parser.parse_args()
     
-    run_server(args.host, args.port) 
\ No newline at end of file
+    run_server(args.host, args.port, args.storage, args.db_path) 
\ No newline at end of file
@@ -5,9 +5,13 @@ Demonstrates how to interact with the server with comprehensive change testing
 """
 
 import requests
+import argparse
 import json
+import random
 import sys
+import threading
 import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 def test_server(base_url="http://localhost:8080"):
     """Test the Cluster API Configuration Server"""
@@ -466,22 +470,275 @@ def test_server(base_url="http://localhost:8080"):
     print("\n✅ All preview tests passed!")
     return True
 
+# Load mode: the same endpoints under concurrent traffic
+
+# Cluster configuration sent by the preview and configure load requests
+LOAD_CONFIG = {
+    "region": "ewr",
+    "clusterName": "load-test-cluster",
+    "controlPlaneHighAvailability": True,
+    "workerGroups": {
+        "system-workloads": {
+            "count": 2,
+            "planId": "vc2-2c-4gb",
+            "taintEffect": "NoExecute"
+        },
+        "app-workloads": {
+            "count": 3,
+            "planId": "vc2-4c-8gb"
+        }
+    }
+}
+
+# Requests of --mix, by name: (method, path, JSON body)
+LOAD_REQUESTS = {
+    "health": ("GET", "/health", None),
+    "info": ("GET", "/", None),
+    "preview": ("POST", "/preview", LOAD_CONFIG),
+    "configure": ("POST", "/configure", LOAD_CONFIG)
+}
+
+DEFAULT_MIX = "preview=8,health=2"
+
+# Upper bounds (milliseconds) of the latency histogram buckets
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+def parse_mix(mix: str) -> List[Tuple[str, int]]:
+    """Parse "name=weight,..." into (name, weight) pairs"""
+    weights = []
+    for entry in filter(None, mix.split(",")):
+        name, _, weight = entry.partition("=")
+        name = name.strip()
+        if name not in LOAD_REQUESTS:
+            raise ValueError(f"Unknown request '{name}' (available: {', '.join(LOAD_REQUESTS)})")
+        try:
+            weight = int(weight or 1)
+        except ValueError:
+            raise ValueError(f"Invalid weight for '{name}': {weight}")
+        if weight < 0:
+            raise ValueError(f"Invalid weight for '{name}': {weight}")
+        weights.append((name, weight))
+    if not any(weight for _, weight in weights):
+        raise ValueError("Request mix must have at least one positive weight")
+    return weights
+
+def mix_workload(mix: str, seed: int = 0) -> List[Dict[str, Any]]:
+    """Shuffled list of requests holding every request of the mix weight times"""
+    workload = []
+    for name, weight in parse_mix(mix):
+        method, path, body = LOAD_REQUESTS[name]
+        workload.extend({"name": name, "method": method, "path": path, "json": body} for _ in range(weight))
+    random.Random(seed).shuffle(workload)
+    return workload
+
+def record_scenario(base_url: str) -> List[Dict[str, Any]]:
+    """Run the test scenario once and return the requests it made, in order"""
+    recorded = []
+    real_get, real_post = requests.get, requests.post
+
+    def recorder(method: str, real: Callable) -> Callable:
+        def request(url, **kwargs):
+            path = url[len(base_url):] if url.startswith(base_url) else url
+            recorded.append({"name": f"{method} {path.split('?')[0] or '/'}", "method": method,
+                             "path": path, "json": kwargs.get("json")})
+            return real(url, **kwargs)
+        return request
+
+    requests.get, requests.post = recorder("GET", real_get), recorder("POST", real_post)
+    try:
+        test_server(base_url)
+    finally:
+        requests.get, requests.post = real_get, real_post
+    return recorded
+
+class LoadStats:
+    """Latencies and outcomes of load requests, per request name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, name: str, status: Optional[int], latency: float):
+        """Record a request. status None means no response; it and 5xx responses count as errors"""
+        with self._lock:
+            self.latencies.setdefault(name, []).append(latency)
+            statuses = self.statuses.setdefault(name, {})
+            key = str(status) if status is not None else "no_response"
+            statuses[key] = statuses.get(key, 0) + 1
+            if status is None or status >= 500:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+def percentile(samples: List[float], percent: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(round(percent / 100.0 * (len(samples) - 1))))]
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    samples = sorted(latencies)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p90_ms": round(percentile(samples, 90) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(samples[-1] * 1000, 2) if samples else 0.0
+    }
+
+def histogram(latencies: List[float]) -> List[Tuple[str, int]]:
+    """Request counts per latency bucket"""
+    counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    for latency in latencies:
+        milliseconds = latency * 1000
+        index = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if milliseconds <= bound), len(LATENCY_BUCKETS_MS))
+        counts[index] += 1
+    labels = [f"<= {bound} ms" for bound in LATENCY_BUCKETS_MS] + [f"> {LATENCY_BUCKETS_MS[-1]} ms"]
+    return list(zip(labels, counts))
+
+def run_load(base_url: str, workload: List[Dict[str, Any]], concurrency: int = 10, total: Optional[int] = None,
+             duration: Optional[float] = None, rate: Optional[float] = None, timeout: float = 30.0) -> Dict[str, Any]:
+    """Send the workload's requests round-robin from concurrency threads until total requests
+    were sent or duration seconds passed.
+
+    With a target rate, request i is scheduled at start + i / rate (open loop) and its latency
+    is measured from that time, so queueing behind a slow server counts against it instead of
+    lowering the offered load.
+    """
+    stats = LoadStats()
+    lock = threading.Lock()
+    next_index = [0]
+    started = time.monotonic()
+
+    def worker():
+        session = requests.Session()
+        while True:
+            with lock:
+                index = next_index[0]
+                next_index[0] += 1
+            if total is not None and index >= total:
+                return
+            scheduled = started + index / rate if rate else time.monotonic()
+            if duration is not None and scheduled - started >= duration:
+                return
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            request = workload[index % len(workload)]
+            try:
+                response = session.request(request["method"], f"{base_url}{request['path']}",
+                                           json=request["json"], timeout=timeout)
+                response.content
+                status = response.status_code
+            except requests.RequestException:
+                status = None
+            stats.record(request["name"], status, time.monotonic() - scheduled)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    all_latencies = [latency for latencies in stats.latencies.values() for latency in latencies]
+    return {
+        "params": {"concurrency": concurrency, "requests": total, "duration": duration, "rate": rate},
+        "elapsed_seconds": round(elapsed, 3),
+        "total": summarize(all_latencies, sum(stats.errors.values()), elapsed),
+        "histogram": histogram(all_latencies),
+        "requests": {
+            name: {**summarize(stats.latencies[name], stats.errors.get(name, 0), elapsed), "statuses": stats.statuses[name]}
+            for name in sorted(stats.latencies)
+        }
+    }
+
+def print_load_report(report: Dict[str, Any]):
+    total = report["total"]
+    print(f"\n📊 Load results ({report['elapsed_seconds']}s)")
+    print("=" * 50)
+    print(f"Requests: {total['requests']}  Errors: {total['errors']} ({total['error_rate']:.2%})  "
+          f"Throughput: {total['throughput_rps']} req/s")
+    print(f"Latency: p50 {total['p50_ms']} ms  p90 {total['p90_ms']} ms  p95 {total['p95_ms']} ms  "
+          f"p99 {total['p99_ms']} ms  max {total['max_ms']} ms")
+
+    print("\nLatency histogram:")
+    peak = max((count for _, count in report["histogram"]), default=0) or 1
+    for label, count in report["histogram"]:
+        if count:
+            print(f"  {label:>12} {count:>7}  {'#' * max(1, round(40 * count / peak))}")
+
+    print("\nPer request:")
+    for name, summary in report["requests"].items():
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(summary["statuses"].items()))
+        print(f"  {name}: {summary['requests']} requests, {summary['error_rate']:.2%} errors, "
+              f"p50 {summary['p50_ms']} ms, p99 {summary['p99_ms']} ms ({statuses})")
+
+def load_test(args) -> bool:
+    """Run load mode. Returns False if any request failed"""
+    if args.scenario:
+        print("Recording the test scenario...")
+        workload = record_scenario(args.base_url)
+        if not workload:
+            print("❌ The test scenario made no requests")
+            return False
+        print(f"Replaying {len(workload)} scenario requests")
+    else:
+        try:
+            workload = mix_workload(args.mix)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+
+    total = args.requests if args.requests is not None or args.duration is not None else 1000
+    print(f"Load: concurrency {args.concurrency}, "
+          + (f"{total} requests" if total is not None else f"{args.duration}s")
+          + (f", target rate {args.rate} req/s" if args.rate else ""))
+
+    report = run_load(args.base_url, workload, args.concurrency, total, args.duration, args.rate, args.timeout)
+    print_load_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+    return report["total"]["errors"] == 0
+
 def main():
     """Main function"""
-    if len(sys.argv) > 1:
-        base_url = sys.argv[1]
-    else:
-        base_url = "http://localhost:8080"
-    
+    parser = argparse.ArgumentParser(description="Test client for the Cluster API Configuration Server")
+    parser.add_argument("base_url", nargs="?", default="http://localhost:8080", help="Server URL")
+    parser.add_argument("--load", action="store_true", help="Send concurrent traffic instead of running the tests")
+    parser.add_argument("--concurrency", type=int, default=10, help="Load: concurrent clients (default: 10)")
+    parser.add_argument("--requests", type=int, help="Load: number of requests (default: 1000 unless --duration)")
+    parser.add_argument("--duration", type=float, help="Load: seconds to run")
+    parser.add_argument("--rate", type=float, help="Load: target requests per second (default: as fast as possible)")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"Load: weighted requests, from {', '.join(LOAD_REQUESTS)} (default: {DEFAULT_MIX})")
+    parser.add_argument("--scenario", action="store_true", help="Load: replay the requests of the test scenario")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Load: request timeout in seconds (default: 30)")
+    parser.add_argument("--output", help="Load: write the results as JSON to this file")
+    args = parser.parse_args()
+    base_url = args.base_url
+
     print(f"Testing server at: {base_url}")
     print("Make sure the server is running before executing this test.")
     print("You can start it with: python server.py")
     print()
-    
+
+    if args.load:
+        if not load_test(args):
+            sys.exit(1)
+        return
+
     input("Press Enter to start testing...")
-    
+
     success = test_server(base_url)
-    
+
     if success:
         print("\n🎉 All tests passed!")
     else:
@@ -489,4 +746,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,36 @@
+"""
+Shared fixtures for the Cluster API Configuration Server tests
+"""
+
+import os
+import shutil
+import sys
+from typing import Any, Dict
+
+import pytest
+
+# The server modules are flat files next to this folder
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from config_handler import ConfigurationHandler  # noqa: E402
+
+def config_request(cluster_name: str = "test-cluster", **worker_groups: Dict[str, Any]) -> Dict[str, Any]:
+    """/configure request body, with a default worker group when none is given"""
+    return {
+        "region": "ewr",
+        "clusterName": cluster_name,
+        "controlPlaneHighAvailability": True,
+        "workerGroups": worker_groups or {"workers": {"count": 2, "planId": "vc2-2c-4gb"}}
+    }
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory with the server's configs/, as the handler writes relative to it"""
+    shutil.copytree(os.path.join(SERVER_DIR, "configs"), str(tmp_path / "configs"))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def handler(workdir) -> ConfigurationHandler:
+    return ConfigurationHandler(str(workdir / "cluster_configs"))
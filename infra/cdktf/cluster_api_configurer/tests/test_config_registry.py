@@ -0,0 +1,56 @@
+"""
+Tests of the in-memory cluster configuration registry
+"""
+
+from cluster_models import ClusterConfig, WorkerGroup
+from config_registry import ClusterConfigRegistry
+
+def cluster(name, region="ewr", **worker_groups):
+    return ClusterConfig(region, name, True, worker_groups or {"workers": WorkerGroup(2, "vc2-2c-4gb")})
+
+def test_equal_worker_groups_are_shared():
+    registry = ClusterConfigRegistry()
+    registry.put(cluster("cluster-a"))
+    registry.put(cluster("cluster-b"))
+    assert len(registry._worker_groups) == 1
+    assert registry._worker_group_refs == {(2, "vc2-2c-4gb", None): 2}
+
+def test_unused_worker_groups_are_dropped():
+    registry = ClusterConfigRegistry()
+    for i in range(100):
+        registry.put(cluster("cluster-a", workers=WorkerGroup(i + 1, "vc2-2c-4gb")))
+    registry.put(cluster("cluster-b", workers=WorkerGroup(100, "vc2-2c-4gb")))
+    assert registry._worker_group_refs == {(100, "vc2-2c-4gb", None): 2}
+
+    registry.remove("cluster-a")
+    assert registry._worker_group_refs == {(100, "vc2-2c-4gb", None): 1}
+    registry.remove("cluster-b")
+    assert registry._worker_groups == {} and registry._worker_group_refs == {}
+
+def test_lookups_return_copies():
+    registry = ClusterConfigRegistry()
+    registry.put(cluster("cluster-a"))
+    registry.put(cluster("cluster-b"))
+
+    config = registry.get("cluster-a")
+    config.region = "lax"
+    config.worker_groups["workers"].count = 10
+    config.worker_groups["extra"] = WorkerGroup(1, "vc2-1c-2gb")
+    for listed in registry.list():
+        listed.worker_groups["workers"].plan_id = "changed"
+
+    for name in ("cluster-a", "cluster-b"):
+        assert registry.get(name) == cluster(name)
+    assert registry.list(region="ewr", plan_id="vc2-2c-4gb") == [cluster("cluster-a"), cluster("cluster-b")]
+    assert registry.stats()["worker_nodes"] == 4
+
+def test_filters_and_stats():
+    registry = ClusterConfigRegistry()
+    registry.put(cluster("cluster-a", gpu=WorkerGroup(1, "vcg-a100", "NoSchedule")))
+    registry.put(cluster("cluster-b", region="lax"))
+    registry.put(cluster("cluster-a", region="lax"))
+
+    assert [config.cluster_name for config in registry.list(region="lax")] == ["cluster-a", "cluster-b"]
+    assert registry.list(worker_group="gpu") == []
+    assert registry.stats(region="ewr")["clusters"] == 0
+    assert registry.stats()["plans"] == {"vc2-2c-4gb": {"worker_groups": 2, "worker_nodes": 4}}
@@ -0,0 +1,98 @@
+"""
+Tests of the storage backends and of migrating configurations between them
+"""
+
+import os
+
+import pytest
+
+import yaml_codec
+from cluster_models import ClusterConfig, WorkerGroup
+from config_storage import ConfigStorage, SqliteStorage, YamlDirectoryStorage, YAML_OPTIONS, copy_configs, main
+
+def cluster(name, region="ewr", plan_id="vc2-2c-4gb"):
+    return ClusterConfig(region, name, name.endswith("-ha"), {
+        "workers": WorkerGroup(2, plan_id),
+        "gpu": WorkerGroup(1, "plan é " * 20, "NoSchedule")
+    })
+
+CLUSTERS = [cluster("cluster-a"), cluster("cluster-b-ha", "ams"), cluster("cluster-c", "ams", "vc2-4c-8gb")]
+
+def read_dir(config_dir):
+    return {name: (config_dir / name).read_text() for name in sorted(os.listdir(config_dir))}
+
+def test_config_storage_is_abstract():
+    with pytest.raises(TypeError):
+        ConfigStorage()
+
+    class NoLocation(ConfigStorage):
+        def signature(self, cluster_name):
+            return None
+
+        def load(self, cluster_name):
+            return None
+
+        def load_all(self):
+            return iter(())
+
+        def save(self, config):
+            return False
+
+    with pytest.raises(TypeError):
+        NoLocation()
+
+def test_yaml_files_are_written_with_the_codec(tmp_path):
+    storage = YamlDirectoryStorage(str(tmp_path / "configs"))
+    assert storage.save(CLUSTERS[0])
+    assert not storage.save(CLUSTERS[0])
+    content = (tmp_path / "configs" / "cluster-a.yaml").read_text()
+    assert content == yaml_codec.dump(CLUSTERS[0].to_dict(), **YAML_OPTIONS)
+    assert storage.load("cluster-a") == CLUSTERS[0]
+
+def test_migrate_and_export_round_trip_byte_identical(tmp_path):
+    source = YamlDirectoryStorage(str(tmp_path / "source"))
+    assert source.save_many(CLUSTERS) == 3
+    database = SqliteStorage(str(tmp_path / "cluster_configs.db"))
+
+    assert copy_configs(source, database) == (3, 3)
+    assert copy_configs(source, database) == (3, 0)
+    assert sorted(config.cluster_name for _, config in database.load_all()) == [c.cluster_name for c in CLUSTERS]
+    assert database.load("cluster-b-ha") == CLUSTERS[1]
+
+    exported = YamlDirectoryStorage(str(tmp_path / "exported"))
+    assert copy_configs(database, exported) == (3, 3)
+    assert read_dir(tmp_path / "exported") == read_dir(tmp_path / "source")
+
+def test_export_filters(tmp_path):
+    database = SqliteStorage(str(tmp_path / "cluster_configs.db"))
+    database.save_many(CLUSTERS)
+    assert database.find(region="ams") == ["cluster-b-ha", "cluster-c"]
+    assert database.find(plan_id="vc2-4c-8gb") == ["cluster-c"]
+    assert database.find(control_plane_ha=True) == ["cluster-b-ha"]
+    assert database.find(worker_group="missing") == []
+
+    exported = YamlDirectoryStorage(str(tmp_path / "exported"))
+    assert copy_configs(database, exported, database.find(region="ams")) == (2, 2)
+    assert sorted(os.listdir(tmp_path / "exported")) == ["cluster-b-ha.yaml", "cluster-c.yaml"]
+
+def test_signature_changes_with_the_stored_configuration(tmp_path):
+    for storage in (YamlDirectoryStorage(str(tmp_path / "configs")), SqliteStorage(str(tmp_path / "cluster_configs.db"))):
+        assert storage.signature("cluster-a") is None
+        storage.save(CLUSTERS[0])
+        first = storage.signature("cluster-a")
+        storage.save(cluster("cluster-a", "lax"))
+        assert storage.signature("cluster-a") not in (None, first)
+
+def test_command_line_migration(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    YamlDirectoryStorage("cluster_configs").save_many(CLUSTERS)
+
+    monkeypatch.setattr("sys.argv", ["config_storage.py", "migrate"])
+    assert main() == 0
+    monkeypatch.setattr("sys.argv", ["config_storage.py", "export", "--config-dir", "ams", "--region", "ams"])
+    assert main() == 0
+    assert read_dir(tmp_path / "ams") == {
+        name: content for name, content in read_dir(tmp_path / "cluster_configs").items() if name != "cluster-a.yaml"
+    }
+    monkeypatch.setattr("sys.argv", ["config_storage.py", "export", "--db-path", "missing.db"])
+    assert main() == 1
@@ -0,0 +1,77 @@
+"""
+Tests that the YAML codec writes the same bytes with and without libyaml
+"""
+
+import os
+
+import pytest
+import yaml
+
+import yaml_codec
+from cluster_models import ClusterConfig, WorkerGroup
+from config_storage import YAML_OPTIONS
+
+from conftest import config_request
+
+requires_libyaml = pytest.mark.skipif(not yaml_codec.LIBYAML, reason="PyYAML was built without libyaml")
+
+def pure_python_dump(data):
+    return yaml.dump(data, Dumper=yaml_codec.PythonDumper, **YAML_OPTIONS)
+
+def libyaml_dump(data):
+    return yaml.dump(data, Dumper=yaml.CDumper, **YAML_OPTIONS)
+
+@requires_libyaml
+@pytest.mark.parametrize("value", [
+    "région-" * 30,
+    "plan é " * 40,
+    "x" * 70 + " long name",
+    "line\nbreak é " * 20,
+    "ascii words " * 30,
+])
+def test_long_values_are_not_folded_differently(value):
+    data = {"clusterName": "edge-name", "workerGroups": {"g0-é": {"planId": value}}}
+    assert pure_python_dump(data) == libyaml_dump(data)
+    assert yaml_codec.safe_load(pure_python_dump(data)) == data
+
+@requires_libyaml
+@pytest.mark.parametrize("key", [
+    "x" * length for length in (122, 123, 127, 128, 129)
+] + [
+    "é" * length for length in (63, 64, 65, 70)
+] + [
+    "😀" * 32, "😀" * 33, "grupo-é" * 20, "", "multi\nline", "123", "a: b"
+])
+def test_long_mapping_keys_are_written_like_libyaml(key):
+    data = {"workerGroups": {key: {"count": 1}, "other": [key]}}
+    assert pure_python_dump(data) == libyaml_dump(data)
+    assert yaml.dump(data, Dumper=yaml_codec.PythonSafeDumper, **YAML_OPTIONS) == \
+        yaml.dump(data, Dumper=yaml.CSafeDumper, **YAML_OPTIONS)
+    assert yaml_codec.safe_load(pure_python_dump(data)) == data
+
+def test_written_template_is_identical(handler):
+    config = ClusterConfig(
+        region="région-" * 12,
+        cluster_name="edge-" + "x" * 120,
+        control_plane_high_availability=True,
+        worker_groups={"g0-é": WorkerGroup(1, "vc2-1c-2gb"), "grupo-é" * 20: WorkerGroup(2, "plan é " * 20, "NoSchedule")}
+    )
+    handler.process_configuration(config.to_dict())
+    with open(os.path.join("capi_kubernetes", config.cluster_name, "cluster-template.yaml"), encoding="utf-8") as f:
+        template = f.read()
+    resources = list(yaml_codec.safe_load_all(template))
+    assert len(resources) == 4 + 3 * len(config.worker_groups)
+    assert template == "---\n".join(pure_python_dump(resource) for resource in resources)
+    assert yaml_codec.dump(config.to_dict(), **YAML_OPTIONS) == pure_python_dump(config.to_dict())
+
+def test_dumps_do_not_fold_by_default():
+    value = "word é " * 40
+    assert yaml_codec.dump({"value": value}).count("\n") == 1
+    assert yaml_codec.safe_dump({"value": value}).count("\n") == 1
+
+@pytest.mark.parametrize("cluster_name", ["Upper-Case", "under_score", "é-cluster", "x" * 130])
+def test_names_of_any_length_and_case_are_accepted(handler, cluster_name):
+    request = config_request(cluster_name, **{cluster_name: {"count": 1, "planId": "vc2-1c-2gb"}})
+    response = handler.process_configuration(request)
+    assert response["success"]
+    assert handler.registry.get(cluster_name).worker_groups[cluster_name].count == 1